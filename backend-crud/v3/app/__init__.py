@@ -42,6 +42,9 @@ def create_app():
         from app.routes.user import user_bp
         from app.routes.admin import admin_bp
         from app.routes.quiz_attempt import quiz_attempt_bp
+        from app.routes.sync import sync_bp
+        from app.routes.search import search_bp
+        from app.routes.export import export_bp
         print("Registering blueprints...")
         app.register_blueprint(highlight_bp, url_prefix='/api')
         app.register_blueprint(collection_bp, url_prefix='/api')
@@ -51,6 +54,9 @@ def create_app():
         app.register_blueprint(user_bp, url_prefix='/api')
         app.register_blueprint(admin_bp, url_prefix='/api')
         app.register_blueprint(quiz_attempt_bp, url_prefix='/api')
+        app.register_blueprint(sync_bp, url_prefix='/api')
+        app.register_blueprint(search_bp, url_prefix='/api')
+        app.register_blueprint(export_bp, url_prefix='/api')
         print("Blueprints registered successfully.")
 
     return app
\ No newline at end of file
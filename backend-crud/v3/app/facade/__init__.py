@@ -3,4 +3,8 @@ from .collection_facade import CollectionFacade
 from .summary_facade import SummaryFacade
 from .quiz_facade import QuizFacade
 from .user_facade import UserFacade
-from .quiz_attempt_facade import *
\ No newline at end of file
+from .quiz_attempt_facade import *
+from .summary_job_facade import SummaryJobFacade
+from .sync_facade import SyncFacade
+from .search_facade import SearchFacade
+from .export_facade import ExportFacade
\ No newline at end of file
@@ -2,6 +2,7 @@ from app.models.collection import Collection
 from app.models.highlight import Highlight
 from app.models.user import User
 from app.utils.db import db
+from app.utils.pagination import paginate, newest_first
 from datetime import datetime
 from sqlalchemy import and_
 
@@ -31,6 +32,11 @@ class CollectionFacade:
     def get_user_collections(user_id):
         return Collection.query.filter_by(user_id=user_id).all()
 
+    @staticmethod
+    def get_user_collections_page(user_id, limit, cursor=None):
+        return paginate(Collection.query.filter_by(user_id=user_id), newest_first(Collection), limit, cursor,
+                        count_key=('collections', user_id))
+
     @staticmethod
     def get_collection_by_id(collection_id):
         collection = Collection.query.get_or_404(collection_id)
@@ -0,0 +1,151 @@
+from app.facade.sync_facade import encode_cursor as encode_sync_cursor
+from app.models.collection import Collection
+from app.models.highlight import Highlight
+from app.models.quiz import Quiz
+from app.models.quiz_attempt import QuizAttempt
+from app.models.summary import Summary
+from app.schemas.collection import CollectionSchema
+from app.schemas.highlight import HighlightSchema
+from app.schemas.quiz import quiz_export_schema, quiz_export_stripped_schema
+from app.schemas.quiz_attempt import quiz_attempt_export_schema
+from app.schemas.summary import SummarySchema
+from app.utils.db import db
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import select, or_
+from sqlalchemy.orm import selectinload
+import base64
+import json
+import zlib
+
+EXPORT_VERSION = 1
+
+# Flat rows, as in sync: related objects are exported on their own and referenced by id
+export_highlights_schema = HighlightSchema(many=True, exclude=('user', 'collection'))
+export_collections_schema = CollectionSchema(many=True, exclude=('highlights', 'summaries', 'highlights_count', 'owner'))
+export_summaries_schema = SummarySchema(many=True, exclude=('collection', 'highlights', 'quiz', 'user'))
+
+def encode_cursor(section, row_id):
+    """Opaque cursor for the position after row `row_id` of `section`"""
+    raw = json.dumps({"s": section, "i": row_id}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        section, row_id = data['s'], str(data['i'])
+        if section not in [name for name, _ in ExportFacade.SECTIONS]:
+            raise ValueError
+        return section, row_id
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid export cursor")
+
+def _line(record):
+    return json.dumps(record, separators=(',', ':'), default=str) + "\n"
+
+class ExportFacade:
+    # Export order: (record type, model)
+    SECTIONS = (
+        ('collection', Collection),
+        ('highlight', Highlight),
+        ('summary', Summary),
+        ('quiz', Quiz),
+        ('quiz_attempt', QuizAttempt),
+    )
+
+    @staticmethod
+    def _scoped_query(section, user_id):
+        """Rows of `section` in the user's library: what sync sends, plus quizzes and their own attempts"""
+        accessible = Collection.accessible_ids(user_id)
+        summaries = or_(Summary.user_id == user_id, Summary.collection_id.in_(accessible))
+        if section == 'collection':
+            return Collection.query.filter(Collection.id.in_(accessible)).options(selectinload(Collection.collaborators))
+        if section == 'highlight':
+            return Highlight.query.filter(Highlight.user_id == user_id)
+        if section == 'summary':
+            return Summary.query.filter(summaries)
+        if section == 'quiz':
+            return Quiz.query.filter(Quiz.summary_id.in_(select(Summary.id).where(summaries)), Quiz.pregenerated.is_(False))
+        return QuizAttempt.query.filter(QuizAttempt.user_id == user_id)
+
+    @staticmethod
+    def _answered_quiz_ids(quiz_ids, user_id):
+        """
+        The quizzes among `quiz_ids` whose correct answers the user may export:
+        those on summaries they wrote, and those they have already attempted.
+        A collaborator must not get the answer key of a quiz before taking it.
+        """
+        attempted = select(QuizAttempt.quiz_id).where(QuizAttempt.user_id == user_id)
+        return set(db.session.scalars(
+            select(Quiz.id).join(Summary, Quiz.summary_id == Summary.id).where(
+                Quiz.id.in_(quiz_ids),
+                or_(Summary.user_id == user_id, Quiz.id.in_(attempted))
+            )
+        ))
+
+    @staticmethod
+    def _dump(section, rows, user_id):
+        if section == 'quiz':
+            answered = ExportFacade._answered_quiz_ids([row.id for row in rows], user_id)
+            return [(quiz_export_schema if row.id in answered else quiz_export_stripped_schema).dump(row)
+                    for row in rows]
+        schema = {
+            'collection': export_collections_schema,
+            'highlight': export_highlights_schema,
+            'summary': export_summaries_schema,
+            'quiz_attempt': quiz_attempt_export_schema,
+        }[section]
+        return schema.dump(rows)
+
+    @staticmethod
+    def export_lines(user_id, cursor=None):
+        """
+        The user's whole library as NDJSON lines: collections, highlights,
+        summaries, quizzes and quiz attempts. Each section is read in id order,
+        EXPORT_BATCH_SIZE rows per query, and the session is emptied after every
+        batch, so memory stays flat however large the library is. Every record
+        carries the cursor that resumes the export right after it. A fresh
+        export starts with a header whose `sync_cursor` catches up, through
+        /sync, on what changed while it ran; a complete one ends with an `end`
+        record. Call decode_cursor first to reject a bad cursor before streaming.
+        """
+        batch_size = current_app.config.get('EXPORT_BATCH_SIZE', 500)
+        names = [name for name, _ in ExportFacade.SECTIONS]
+        start, after = decode_cursor(cursor) if cursor else (names[0], None)
+
+        if not cursor:
+            started = datetime.utcnow() - timedelta(seconds=current_app.config.get('SYNC_OVERLAP_SECONDS', 5))
+            yield _line({
+                "type": "export",
+                "version": EXPORT_VERSION,
+                "exported_at": datetime.utcnow().isoformat(),
+                "sync_cursor": encode_sync_cursor((started, ''))
+            })
+
+        for section, model in ExportFacade.SECTIONS[names.index(start):]:
+            query = ExportFacade._scoped_query(section, user_id)
+            while True:
+                batch = query.filter(model.id > after) if after else query
+                rows = batch.order_by(model.id).limit(batch_size).all()
+                if not rows:
+                    break
+                ids = [row.id for row in rows]
+                records = ExportFacade._dump(section, rows, user_id)
+                # Release the rows and the connection while the client reads this batch
+                db.session.close()
+                yield ''.join(_line({"type": section, "cursor": encode_cursor(section, row_id), "data": data})
+                              for row_id, data in zip(ids, records))
+                if len(rows) < batch_size:
+                    break
+                after = ids[-1]
+            after = None
+
+        yield _line({"type": "end"})
+
+    @staticmethod
+    def gzip_stream(chunks):
+        """Gzip a stream of text chunks, flushing after each so a cut-off download still decompresses"""
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        for chunk in chunks:
+            yield compressor.compress(chunk.encode('utf-8')) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
@@ -1,8 +1,14 @@
 from app.models.highlight import Highlight
 from app.models.collection import Collection
+from app.models.search_document import SearchDocument, highlight_document
 from app.utils.db import db
+from app.utils.pagination import paginate, newest_first
+from app.utils.urls import url_hash
 from datetime import datetime
-from sqlalchemy import and_
+from flask import current_app
+from sqlalchemy import and_, insert
+from sqlalchemy.exc import IntegrityError
+import uuid
 
 class HighlightFacade:
     @staticmethod
@@ -27,6 +33,11 @@ class HighlightFacade:
     def get_user_highlights(user_id):
         return Highlight.query.filter_by(user_id=user_id).all()
 
+    @staticmethod
+    def get_user_highlights_page(user_id, limit, cursor=None):
+        return paginate(Highlight.query.filter_by(user_id=user_id), newest_first(Highlight), limit, cursor,
+                        count_key=('highlights', user_id))
+
     @staticmethod
     def get_highlight_by_id(highlight_id):
         return Highlight.query.get_or_404(highlight_id)
@@ -40,7 +51,11 @@ class HighlightFacade:
             highlight.timestamp = datetime.fromisoformat(data['timestamp'].replace('Z', '+00:00'))
         if 'collection_id' in data:
             highlight.collection_id = data['collection_id']
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            raise ValueError("An identical highlight already exists on this page")
         return highlight
 
     @staticmethod
@@ -62,13 +77,16 @@ class HighlightFacade:
 
     @staticmethod
     def get_highlights_by_url(url, user_id):
-        """Get all highlights that belong to a user and are from a specific URL"""
+        """
+        Get all highlights that belong to a user and are from a specific URL.
+        URLs are compared normalized (see app.utils.urls), through the (user_id, url_hash) index.
+        """
         return Highlight.query.filter(
             and_(
-                Highlight.url == url,
-                Highlight.user_id == user_id
+                Highlight.user_id == user_id,
+                Highlight.url_hash == url_hash(url)
             )
-        ).all()
+        ).order_by(Highlight.timestamp).all()
 
     @staticmethod
     def move_highlight_to_collection(highlight_id, collection_id, user_id):
@@ -88,7 +106,17 @@ class HighlightFacade:
 
     @staticmethod
     def save_highlight(data):
-        """Save a single highlight"""
+        """
+        Save a single highlight. Returns (highlight, created).
+        A retry carrying a `client_key` this user already sent returns the highlight saved the first time.
+        So does the same text from the same page (a double click or a retry without a key),
+        which the unique (user_id, content_hash) constraint catches in the database.
+        """
+        client_key = data.get('client_key')
+        if client_key:
+            existing = Highlight.query.filter_by(user_id=data['user_id'], client_key=client_key).first()
+            if existing:
+                return existing, False
         timestamp = datetime.fromisoformat(data['timestamp'].replace('Z', '+00:00'))
         collection_id = data.get('collection_id')
         highlight = Highlight(
@@ -96,8 +124,150 @@ class HighlightFacade:
             text=data['text'],
             timestamp=timestamp,
             collection_id=collection_id,
-            user_id=data['user_id']
+            user_id=data['user_id'],
+            client_key=client_key
         )
         db.session.add(highlight)
-        db.session.commit()
-        return highlight
\ No newline at end of file
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # The same client_key, or the same text on the same page, is already stored
+            db.session.rollback()
+            existing = None
+            if client_key:
+                existing = Highlight.query.filter_by(user_id=data['user_id'], client_key=client_key).first()
+            if existing is None:
+                content_hash = Highlight.compute_content_hash(data['user_id'], data['url'], data['text'])
+                existing = Highlight.query.filter_by(user_id=data['user_id'], content_hash=content_hash).first()
+            if existing is None:
+                raise
+            return existing, False
+        return highlight, True
+
+    @staticmethod
+    def _validate_batch_item(item, collections, user):
+        """Return the row to insert for one batch item, or raise ValueError describing what is wrong"""
+        if not isinstance(item, dict):
+            raise ValueError("Item must be an object")
+        url, text = item.get('url'), item.get('text')
+        if not isinstance(url, str) or not url or len(url) > 2048:
+            raise ValueError("url is required (at most 2048 characters)")
+        if not isinstance(text, str) or not text.strip():
+            raise ValueError("text is required")
+        try:
+            timestamp = datetime.fromisoformat(item['timestamp'].replace('Z', '+00:00'))
+        except (KeyError, TypeError, AttributeError, ValueError):
+            raise ValueError("timestamp must be an ISO 8601 date-time")
+        client_key = item.get('client_key')
+        if client_key is not None and (not isinstance(client_key, str) or not 0 < len(client_key) <= 64):
+            raise ValueError("client_key must be a string of at most 64 characters")
+        collection_id = item.get('collection_id')
+        if collection_id:
+            collection = collections.get(collection_id)
+            if not collection:
+                raise ValueError("Collection not found")
+            if not collection.can_access(user):
+                raise ValueError("Unauthorized access to collection")
+        return {
+            'id': str(uuid.uuid4()),
+            'url': url,
+            'text': text,
+            'timestamp': timestamp,
+            'collection_id': collection_id or None,
+            'user_id': user.id,
+            'client_key': client_key,
+            'url_hash': url_hash(url),
+            'content_hash': Highlight.compute_content_hash(user.id, url, text),
+            'updated_at': datetime.utcnow()
+        }
+
+    @staticmethod
+    def save_highlights_batch(items, user):
+        """
+        Insert many highlights in one transaction.
+        All items are validated in one pass and the valid ones are inserted with
+        a single executemany. An item whose `client_key` the user sent in an
+        earlier batch is a retry: it is not inserted again and reports the
+        highlight saved the first time, whatever its text, as in save_highlight.
+        Within one batch a repeated `client_key` is a duplicate only when the
+        item is the same highlight; otherwise it is an error. Returns one result
+        dict per item, in request order, with `status` `created`, `duplicate` or
+        `error`. The same text from the same page is a duplicate too.
+        """
+        max_items = current_app.config.get('HIGHLIGHT_BATCH_MAX_ITEMS', 500)
+        if len(items) > max_items:
+            raise ValueError(f"At most {max_items} highlights can be saved per batch")
+
+        collection_ids = {item.get('collection_id') for item in items
+                          if isinstance(item, dict) and isinstance(item.get('collection_id'), str)}
+        collections = {c.id: c for c in Collection.query.filter(Collection.id.in_(collection_ids))} \
+            if collection_ids else {}
+
+        results, rows = [], {}
+        for index, item in enumerate(items):
+            client_key = item.get('client_key') if isinstance(item, dict) else None
+            result = {'index': index, 'client_key': client_key}
+            try:
+                rows[index] = HighlightFacade._validate_batch_item(item, collections, user)
+                result['status'] = 'created'
+            except ValueError as e:
+                result.update(status='error', error=str(e))
+            results.append(result)
+
+        for attempt in range(2):
+            inserted = HighlightFacade._resolve_duplicates(results, rows, user.id)
+            try:
+                if inserted:
+                    db.session.execute(insert(Highlight), inserted)
+                    # The executemany bypasses the flush hooks that keep search documents in step
+                    db.session.execute(insert(SearchDocument), [highlight_document(row) for row in inserted])
+                db.session.commit()
+                break
+            except IntegrityError:
+                # A concurrent request inserted some of the same highlights; they are duplicates now
+                db.session.rollback()
+                if attempt:
+                    raise
+        return results
+
+    @staticmethod
+    def _resolve_duplicates(results, rows, user_id):
+        """
+        Mark items whose client_key or content is already stored or repeated in the batch;
+        return the rows to insert
+        """
+        existing = {}
+        for column in ('client_key', 'content_hash'):
+            values = {row[column] for row in rows.values() if row[column]}
+            if values:
+                attribute = getattr(Highlight, column)
+                existing[column] = dict(db.session.query(attribute, Highlight.id).filter(
+                    Highlight.user_id == user_id,
+                    attribute.in_(values)
+                ).all())
+
+        inserted, first_seen = [], {'client_key': {}, 'content_hash': {}}
+        batch_keys = {}  # client_key -> (index, content_hash) of its first item in this batch
+        for index, row in rows.items():
+            result = results[index]
+            if row['client_key']:
+                first = batch_keys.setdefault(row['client_key'], (index, row['content_hash']))
+                # Two different highlights under one key is a client bug, not a retry
+                if first[1] != row['content_hash']:
+                    result.update(status='error', error=f"client_key is already used by item {first[0]} "
+                                                        f"with a different highlight")
+                    continue
+            duplicate_of = None
+            for column in ('client_key', 'content_hash'):
+                value = row[column]
+                if value and duplicate_of is None:
+                    duplicate_of = existing.get(column, {}).get(value) or first_seen[column].get(value)
+            if duplicate_of:
+                result.update(status='duplicate', id=duplicate_of)
+                continue
+            for column in ('client_key', 'content_hash'):
+                if row[column]:
+                    first_seen[column][row[column]] = row['id']
+            result.update(status='created', id=row['id'])
+            inserted.append(row)
+        return inserted
\ No newline at end of file
@@ -2,6 +2,8 @@ from app.models.quiz_attempt import QuizAttempt
 from app.models.quiz import Quiz
 from app.models.user import User
 from app.utils.db import db
+from app.utils.pagination import paginate
+from sqlalchemy.orm import joinedload
 from datetime import datetime
 
 class QuizAttemptFacade:
@@ -50,13 +52,27 @@ class QuizAttemptFacade:
     @staticmethod
     def get_quiz_leaderboard(quiz_id):
         """Get leaderboard for a specific quiz (sorted by score)"""
-        attempts = QuizAttempt.query.filter_by(quiz_id=quiz_id).order_by(
+        attempts = QuizAttempt.query.filter_by(quiz_id=quiz_id).options(joinedload(QuizAttempt.user)).order_by(
             QuizAttempt.percentage.desc(),
             QuizAttempt.completed_at.asc()
         ).all()
         
         return attempts
 
+    @staticmethod
+    def get_quiz_attempts_page(quiz_id, limit, cursor=None):
+        """One page of a quiz's attempts, latest first"""
+        query = QuizAttempt.query.filter_by(quiz_id=quiz_id).options(joinedload(QuizAttempt.user))
+        order = [(QuizAttempt.completed_at, True), (QuizAttempt.id, True)]
+        return paginate(query, order, limit, cursor, count_key=('quiz_attempts', quiz_id))
+
+    @staticmethod
+    def get_quiz_leaderboard_page(quiz_id, limit, cursor=None):
+        """One page of the leaderboard, in the same order as get_quiz_leaderboard"""
+        order = [(QuizAttempt.percentage, True), (QuizAttempt.completed_at, False), (QuizAttempt.id, False)]
+        query = QuizAttempt.query.filter_by(quiz_id=quiz_id).options(joinedload(QuizAttempt.user))
+        return paginate(query, order, limit, cursor, count_key=('quiz_attempts', quiz_id))
+
     @staticmethod
     def delete_attempt(attempt_id):
         """Delete a quiz attempt"""
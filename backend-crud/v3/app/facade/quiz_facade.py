@@ -1,9 +1,17 @@
 from app.models.quiz import Quiz
 from app.models.summary import Summary
 from app.utils.db import db
-from datetime import datetime
-from app.utils.constants import STATIC_QUIZ_QUESTIONS
+from datetime import datetime, timedelta
+from app.utils import local_quiz
 from app.utils.ai_service import AIService
+from app.utils.job_queue import get_job_queue, JobQueueFull
+from app.utils.pagination import paginate, newest_first
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from concurrent.futures import ThreadPoolExecutor
+import logging
+
+logger = logging.getLogger(__name__)
 
 class QuizFacade:
     @staticmethod
@@ -12,11 +20,19 @@ class QuizFacade:
         title = data.get('title')
         questions = data.get('questions')
         timestamp = data.get('timestamp', datetime.utcnow())
-        num_questions = data.get('num_questions', 4)
+        num_questions = QuizFacade.validate_num_questions(data.get('num_questions', 4))
 
         # Check if a quiz already exists for this summary
         existing_quiz = Quiz.query.filter_by(summary_id=summary_id).first()
-        if existing_quiz:
+        if existing_quiz and existing_quiz.pregenerated and not questions:
+            # A quiz generated in the background is handed out instead of generating again,
+            # if it is the quiz that was asked for; otherwise it makes way for a new one
+            if QuizFacade.matches_request(existing_quiz, num_questions, data.get('mode')):
+                existing_quiz.timestamp = timestamp
+                return QuizFacade.claim_quiz(existing_quiz)
+            db.session.delete(existing_quiz)
+            db.session.commit()
+        elif existing_quiz:
             raise ValueError("A quiz already exists for this summary")
 
         # Get the summary
@@ -24,19 +40,31 @@ class QuizFacade:
         
         # Generate AI quiz if questions not provided
         if not questions:
+            context_texts = [h.text for h in summary.highlights]
             try:
                 ai_service = AIService()
-                quiz_data = ai_service.generate_quiz_from_summary(
-                    summary.content, 
-                    num_questions
-                )
+                if data.get('mode') == 'instant':
+                    quiz_data = ai_service.generate_instant_quiz(
+                        summary.content,
+                        num_questions,
+                        context_texts
+                    )
+                else:
+                    quiz_data = ai_service.generate_quiz_from_summary(
+                        summary.content, 
+                        num_questions,
+                        context_texts=context_texts
+                    )
                 title = quiz_data.get('title', 'Quiz based on summary')
                 questions = quiz_data.get('questions', [])
             except Exception as e:
-                # Fallback to static questions if AI fails
-                title = 'Quiz'
-                questions = STATIC_QUIZ_QUESTIONS
-                print(f"AI quiz generation failed, using fallback: {str(e)}")
+                # Fallback to a quiz built locally from the summary if AI fails
+                quiz_data = local_quiz.generate_quiz(summary.content, num_questions, context_texts)
+                title = quiz_data['title']
+                questions = quiz_data['questions']
+                logger.exception(f"AI quiz generation failed, using fallback: {e}")
+            # A summary too short for the local generator gives no questions; never store an empty quiz
+            questions = QuizFacade.require_questions(questions)
 
         # Create the quiz
         quiz = Quiz(
@@ -49,6 +77,35 @@ class QuizFacade:
         db.session.commit()
         return quiz
 
+    @staticmethod
+    def matches_request(quiz, num_questions, mode=None):
+        """Whether a pregenerated quiz is what generating one now would give: an AI quiz of num_questions questions"""
+        return mode != 'instant' and len(quiz.questions or []) == num_questions
+
+    @staticmethod
+    def claim_quiz(quiz):
+        """Hand a pregenerated quiz to the user; from then on it is theirs like any other quiz"""
+        if quiz.pregenerated:
+            quiz.pregenerated = False
+            db.session.commit()
+        return quiz
+
+    @staticmethod
+    def validate_num_questions(num_questions):
+        """Return num_questions as an int between 1 and AI_QUIZ_MAX_QUESTIONS, or raise ValueError"""
+        max_questions = current_app.config.get('AI_QUIZ_MAX_QUESTIONS', 50)
+        if isinstance(num_questions, bool) or not isinstance(num_questions, int) \
+                or not 1 <= num_questions <= max_questions:
+            raise ValueError(f"num_questions must be an integer between 1 and {max_questions}")
+        return num_questions
+
+    @staticmethod
+    def require_questions(questions):
+        """Return generated questions, or raise ValueError when none could be built"""
+        if not questions:
+            raise ValueError("Not enough content in the summary to build a quiz")
+        return questions
+
     @staticmethod
     def update_quiz(quiz_id, data):
         quiz = Quiz.query.get_or_404(quiz_id)
@@ -85,40 +142,30 @@ class QuizFacade:
     def get_quiz_by_id(quiz_id):
         return Quiz.query.get_or_404(quiz_id)
 
+    @staticmethod
+    def _accessible_quizzes_query(user_id):
+        """
+        Quizzes of the summaries in the collections a user owns or collaborates on, in one query.
+        Pregenerated quizzes nobody has asked for yet are left out.
+        """
+        from app.models.collection import Collection
+        return Quiz.query.join(Summary, Quiz.summary_id == Summary.id) \
+            .filter(Summary.collection_id.in_(Collection.accessible_ids(user_id)), Quiz.pregenerated.is_(False))
+
     @staticmethod
     def get_accessible_quizzes(user_id):
         """Get all quizzes that a user has access to through collections"""
-        from app.models.user import User
-        from app.models.collection import Collection
-        
-        user = User.query.get(user_id)
-        if not user:
-            return []
-        
-        # Get all collections the user has access to
-        accessible_collections = []
-        
-        # Owned collections
-        owned_collections = Collection.query.filter_by(user_id=user_id).all()
-        accessible_collections.extend(owned_collections)
-        
-        # Collaborated collections
-        collaborated_collections = user.collaborated_collections
-        accessible_collections.extend(collaborated_collections)
-        
-        # Get all summaries from accessible collections
-        collection_ids = [c.id for c in accessible_collections]
-        summaries = Summary.query.filter(Summary.collection_id.in_(collection_ids)).all()
-        
-        # Get all quizzes for these summaries
-        summary_ids = [s.id for s in summaries]
-        quizzes = Quiz.query.filter(Quiz.summary_id.in_(summary_ids)).all()
-        
-        return quizzes
+        return QuizFacade._accessible_quizzes_query(user_id).all()
+
+    @staticmethod
+    def get_accessible_quizzes_page(user_id, limit, cursor=None):
+        return paginate(QuizFacade._accessible_quizzes_query(user_id), newest_first(Quiz), limit, cursor,
+                        count_key=('quizzes', user_id))
 
     @staticmethod
     def regenerate_quiz_with_ai(quiz_id, num_questions=4):
         """Regenerate a quiz using AI with the same summary"""
+        num_questions = QuizFacade.validate_num_questions(num_questions)
         quiz = Quiz.query.get_or_404(quiz_id)
         summary = Summary.query.get(quiz.summary_id)
         
@@ -127,17 +174,192 @@ class QuizFacade:
         
         try:
             ai_service = AIService()
+            # Regenerating asks for a new completion, so skip the cached one
             quiz_data = ai_service.generate_quiz_from_summary(
                 summary.content, 
-                num_questions
+                num_questions,
+                use_cache=False,
+                context_texts=[h.text for h in summary.highlights]
             )
             
+            quiz.questions = QuizFacade.require_questions(quiz_data.get('questions'))
             quiz.title = quiz_data.get('title', 'Quiz based on summary')
-            quiz.questions = quiz_data.get('questions', [])
             quiz.updated_at = datetime.utcnow()
             db.session.commit()
             
             return quiz
             
+        except ValueError:
+            raise
         except Exception as e:
-            raise Exception(f"Failed to regenerate quiz with AI: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Failed to regenerate quiz with AI: {str(e)}")
+
+    @staticmethod
+    def regenerate_quiz_instantly(quiz_id, num_questions=4):
+        """Regenerate a quiz locally from its summary instead of with the AI"""
+        num_questions = QuizFacade.validate_num_questions(num_questions)
+        quiz = Quiz.query.get_or_404(quiz_id)
+        summary = Summary.query.get(quiz.summary_id)
+
+        if not summary:
+            raise ValueError("No summary associated with this quiz")
+
+        quiz_data = AIService().generate_instant_quiz(
+            summary.content,
+            num_questions,
+            [h.text for h in summary.highlights]
+        )
+        quiz.questions = QuizFacade.require_questions(quiz_data.get('questions'))
+        quiz.title = quiz_data['title']
+        quiz.updated_at = datetime.utcnow()
+        db.session.commit()
+        return quiz
+
+    @staticmethod
+    def schedule_pregeneration(summary, replace=False):
+        """
+        Queue background quiz generation for a freshly written summary.
+        Controlled by AI_EAGER_QUIZ_ENABLED and capped by AI_EAGER_QUIZ_DAILY_CAP.
+        With replace=True an unclaimed pregenerated quiz (now stale) is dropped first.
+        """
+        if not current_app.config.get('AI_EAGER_QUIZ_ENABLED', False):
+            return False
+
+        existing_quiz = Quiz.query.filter_by(summary_id=summary.id).first()
+        if existing_quiz:
+            if not (replace and existing_quiz.pregenerated):
+                return False
+            db.session.delete(existing_quiz)
+            db.session.commit()
+
+        # Without an API key quizzes are generated locally and instantly, so there is nothing to gain
+        if not AIService().ai_available or QuizFacade._eager_cap_reached():
+            return False
+
+        try:
+            get_job_queue().submit(f"quiz:{summary.id}", QuizFacade.pregenerate_quiz, summary.id)
+        except JobQueueFull:
+            logger.warning(f"Skipping quiz pregeneration for summary {summary.id}: job queue is full")
+            return False
+        return True
+
+    @staticmethod
+    def pregenerate_quiz(summary_id):
+        """Generate and store a quiz for a summary. Runs on a background worker."""
+        summary = Summary.query.get(summary_id)
+        if not summary or summary.quiz or QuizFacade._eager_cap_reached():
+            return None
+
+        quiz_data = AIService().generate_quiz_from_summary(
+            summary.content,
+            context_texts=[h.text for h in summary.highlights]
+        )
+        if not quiz_data.get('questions'):
+            return None
+        now = datetime.utcnow()
+        quiz = Quiz(
+            summary_id=summary_id,
+            title=quiz_data.get('title', 'Quiz based on summary'),
+            questions=quiz_data.get('questions', []),
+            timestamp=now,
+            pregenerated=True,
+            pregenerated_at=now
+        )
+        db.session.add(quiz)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # The user created a quiz for this summary while we were generating
+            db.session.rollback()
+            return None
+        return quiz
+
+    @staticmethod
+    def _eager_cap_reached():
+        cap = current_app.config.get('AI_EAGER_QUIZ_DAILY_CAP', 200)
+        since = datetime.utcnow() - timedelta(days=1)
+        return Quiz.query.filter(Quiz.pregenerated_at >= since).count() >= cap
+
+    @staticmethod
+    def save_quizzes_batch(summary_ids, user, num_questions=4):
+        """
+        Generate quizzes for many summaries at once.
+        AI calls fan out concurrently (up to AI_BATCH_CONCURRENCY); the quizzes are
+        then saved in one commit, each in its own savepoint, so a quiz created for
+        one of the summaries meanwhile only fails that item. Returns one result
+        dict per requested summary id, in request order, with either the quiz or an error.
+        """
+        max_items = current_app.config.get('AI_BATCH_MAX_ITEMS', 50)
+        if len(summary_ids) > max_items:
+            raise ValueError(f"At most {max_items} summaries can be processed per batch")
+        num_questions = QuizFacade.validate_num_questions(num_questions)
+
+        results = {}
+        to_generate, stale = [], []
+        for summary_id in dict.fromkeys(summary_ids):
+            summary = Summary.query.get(summary_id)
+            if not summary:
+                results[summary_id] = {'summary_id': summary_id, 'status': 'error', 'error': 'Summary not found'}
+                continue
+            if not summary.collection or not summary.collection.can_access(user):
+                results[summary_id] = {'summary_id': summary_id, 'status': 'error', 'error': 'Unauthorized access to collection'}
+                continue
+            existing_quiz = summary.quiz
+            if existing_quiz and existing_quiz.pregenerated:
+                if QuizFacade.matches_request(existing_quiz, num_questions):
+                    existing_quiz.pregenerated = False
+                    results[summary_id] = {'summary_id': summary_id, 'status': 'created', 'quiz': existing_quiz}
+                    continue
+                stale.append(existing_quiz)
+            elif existing_quiz:
+                results[summary_id] = {'summary_id': summary_id, 'status': 'error', 'error': 'A quiz already exists for this summary'}
+                continue
+            to_generate.append(summary)
+
+        # Pregenerated quizzes of another size are replaced; drop them before the new ones are added
+        for quiz in stale:
+            db.session.delete(quiz)
+        if stale:
+            db.session.commit()
+
+        app = current_app._get_current_object()
+
+        def generate(content, context_texts):
+            with app.app_context():
+                try:
+                    return AIService().generate_quiz_from_summary(content, num_questions,
+                                                                  context_texts=context_texts)
+                finally:
+                    db.session.remove()
+
+        if to_generate:
+            workers = min(current_app.config.get('AI_BATCH_CONCURRENCY', 4), len(to_generate))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(generate, s.content, [h.text for h in s.highlights])
+                           for s in to_generate]
+
+            timestamp = datetime.utcnow()
+            for summary, future in zip(to_generate, futures):
+                try:
+                    quiz_data = future.result()
+                    QuizFacade.require_questions(quiz_data.get('questions'))
+                except Exception as e:
+                    results[summary.id] = {'summary_id': summary.id, 'status': 'error', 'error': str(e)}
+                    continue
+                quiz = Quiz(
+                    summary_id=summary.id,
+                    title=quiz_data.get('title', 'Quiz based on summary'),
+                    questions=quiz_data.get('questions', []),
+                    timestamp=timestamp
+                )
+                try:
+                    with db.session.begin_nested():
+                        db.session.add(quiz)
+                except IntegrityError:
+                    # A quiz was created for this summary (by the user or eagerly) while we were generating
+                    results[summary.id] = {'summary_id': summary.id, 'status': 'error', 'error': 'A quiz already exists for this summary'}
+                    continue
+                results[summary.id] = {'summary_id': summary.id, 'status': 'created', 'quiz': quiz}
+
+        db.session.commit()
+        return [results[summary_id] for summary_id in dict.fromkeys(summary_ids)]
\ No newline at end of file
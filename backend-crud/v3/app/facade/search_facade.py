@@ -0,0 +1,119 @@
+from app.models.collection import Collection
+from app.models.search_document import SearchDocument
+from app.utils.db import db
+from flask import current_app
+from sqlalchemy import select, or_, func, literal_column, table, column
+from sqlalchemy.dialects.mysql import match
+import html
+import re
+
+ENTITY_TYPES = ('highlight', 'summary', 'quiz')
+SNIPPET_WORDS = 16
+# Control characters mark matches in FTS5 snippets until the text is escaped for HTML
+MARK_START, MARK_END = '\x02', '\x03'
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+def query_terms(q):
+    """Words of the query, without any operator syntax of the search engines"""
+    return _WORD_RE.findall(q.lower())[:16]
+
+def _fts5_query(terms):
+    # Every word must match; the last one may be a prefix, as the user is probably still typing it
+    return ' '.join(f'"{term}"' for term in terms[:-1]) + f' "{terms[-1]}"*'
+
+def _boolean_query(terms):
+    return ' '.join(f'+{term}' for term in terms[:-1]) + f' +{terms[-1]}*'
+
+def _mark(snippet):
+    """Escape snippet text for HTML and turn the match markers into <mark> tags"""
+    return html.escape(snippet).replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+
+def make_snippet(body, terms, words=SNIPPET_WORDS):
+    """
+    The window of `words` words of `body` with the most query terms, with
+    matches marked. Used where the database has no snippet function.
+    """
+    tokens = body.split()
+    if not tokens:
+        return ''
+    prefixes = tuple(terms)
+    hits = [any(w.startswith(prefixes) for w in _WORD_RE.findall(token.lower())) for token in tokens]
+    best = max(range(max(len(tokens) - words, 0) + 1), key=lambda start: (sum(hits[start:start + words]), -start))
+    window = [f"{MARK_START}{token}{MARK_END}" if hit else token
+              for token, hit in zip(tokens[best:best + words], hits[best:best + words])]
+    return _mark(('… ' if best else '') + ' '.join(window) + (' …' if best + words < len(tokens) else ''))
+
+class SearchFacade:
+    @staticmethod
+    def search(user_id, q, types=None, limit=None):
+        """
+        Ranked full-text search over the highlights, summaries and quiz questions
+        the user can access: their own and those in collections they own or
+        collaborate on. Uses FTS5 on SQLite, a FULLTEXT index on MySQL and a
+        plain substring match elsewhere. Returns result dicts, best first.
+        """
+        terms = query_terms(q or '')
+        if not terms:
+            raise ValueError("q must contain at least one word")
+        types = types or ENTITY_TYPES
+        unknown = set(types) - set(ENTITY_TYPES)
+        if unknown:
+            raise ValueError(f"Unknown type(s): {', '.join(sorted(unknown))}")
+        max_limit = current_app.config.get('SEARCH_MAX_LIMIT', 100)
+        if limit is None:
+            limit = current_app.config.get('SEARCH_DEFAULT_LIMIT', 20)
+        if limit < 1 or limit > max_limit:
+            raise ValueError(f"limit must be between 1 and {max_limit}")
+
+        documents = SearchDocument.__table__
+        scope = [
+            documents.c.entity_type.in_(types),
+            or_(documents.c.user_id == user_id, documents.c.collection_id.in_(Collection.accessible_ids(user_id)))
+        ]
+        columns = [documents.c.entity_type, documents.c.entity_id, documents.c.collection_id]
+        dialect = db.session.get_bind().dialect.name
+
+        if dialect == 'sqlite':
+            index = table('search_documents_fts', column('rowid'))
+            fts = literal_column('search_documents_fts')
+            matching = fts.op('MATCH')(_fts5_query(terms))
+            # bm25() is lower for better matches. Ranking has to score every match, so a query
+            # matching much of what the user can access (a very common word) lists the newest
+            # matches instead, in search_rowid order. The matches of the whole index are counted
+            # first, which is cheap; only when they are too many are the user's own counted
+            rank = func.bm25(fts)
+            joined = index.join(documents, documents.c.search_rowid == index.c.rowid)
+            max_ranked = current_app.config.get('SEARCH_RANK_MAX_MATCHES', 10000)
+            ranked = db.session.execute(select(func.count()).select_from(index).where(matching)).scalar() <= max_ranked
+            if not ranked:
+                candidates = select(documents.c.id).select_from(joined).where(matching, *scope).limit(max_ranked + 1)
+                ranked = db.session.execute(select(func.count()).select_from(candidates.subquery())).scalar() <= max_ranked
+            statement = select(*columns, func.snippet(fts, 0, MARK_START, MARK_END, '…', SNIPPET_WORDS).label('snippet'),
+                               (-rank).label('score')) \
+                .select_from(joined) \
+                .where(matching, *scope) \
+                .order_by(rank if ranked else index.c.rowid.desc()).limit(limit)
+            rows = db.session.execute(statement).all()
+            return [SearchFacade._result(row, _mark(row.snippet)) for row in rows]
+
+        if dialect == 'mysql':
+            relevance = match(documents.c.body, against=_boolean_query(terms)).in_boolean_mode()
+            statement = select(*columns, documents.c.body, relevance.label('score')) \
+                .where(relevance, *scope).order_by(relevance.desc()).limit(limit)
+        else:
+            statement = select(*columns, documents.c.body, literal_column('0').label('score')) \
+                .where(*[documents.c.body.ilike(f'%{term}%') for term in terms], *scope) \
+                .order_by(documents.c.updated_at.desc()).limit(limit)
+        rows = db.session.execute(statement).all()
+        return [SearchFacade._result(row, make_snippet(row.body, terms)) for row in rows]
+
+    @staticmethod
+    def _result(row, snippet):
+        return {
+            "type": row.entity_type,
+            "id": row.entity_id,
+            "collection_id": row.collection_id,
+            "snippet": snippet,
+            "score": round(float(row.score), 4)
+        }
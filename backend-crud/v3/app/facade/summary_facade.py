@@ -1,10 +1,16 @@
 from app.models.summary import Summary
 from app.models.collection import Collection
 from app.models.highlight import Highlight
+from app.models.summary_job import SummaryJob
 from app.utils.db import db
+from app.utils.pagination import paginate, newest_first
 from datetime import datetime
-from app.utils.constants import STATIC_SUMMARY_TEXT
+from app.utils import extractive_summary
 from app.utils.ai_service import AIService
+from app.facade.quiz_facade import QuizFacade
+import logging
+
+logger = logging.getLogger(__name__)
 
 class SummaryFacade:
     @staticmethod
@@ -26,21 +32,28 @@ class SummaryFacade:
         if not content:
             try:
                 ai_service = AIService()
-                content = ai_service.generate_summary_from_highlights(
-                    highlights, 
-                    collection.title if collection else None
-                )
+                if data.get('mode') == 'instant':
+                    content = ai_service.generate_instant_summary(
+                        highlights,
+                        collection.title if collection else None
+                    )
+                else:
+                    content = ai_service.generate_summary_from_highlights(
+                        highlights, 
+                        collection.title if collection else None
+                    )
             except Exception as e:
-                # Fallback to static content if AI fails
-                content = STATIC_SUMMARY_TEXT
-                print(f"AI summary generation failed, using fallback: {str(e)}")
+                # Fallback to a local extractive summary if AI fails
+                content = extractive_summary.summarize_to_text([h.text for h in highlights])
+                logger.exception(f"AI summary generation failed, using fallback: {e}")
 
         # Create the summary
         summary = Summary(
             collection_id=collection_id,
             user_id=user_id,
             content=content,
-            timestamp=timestamp
+            timestamp=timestamp,
+            coverage=Summary.build_coverage(highlights)
         )
         db.session.add(summary)
 
@@ -48,6 +61,9 @@ class SummaryFacade:
         summary.highlights = highlights
 
         db.session.commit()
+
+        # Optionally start generating the quiz now, off the request path
+        QuizFacade.schedule_pregeneration(summary)
         return summary
 
     @staticmethod
@@ -72,6 +88,8 @@ class SummaryFacade:
         # Delete related quiz if it exists
         if summary.quiz:
             db.session.delete(summary.quiz)
+        # Detach finished jobs that produced this summary
+        SummaryJob.query.filter_by(summary_id=summary_id).update({'summary_id': None})
         db.session.delete(summary)
         db.session.commit()
         return True
@@ -80,6 +98,11 @@ class SummaryFacade:
     def get_user_summaries(user_id):
         return Summary.query.filter_by(user_id=user_id).all()
 
+    @staticmethod
+    def get_user_summaries_page(user_id, limit, cursor=None):
+        return paginate(Summary.query.filter_by(user_id=user_id), newest_first(Summary), limit, cursor,
+                        count_key=('summaries', user_id))
+
     @staticmethod
     def get_summary_by_id(summary_id):
         return Summary.query.get_or_404(summary_id)
@@ -100,16 +123,87 @@ class SummaryFacade:
             ai_service = AIService()
             collection = Collection.query.get(summary.collection_id)
             
+            # Regenerating asks for a new completion, so skip the cached one
             new_content = ai_service.generate_summary_from_highlights(
                 summary.highlights,
-                collection.title if collection else None
+                collection.title if collection else None,
+                use_cache=False
             )
             
             summary.content = new_content
+            summary.coverage = Summary.build_coverage(summary.highlights)
             summary.updated_at = datetime.utcnow()
             db.session.commit()
+            QuizFacade.schedule_pregeneration(summary, replace=True)
             
             return summary
             
         except Exception as e:
-            raise Exception(f"Failed to regenerate summary with AI: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Failed to regenerate summary with AI: {str(e)}")
+
+    @staticmethod
+    def regenerate_summary_instantly(summary_id):
+        """Regenerate a summary with the local extractive summarizer instead of the AI"""
+        summary = Summary.query.get_or_404(summary_id)
+
+        if not summary.highlights:
+            raise ValueError("No highlights associated with this summary")
+
+        collection = Collection.query.get(summary.collection_id)
+        summary.content = AIService().generate_instant_summary(
+            summary.highlights,
+            collection.title if collection else None
+        )
+        summary.coverage = Summary.build_coverage(summary.highlights)
+        summary.updated_at = datetime.utcnow()
+        db.session.commit()
+        QuizFacade.schedule_pregeneration(summary, replace=True)
+        return summary
+
+    @staticmethod
+    def refresh_summary_with_ai(summary_id):
+        """
+        Bring a summary up to date with its collection's current highlights.
+        Only added and removed highlights are sent to the AI together with the
+        previous summary. Summaries without coverage data, or whose removed
+        highlights can no longer be read back, are regenerated in full.
+        """
+        summary = Summary.query.get_or_404(summary_id)
+        collection = Collection.query.get(summary.collection_id)
+        highlights = list(collection.highlights) if collection else []
+
+        if not highlights:
+            raise ValueError("No highlights associated with this summary")
+
+        added, removed_ids = summary.diff_coverage(highlights)
+        if summary.coverage and not added and not removed_ids:
+            return summary
+
+        # Old text is needed to tell the AI what to drop; rows that were deleted or edited lost it
+        removed = Highlight.query.filter(Highlight.id.in_(removed_ids)).all() if removed_ids else []
+        removed_known = len(removed) == len(removed_ids) and all(
+            Summary.hash_highlight_text(h.text) == summary.coverage[h.id] for h in removed
+        )
+        incremental = bool(summary.coverage) and removed_known and len(added) + len(removed) < len(highlights)
+
+        try:
+            ai_service = AIService()
+            title = collection.title if collection else None
+            if incremental:
+                new_content = ai_service.update_summary_with_highlights(
+                    summary.content, added, removed, highlights, title
+                )
+            else:
+                new_content = ai_service.generate_summary_from_highlights(highlights, title)
+
+            summary.content = new_content
+            summary.highlights = highlights
+            summary.coverage = Summary.build_coverage(highlights)
+            summary.updated_at = datetime.utcnow()
+            db.session.commit()
+            QuizFacade.schedule_pregeneration(summary, replace=True)
+
+            return summary
+
+        except Exception as e:
+            raise Exception(f"Failed to refresh summary with AI: {str(e)}")
\ No newline at end of file
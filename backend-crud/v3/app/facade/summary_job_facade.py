@@ -0,0 +1,80 @@
+from app.models.summary_job import SummaryJob
+from app.utils.db import db
+from app.utils.job_queue import get_job_queue
+from datetime import datetime
+import time
+
+class SummaryJobFacade:
+    @staticmethod
+    def enqueue_summary(data):
+        """Create a pending summary job and hand it to the background worker pool"""
+        if not data.get('highlight_ids'):
+            raise ValueError("No highlights found for the provided IDs")
+
+        job = SummaryJob(
+            collection_id=data['collection_id'],
+            user_id=data['user_id'],
+            highlight_ids=data['highlight_ids'],
+            status=SummaryJob.STATUS_PENDING
+        )
+        db.session.add(job)
+        db.session.commit()
+
+        try:
+            get_job_queue().submit(job.id, SummaryJobFacade.run_job, job.id)
+        except Exception:
+            db.session.delete(job)
+            db.session.commit()
+            raise
+        return job
+
+    @staticmethod
+    def run_job(job_id):
+        """Generate the summary for a job. Runs on a background worker."""
+        from app.facade.summary_facade import SummaryFacade
+
+        job = SummaryJob.query.get(job_id)
+        if not job or job.is_finished():
+            return
+
+        job.status = SummaryJob.STATUS_RUNNING
+        db.session.commit()
+
+        try:
+            summary = SummaryFacade.save_summary({
+                'collection_id': job.collection_id,
+                'highlight_ids': job.highlight_ids,
+                'user_id': job.user_id
+            })
+            job.summary_id = summary.id
+            job.status = SummaryJob.STATUS_SUCCEEDED
+        except Exception as e:
+            db.session.rollback()
+            job = SummaryJob.query.get(job_id)
+            job.status = SummaryJob.STATUS_FAILED
+            job.error = str(e)
+
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+
+    @staticmethod
+    def get_job_by_id(job_id):
+        return SummaryJob.query.get_or_404(job_id)
+
+    @staticmethod
+    def wait_for_job(job_id, timeout):
+        """
+        Long-poll a job until it finishes or the timeout expires.
+        Jobs running in this process are awaited on their completion event;
+        jobs owned by another worker process are polled from the database.
+        """
+        deadline = time.monotonic() + max(timeout, 0)
+        while True:
+            job = SummaryJob.query.get_or_404(job_id)
+            remaining = deadline - time.monotonic()
+            if job.is_finished() or remaining <= 0:
+                return job
+            if not get_job_queue().wait(job_id, min(remaining, 0.5)):
+                time.sleep(min(remaining, 0.5))
+            # End the read transaction so the next iteration sees the worker's commit
+            db.session.rollback()
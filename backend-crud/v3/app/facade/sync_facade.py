@@ -0,0 +1,144 @@
+from app.models.collection import Collection
+from app.models.highlight import Highlight
+from app.models.summary import Summary
+from app.models.tombstone import Tombstone
+from app.schemas.collection import CollectionSchema
+from app.schemas.highlight import HighlightSchema
+from app.schemas.summary import SummarySchema
+from app.utils.db import db
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import and_, or_, true
+import base64
+import heapq
+import json
+import threading
+import time
+
+# Flat rows: related objects are synced on their own and referenced by id
+sync_highlights_schema = HighlightSchema(many=True, exclude=('user', 'collection'))
+sync_collections_schema = CollectionSchema(many=True, exclude=('highlights', 'summaries', 'highlights_count', 'owner'))
+sync_summaries_schema = SummarySchema(many=True, exclude=('collection', 'highlights', 'quiz', 'user'))
+
+# Tombstone entity_type -> the key its ids are listed under in `deleted`
+DELETED_KEYS = {'highlight': 'highlights', 'collection': 'collections', 'summary': 'summaries'}
+
+PRUNE_INTERVAL = 3600  # Seconds between tombstone clean-ups in a process
+_last_prune = 0.0
+_prune_lock = threading.Lock()
+
+def encode_cursor(position):
+    """Opaque cursor for an (updated_at, id) position"""
+    updated_at, row_id = position
+    raw = json.dumps({"t": updated_at.isoformat(), "i": row_id}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        data = json.loads(raw)
+        return datetime.fromisoformat(data['t']), str(data['i'])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid sync cursor")
+
+class SyncFacade:
+    @staticmethod
+    def _after(model, position):
+        """Rows of `model` strictly after `position` in (updated_at, id) order"""
+        if position is None:
+            return true()
+        updated_at, row_id = position
+        return or_(model.updated_at > updated_at, and_(model.updated_at == updated_at, model.id > row_id))
+
+    @staticmethod
+    def _changes(user_id, position, limit):
+        """Up to limit + 1 changed rows per kind, each kind in (updated_at, id) order"""
+        accessible = Collection.accessible_ids(user_id)
+        scopes = (
+            ('highlights', Highlight, Highlight.user_id == user_id),
+            ('collections', Collection, Collection.id.in_(accessible)),
+            ('summaries', Summary, or_(Summary.user_id == user_id, Summary.collection_id.in_(accessible)))
+        )
+        changes = {}
+        for kind, model, scope in scopes:
+            changes[kind] = model.query.filter(scope, SyncFacade._after(model, position)) \
+                .order_by(model.updated_at, model.id).limit(limit + 1).all()
+        # A first sync starts from an empty library, so it needs no tombstones
+        changes['deleted'] = [] if position is None else Tombstone.query.filter(
+            Tombstone.user_id == user_id, SyncFacade._after(Tombstone, position)
+        ).order_by(Tombstone.updated_at, Tombstone.id).limit(limit + 1).all()
+        return changes
+
+    @staticmethod
+    def get_changes(user_id, cursor=None, limit=None):
+        """
+        Highlights, collections and summaries the user can see that changed after
+        `cursor`, and tombstones for those they no longer can. Rows are merged
+        across kinds in (updated_at, id) order and cut at `limit`; the returned
+        cursor points after the last row sent, or, once caught up, a few
+        seconds back so rows from transactions still committing are not missed.
+        Without a cursor, or with one older than the tombstone retention,
+        everything is sent again and `reset` tells the client to drop its copy.
+        """
+        config = current_app.config
+        if limit is None:
+            limit = config.get('SYNC_PAGE_SIZE', 500)
+        if limit < 1 or limit > config.get('SYNC_MAX_PAGE_SIZE', 2000):
+            raise ValueError(f"limit must be between 1 and {config.get('SYNC_MAX_PAGE_SIZE', 2000)}")
+
+        now = datetime.utcnow()
+        retention = timedelta(days=config.get('SYNC_TOMBSTONE_RETENTION_DAYS', 90))
+        position = decode_cursor(cursor) if cursor else None
+        reset = position is None or position[0] < now - retention
+        if reset:
+            position = None
+        SyncFacade.prune_tombstones(now - retention)
+
+        changes = SyncFacade._changes(user_id, position, limit)
+        merged = heapq.merge(*[[((row.updated_at, row.id), kind, row) for row in rows]
+                               for kind, rows in changes.items()], key=lambda item: item[0])
+        page = {kind: [] for kind in changes}
+        last, has_more = None, False
+        for i, (row_position, kind, row) in enumerate(merged):
+            if i == limit:
+                has_more = True
+                break
+            page[kind].append(row)
+            last = row_position
+
+        next_position = last or position
+        if not has_more:
+            horizon = (now - timedelta(seconds=config.get('SYNC_OVERLAP_SECONDS', 5)), '')
+            next_position = min(next_position, horizon) if next_position else horizon
+            # Never move back past where this sync started
+            if position and next_position < position:
+                next_position = position
+
+        # A collection re-shared after a removal is live again, so its tombstone is moot
+        live = {row.id for kind in ('highlights', 'collections', 'summaries') for row in page[kind]}
+        deleted = {key: [] for key in DELETED_KEYS.values()}
+        for tombstone in page['deleted']:
+            if tombstone.entity_id not in live:
+                deleted[DELETED_KEYS[tombstone.entity_type]].append(tombstone.entity_id)
+
+        return {
+            "cursor": encode_cursor(next_position),
+            "has_more": has_more,
+            "reset": reset,
+            "highlights": sync_highlights_schema.dump(page['highlights']),
+            "collections": sync_collections_schema.dump(page['collections']),
+            "summaries": sync_summaries_schema.dump(page['summaries']),
+            "deleted": deleted
+        }
+
+    @staticmethod
+    def prune_tombstones(cutoff):
+        """Delete tombstones older than `cutoff`, at most once per PRUNE_INTERVAL in this process"""
+        global _last_prune
+        with _prune_lock:
+            if time.time() - _last_prune < PRUNE_INTERVAL:
+                return 0
+            _last_prune = time.time()
+        removed = Tombstone.query.filter(Tombstone.updated_at < cutoff).delete(synchronize_session=False)
+        db.session.commit()
+        return removed
@@ -1,6 +1,7 @@
 from app.models.user import User
 from app.models.reset_token import ResetToken
 from app.utils.db import db
+from app.utils.pagination import paginate
 from flask_jwt_extended import create_access_token
 import uuid
 from datetime import datetime, timedelta
@@ -31,6 +32,11 @@ class UserFacade:
     def get_all_users():
         return User.query.all()
 
+    @staticmethod
+    def get_users_page(limit, cursor=None):
+        # Users have no timestamp; usernames are unique and give a stable order
+        return paginate(User.query, [(User.username, False), (User.id, False)], limit, cursor, count_key=('users',))
+
     @staticmethod
     def update_user(user_id, data):
         user = User.query.get_or_404(user_id)
@@ -4,4 +4,9 @@ from .summary import Summary
 from .quiz import Quiz
 from .quiz_attempt import QuizAttempt
 from .user import User
-from .reset_token import ResetToken
\ No newline at end of file
+from .reset_token import ResetToken
+from .summary_job import SummaryJob
+from .ai_cache_entry import AICacheEntry
+from .ai_lease import AILease
+from .tombstone import Tombstone
+from .search_document import SearchDocument
\ No newline at end of file
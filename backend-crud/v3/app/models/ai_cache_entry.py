@@ -0,0 +1,21 @@
+from app.utils.db import db
+from app.models.base import BaseModel
+from sqlalchemy import Column, String, DateTime, JSON, Integer
+from datetime import datetime
+
+class AICacheEntry(BaseModel):
+    __tablename__ = 'ai_cache_entries'
+
+    cache_key = Column(String(64), unique=True, nullable=False)  # sha256 of prompt version, model, temperature and input
+    operation = Column(String(20), nullable=False)  # 'summary' or 'quiz'
+    value = Column(JSON, nullable=False)
+    hits = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_hit_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<AICacheEntry {self.operation} {self.cache_key[:12]}>"
+
+    def is_expired(self):
+        return datetime.utcnow() > self.expires_at
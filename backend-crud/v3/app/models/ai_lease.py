@@ -0,0 +1,20 @@
+from app.utils.db import db
+from app.models.base import BaseModel
+from sqlalchemy import Column, String, DateTime, JSON
+from datetime import datetime
+
+class AILease(BaseModel):
+    __tablename__ = 'ai_leases'
+
+    lease_key = Column(String(64), unique=True, nullable=False)  # sha256 of the provider payload
+    owner = Column(String(64), nullable=False)  # Worker that is making the upstream call
+    value = Column(JSON, nullable=True)  # Completion content, set once the call finishes
+    acquired_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    completed_at = Column(DateTime, nullable=True)
+    expires_at = Column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<AILease {self.lease_key[:12]} owner={self.owner}>"
+
+    def is_expired(self):
+        return datetime.utcnow() > self.expires_at
@@ -1,6 +1,6 @@
 from app.utils.db import db
 from app.models.base import BaseModel
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Table
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Table, Index, select, or_
 from sqlalchemy.orm import relationship
 
 # Association table for collection collaborators
@@ -18,6 +18,10 @@ class Collection(BaseModel):
     description = Column(Text, nullable=True)
     timestamp = Column(DateTime, nullable=False)
     user_id = Column(String(36), ForeignKey('users.id'), nullable=False)
+
+    __table_args__ = (
+        Index('ix_collections_user_id_timestamp', 'user_id', 'timestamp', 'id'),  # Keyset pagination
+    )
     
     # Relationships
     owner = db.relationship('User', backref=db.backref('owned_collections'), foreign_keys=[user_id])
@@ -51,5 +55,14 @@ class Collection(BaseModel):
         """Check if a user can access this collection (owner or collaborator)"""
         return user.id == self.user_id or self.is_collaborator(user)
 
+    @staticmethod
+    def accessible_ids(user_id):
+        """Subquery of the ids of collections a user owns or collaborates on"""
+        return select(Collection.id).where(or_(
+            Collection.user_id == user_id,
+            Collection.id.in_(select(collection_collaborators.c.collection_id)
+                              .where(collection_collaborators.c.user_id == user_id))
+        ))
+
     def __repr__(self):
         return f"<Collection {self.id} - {self.title}>"
\ No newline at end of file
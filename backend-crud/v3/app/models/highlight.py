@@ -1,6 +1,10 @@
 from app.utils.db import db
 from app.models.base import BaseModel
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, UniqueConstraint, Index, event
+from sqlalchemy.orm import validates
+from app.utils.urls import url_hash, normalize_url
+import hashlib
+import unicodedata
 
 class Highlight(BaseModel):
     __tablename__ = 'highlights'
@@ -10,6 +14,16 @@ class Highlight(BaseModel):
     timestamp = Column(DateTime, nullable=False)
     collection_id = Column(String(36), ForeignKey('collections.id'), nullable=True)
     user_id = Column(String(36), ForeignKey('users.id'), nullable=False)
+    client_key = Column(String(64), nullable=True)  # Idempotency key sent by the client, unique per user
+    url_hash = Column(String(64), nullable=True)  # sha256 of the normalized url, set whenever url is
+    content_hash = Column(String(64), nullable=False)  # Same user, page and text means the same highlight
+
+    __table_args__ = (
+        UniqueConstraint('user_id', 'client_key', name='uq_highlights_user_client_key'),
+        UniqueConstraint('user_id', 'content_hash', name='uq_highlights_user_content_hash'),
+        Index('ix_highlights_user_id_timestamp', 'user_id', 'timestamp', 'id'),  # Keyset pagination
+        Index('ix_highlights_user_id_url_hash', 'user_id', 'url_hash'),  # Highlights of one page
+    )
 
     # Relationships
     collection = db.relationship('Collection', back_populates='highlights')
@@ -18,6 +32,17 @@ class Highlight(BaseModel):
     def __repr__(self):
         return f"<Highlight {self.id} - {self.url}>"
 
+    @validates('url')
+    def _set_url_hash(self, key, url):
+        self.url_hash = url_hash(url)
+        return url
+
+    @staticmethod
+    def compute_content_hash(user_id, url, text):
+        """sha256 over the user, the normalized url and the text with whitespace collapsed"""
+        text = ' '.join(unicodedata.normalize('NFC', text or '').split())
+        return hashlib.sha256('\n'.join((user_id or '', normalize_url(url), text)).encode('utf-8')).hexdigest()
+
     def can_access(self, user):
         """Check if a user can access this highlight"""
         return (self.user_id == user.id or 
@@ -26,4 +51,9 @@ class Highlight(BaseModel):
 
     def can_modify(self, user):
         """Check if a user can modify this highlight"""
-        return (self.user_id == user.id or user.is_admin)
\ No newline at end of file
+        return (self.user_id == user.id or user.is_admin)
+
+@event.listens_for(Highlight, 'before_insert')
+@event.listens_for(Highlight, 'before_update')
+def _set_content_hash(mapper, connection, target):
+    target.content_hash = Highlight.compute_content_hash(target.user_id, target.url, target.text)
@@ -1,6 +1,6 @@
 from app.utils.db import db
 from app.models.base import BaseModel
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, JSON, Boolean, Index
 from sqlalchemy.orm import relationship
 
 class Quiz(BaseModel):
@@ -10,6 +10,12 @@ class Quiz(BaseModel):
     questions = Column(JSON, nullable=False)  # Store questions with A, B, C, D options
     timestamp = Column(DateTime, nullable=False)
     summary_id = Column(String(36), ForeignKey('summaries.id'), nullable=False, unique=True)
+    pregenerated = Column(Boolean, nullable=False, default=False)  # Generated in the background and not yet requested
+    pregenerated_at = Column(DateTime, nullable=True)  # Set for every eagerly generated quiz, used for the cost cap
+
+    __table_args__ = (
+        Index('ix_quizzes_timestamp', 'timestamp', 'id'),  # Keyset pagination
+    )
     
     # Relationships
     summary = db.relationship('Summary', back_populates='quiz')
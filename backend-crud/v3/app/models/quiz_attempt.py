@@ -1,6 +1,6 @@
 from app.utils.db import db
 from app.models.base import BaseModel
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, JSON, Integer
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, JSON, Integer, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -14,6 +14,12 @@ class QuizAttempt(BaseModel):
     total_questions = Column(Integer, nullable=False, default=0)  # Total questions in quiz
     percentage = Column(Integer, nullable=False, default=0)  # Score as percentage
     completed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    # Keyset pagination of a quiz's attempts and of its leaderboard
+    __table_args__ = (
+        Index('ix_quiz_attempts_quiz_id_completed_at', 'quiz_id', 'completed_at', 'id'),
+        Index('ix_quiz_attempts_quiz_id_percentage', 'quiz_id', 'percentage', 'completed_at', 'id'),
+    )
     
     # Relationships
     quiz = db.relationship('Quiz', back_populates='attempts')
@@ -0,0 +1,141 @@
+from app.utils.db import db
+from app.models.base import BaseModel
+from app.models.highlight import Highlight
+from app.models.quiz import Quiz
+from app.models.summary import Summary
+from sqlalchemy import Column, String, Text, BigInteger, Index, DDL, event, delete, insert
+from sqlalchemy.orm import Session, attributes
+import secrets
+import threading
+import time
+import uuid
+from datetime import datetime
+
+_last_search_rowid = 0
+_search_rowid_lock = threading.Lock()
+
+def new_search_rowid():
+    """
+    Increasing key: the time in microseconds with 10 random low bits, so that
+    processes writing in the same microsecond rarely collide (the unique index
+    rejects a collision). Newer documents get larger keys.
+    """
+    global _last_search_rowid
+    candidate = (time.time_ns() // 1000) << 10 | secrets.randbits(10)
+    with _search_rowid_lock:
+        _last_search_rowid = max(candidate, _last_search_rowid + 1)
+        return _last_search_rowid
+
+class SearchDocument(BaseModel):
+    """
+    The searchable text of a highlight, summary or quiz, with what is needed
+    to scope a search to what the caller can access. Kept in step with its
+    source row on every flush. MySQL searches `body` through a FULLTEXT index;
+    SQLite through the `search_documents_fts` FTS5 table, which triggers keep
+    in step with this one. The FTS5 rows are keyed by `search_rowid`: the
+    implicit rowid of a table with a string primary key can change on VACUUM.
+    """
+    __tablename__ = 'search_documents'
+
+    entity_type = Column(String(20), nullable=False)  # 'highlight', 'summary' or 'quiz'
+    entity_id = Column(String(36), nullable=False)
+    user_id = Column(String(36), nullable=False)  # Owner of the source row
+    collection_id = Column(String(36), nullable=True)  # Collaborators of this collection can find it too
+    body = Column(Text, nullable=False)
+    search_rowid = Column(BigInteger, nullable=False, default=new_search_rowid)  # Stable FTS5 rowid on SQLite, increasing
+
+    __table_args__ = (
+        Index('ix_search_documents_entity', 'entity_type', 'entity_id', unique=True),
+        Index('ix_search_documents_user_id', 'user_id'),
+        Index('ix_search_documents_collection_id', 'collection_id'),
+        Index('ix_search_documents_search_rowid', 'search_rowid', unique=True),
+        Index('ix_search_documents_body', 'body', mysql_prefix='FULLTEXT').ddl_if(dialect='mysql'),
+    )
+
+    def __repr__(self):
+        return f"<SearchDocument {self.entity_type} {self.entity_id}>"
+
+# External-content FTS5 index over search_documents.body, maintained by triggers
+SQLITE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_documents_fts USING fts5("
+    "body, content='search_documents', content_rowid='search_rowid', tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS search_documents_ai AFTER INSERT ON search_documents BEGIN "
+    "INSERT INTO search_documents_fts(rowid, body) VALUES (new.search_rowid, new.body); END",
+    "CREATE TRIGGER IF NOT EXISTS search_documents_ad AFTER DELETE ON search_documents BEGIN "
+    "INSERT INTO search_documents_fts(search_documents_fts, rowid, body) "
+    "VALUES ('delete', old.search_rowid, old.body); END",
+    "CREATE TRIGGER IF NOT EXISTS search_documents_au AFTER UPDATE ON search_documents BEGIN "
+    "INSERT INTO search_documents_fts(search_documents_fts, rowid, body) "
+    "VALUES ('delete', old.search_rowid, old.body); "
+    "INSERT INTO search_documents_fts(rowid, body) VALUES (new.search_rowid, new.body); END",
+]
+for statement in SQLITE_FTS_DDL:
+    event.listen(SearchDocument.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+event.listen(SearchDocument.__table__, 'before_drop',
+             DDL("DROP TABLE IF EXISTS search_documents_fts").execute_if(dialect='sqlite'))
+
+def quiz_text(questions):
+    """The question texts of a quiz, one per line"""
+    return "\n".join(q.get('question', '') for q in questions or [] if isinstance(q, dict))
+
+def document_row(entity_type, entity_id, user_id, collection_id, body):
+    return {
+        'id': str(uuid.uuid4()),
+        'entity_type': entity_type,
+        'entity_id': entity_id,
+        'user_id': user_id,
+        'collection_id': collection_id,
+        'body': body or '',
+        'search_rowid': new_search_rowid(),
+        'updated_at': datetime.utcnow()
+    }
+
+def highlight_document(highlight):
+    """Search document row for a Highlight or a highlight row dict"""
+    get = highlight.get if isinstance(highlight, dict) else lambda name: getattr(highlight, name)
+    return document_row('highlight', get('id'), get('user_id'), get('collection_id'), get('text'))
+
+def _document(obj):
+    if isinstance(obj, Highlight):
+        return highlight_document(obj)
+    if isinstance(obj, Summary):
+        return document_row('summary', obj.id, obj.user_id, obj.collection_id, obj.content)
+    summary = obj.summary or Summary.query.get(obj.summary_id)
+    return document_row('quiz', obj.id, summary.user_id if summary else '', summary.collection_id if summary else None,
+                        quiz_text(obj.questions))
+
+# Columns whose change makes the stored document stale
+INDEXED_COLUMNS = {
+    Highlight: ('text', 'collection_id', 'user_id'),
+    Summary: ('content', 'collection_id', 'user_id'),
+    Quiz: ('questions', 'summary_id', 'pregenerated'),
+}
+ENTITY_TYPES = {Highlight: 'highlight', Summary: 'summary', Quiz: 'quiz'}
+
+def _changed(obj):
+    return any(attributes.get_history(obj, name).has_changes() for name in INDEXED_COLUMNS[type(obj)])
+
+@event.listens_for(Session, 'after_flush')
+def update_search_documents(session, flush_context):
+    """Replace the documents of searchable rows written in this flush and drop those of deleted rows"""
+    stale, rows = [], []
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        entity_type = ENTITY_TYPES.get(type(obj))
+        if not entity_type or (obj in session.dirty and obj not in session.deleted and not _changed(obj)):
+            continue
+        stale.append((entity_type, obj.id))
+        # A pregenerated quiz becomes searchable once the user has claimed it
+        if obj not in session.deleted and not getattr(obj, 'pregenerated', False):
+            rows.append(_document(obj))
+    if not stale:
+        return
+
+    connection = session.connection()
+    table = SearchDocument.__table__
+    for entity_type in {entity_type for entity_type, _ in stale}:
+        connection.execute(delete(table).where(
+            table.c.entity_type == entity_type,
+            table.c.entity_id.in_([entity_id for t, entity_id in stale if t == entity_type])
+        ))
+    if rows:
+        connection.execute(insert(table), rows)
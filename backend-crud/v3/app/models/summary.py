@@ -1,7 +1,8 @@
 from app.utils.db import db
 from app.models.base import BaseModel
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Table
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Table, JSON, Index
 from sqlalchemy.orm import relationship
+import hashlib
 
 # Association table for summary highlights
 summary_highlights = Table(
@@ -18,6 +19,11 @@ class Summary(BaseModel):
     timestamp = Column(DateTime, nullable=False)
     collection_id = Column(String(36), ForeignKey('collections.id'), nullable=False)
     user_id = Column(String(36), ForeignKey('users.id'), nullable=False)
+    coverage = Column(JSON, nullable=True)  # {highlight_id: content hash} of the highlights the content was generated from
+
+    __table_args__ = (
+        Index('ix_summaries_user_id_timestamp', 'user_id', 'timestamp', 'id'),  # Keyset pagination
+    )
     
     # Relationships
     collection = db.relationship('Collection', back_populates='summaries')
@@ -26,4 +32,25 @@ class Summary(BaseModel):
     quiz = db.relationship('Quiz', back_populates='summary', uselist=False)
 
     def __repr__(self):
-        return f"<Summary {self.id} - {self.timestamp}>"
\ No newline at end of file
+        return f"<Summary {self.id} - {self.timestamp}>"
+
+    @staticmethod
+    def hash_highlight_text(text):
+        return hashlib.sha256((text or '').strip().encode('utf-8')).hexdigest()[:16]
+
+    @staticmethod
+    def build_coverage(highlights):
+        """Map each highlight id to a hash of its text"""
+        return {h.id: Summary.hash_highlight_text(h.text) for h in highlights}
+
+    def diff_coverage(self, highlights):
+        """
+        Compare the covered highlights with the given ones.
+        Returns (added, removed_ids): highlights that are new or whose text changed,
+        and ids that were covered but are gone or changed.
+        """
+        coverage = self.coverage or {}
+        current = self.build_coverage(highlights)
+        added = [h for h in highlights if coverage.get(h.id) != current[h.id]]
+        removed_ids = [hid for hid, digest in coverage.items() if current.get(hid) != digest]
+        return added, removed_ids
\ No newline at end of file
@@ -0,0 +1,31 @@
+from app.utils.db import db
+from app.models.base import BaseModel
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, JSON
+from datetime import datetime
+
+class SummaryJob(BaseModel):
+    __tablename__ = 'summary_jobs'
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+
+    status = Column(String(20), nullable=False, default=STATUS_PENDING)
+    collection_id = Column(String(36), ForeignKey('collections.id'), nullable=False)
+    user_id = Column(String(36), ForeignKey('users.id'), nullable=False)
+    highlight_ids = Column(JSON, nullable=False)  # Highlights selected when the job was queued
+    summary_id = Column(String(36), ForeignKey('summaries.id'), nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+    # Relationships
+    summary = db.relationship('Summary')
+
+    def __repr__(self):
+        return f"<SummaryJob {self.id} - {self.status}>"
+
+    def is_finished(self):
+        """Check if the job has reached a terminal state"""
+        return self.status in (self.STATUS_SUCCEEDED, self.STATUS_FAILED)
@@ -0,0 +1,70 @@
+from app.utils.db import db
+from app.models.base import BaseModel
+from app.models.collection import Collection
+from app.models.highlight import Highlight
+from app.models.summary import Summary
+from sqlalchemy import Column, String, Index, event
+from sqlalchemy.orm import Session, attributes
+from datetime import datetime
+
+class Tombstone(BaseModel):
+    """
+    Marks a highlight, collection or summary that one user can no longer see,
+    because it was deleted or they were removed as a collaborator. `updated_at`
+    is when that happened, so delta sync reads tombstones like any other change.
+    """
+    __tablename__ = 'tombstones'
+
+    entity_type = Column(String(20), nullable=False)  # 'highlight', 'collection' or 'summary'
+    entity_id = Column(String(36), nullable=False)
+    user_id = Column(String(36), nullable=False)  # Whose sync stream reports it; no foreign key so it outlives the user
+
+    __table_args__ = (
+        Index('ix_tombstones_user_id_updated_at', 'user_id', 'updated_at', 'id'),
+    )
+
+    def __repr__(self):
+        return f"<Tombstone {self.entity_type} {self.entity_id} for {self.user_id}>"
+
+ENTITY_TYPES = {Highlight: 'highlight', Collection: 'collection', Summary: 'summary'}
+
+def _collection_members(collection):
+    return {collection.user_id} | {user.id for user in collection.collaborators} if collection else set()
+
+def _audience(obj):
+    """Users whose sync stream included `obj`"""
+    if isinstance(obj, Highlight):
+        return {obj.user_id}
+    if isinstance(obj, Collection):
+        return _collection_members(obj)
+    return {obj.user_id} | _collection_members(obj.collection)
+
+@event.listens_for(Session, 'before_flush')
+def record_sync_changes(session, flush_context, instances):
+    """
+    Write tombstones for deleted rows and for collections a collaborator lost
+    access to, and touch collections (and their summaries) a collaborator was
+    added to, so every path that changes what a user can see shows up in sync.
+    """
+    tombstones = []
+    for obj in session.deleted:
+        entity_type = ENTITY_TYPES.get(type(obj))
+        if entity_type:
+            tombstones += [(entity_type, obj.id, user_id) for user_id in _audience(obj)]
+
+    for obj in session.dirty:
+        if not isinstance(obj, Collection) or obj in session.deleted:
+            continue
+        history = attributes.get_history(obj, 'collaborators')
+        removed = {user.id for user in history.deleted} - {obj.user_id}
+        for user_id in removed:
+            tombstones.append(('collection', obj.id, user_id))
+            tombstones += [('summary', summary.id, user_id) for summary in obj.summaries if summary.user_id != user_id]
+        if history.added:
+            now = datetime.utcnow()
+            obj.updated_at = now
+            for summary in obj.summaries:
+                summary.updated_at = now
+
+    session.add_all([Tombstone(entity_type=entity_type, entity_id=entity_id, user_id=user_id)
+                     for entity_type, entity_id, user_id in tombstones if user_id])
@@ -4,4 +4,7 @@ from .summary import summary_bp
 from .quiz import quiz_bp
 from .auth import auth_bp
 from .user import user_bp
-from .quiz_attempt import quiz_attempt_bp
\ No newline at end of file
+from .quiz_attempt import quiz_attempt_bp
+from .sync import sync_bp
+from .search import search_bp
+from .export import export_bp
\ No newline at end of file
@@ -1,10 +1,11 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.facade.user_facade import UserFacade
 from app.schemas.admin import admin_user_list_schema
 from app.models.user import User
 from app.utils.db import db
 from app.utils.ai_service import AIService
+from app.utils.pagination import page_request, page_response
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -17,11 +18,17 @@ def get_all_users():
         if not current_user or not current_user.is_admin:
             return jsonify({'error': 'Admin access required'}), 403
         
+        page = page_request()
+        if page:
+            result = UserFacade.get_users_page(*page)
+            return jsonify(page_response('users', admin_user_list_schema, result)), 200
         users = UserFacade.get_all_users()
         return jsonify({
             'users': admin_user_list_schema.dump(users),
             'total': len(users)
         }), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -105,17 +112,33 @@ def check_ai_health():
         return jsonify({
             'ai_service_status': 'working' if is_working else 'not_working',
             'ai_available': status['ai_available'],
-            'gemini_available': status['gemini_available'],
             'api_key_configured': status['api_key_configured'],
             'model': status['model'],
-            'fallback_mode': not status['ai_available'],
-            'message': 'AI service is working with Gemini' if is_working else 
+            'circuit_state': status['circuit_state'],
+            'routing': status['routing'],
+            'fallback_mode': not is_working,
+            'message': 'AI service is working' if is_working else 
                       'AI service is using fallback mode' if status['ai_available'] else 
-                      'AI service is not available'
+                      'AI service is not available',
+            'telemetry': status['telemetry'],
+            'quiz_parse': status['quiz_parse'],
+            'single_flight': status['single_flight'],
+            'rate_limit': status['rate_limit']
         }), 200
     except Exception as e:
         return jsonify({
             'ai_service_status': 'error',
             'error': str(e),
             'fallback_mode': True
-        }), 500 
\ No newline at end of file
+        }), 500 
+
+@admin_bp.route('/admin/metrics', methods=['GET'])
+@jwt_required()
+def get_ai_metrics():
+    current_user_id = get_jwt_identity()
+    current_user = User.query.get(current_user_id)
+    if not current_user or not current_user.is_admin:
+        return jsonify({'error': 'Admin access required'}), 403
+
+    # Prometheus text exposition format
+    return Response(AIService().get_prometheus_metrics(), mimetype='text/plain; version=0.0.4')
@@ -5,6 +5,7 @@ from app.schemas.collection import collections_schema, collection_schema, collec
 from app.schemas.highlight import highlights_schema, highlight_schema
 from app.models.user import User
 from app.utils.db import db
+from app.utils.pagination import page_request, page_response
 
 collection_bp = Blueprint('collection', __name__)
 
@@ -35,11 +36,17 @@ def create_collections():
 def get_all_collections():
     current_user_id = get_jwt_identity()
     try:
+        page = page_request()
+        if page:
+            result = CollectionFacade.get_user_collections_page(current_user_id, *page)
+            return jsonify(page_response('collections', collections_schema, result)), 200
         collections = CollectionFacade.get_user_collections(current_user_id)
         return jsonify({
             'collections': collections_schema.dump(collections),
             'total': len(collections)
         }), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -0,0 +1,34 @@
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.facade.export_facade import ExportFacade, decode_cursor
+from app.utils.db import db
+import json
+
+export_bp = Blueprint('export', __name__)
+
+@export_bp.route('/export', methods=['GET'])
+@jwt_required()
+def export_library():
+    current_user_id = get_jwt_identity()
+    cursor = request.args.get('cursor') or None
+    try:
+        if cursor:
+            decode_cursor(cursor)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    def generate():
+        try:
+            yield from ExportFacade.export_lines(current_user_id, cursor)
+        except Exception as e:
+            # The status is already sent; the client resumes from the last cursor it received
+            db.session.rollback()
+            yield json.dumps({'type': 'error', 'error': str(e)}) + "\n"
+
+    headers = {'Content-Disposition': 'attachment; filename="studyaid-export.ndjson"', 'Vary': 'Accept-Encoding',
+               'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    body = generate()
+    if 'gzip' in request.headers.get('Accept-Encoding', '').lower():
+        body = ExportFacade.gzip_stream(body)
+        headers['Content-Encoding'] = 'gzip'
+    return Response(stream_with_context(body), mimetype='application/x-ndjson', headers=headers)
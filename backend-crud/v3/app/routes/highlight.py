@@ -1,9 +1,11 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.facade.highlight_facade import HighlightFacade
-from app.schemas.highlight import highlights_schema, highlight_schema, highlight_create_schema
+from app.schemas.highlight import highlights_schema, highlight_schema, highlight_create_schema, highlights_compact_schema
 from app.models.collection import Collection
 from app.models.user import User
+from app.utils.pagination import page_request, page_response
+from app.utils.urls import normalize_url
 
 highlight_bp = Blueprint('highlight', __name__)
 
@@ -19,11 +21,36 @@ def create_highlight():
     data['user_id'] = current_user_id
     
     try:
-        highlight = HighlightFacade.save_highlight(data)
+        highlight, created = HighlightFacade.save_highlight(data)
+        # A duplicate returns the highlight already stored
         return jsonify({
-            'message': 'Highlight created successfully',
+            'message': 'Highlight created successfully' if created else 'Highlight already exists',
             'highlight': highlight_schema.dump(highlight)
-        }), 201
+        }), 201 if created else 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@highlight_bp.route('/highlights/batch', methods=['POST'])
+@jwt_required()
+def create_highlights_batch():
+    current_user_id = get_jwt_identity()
+    data = request.get_json(silent=True)
+
+    if not data or not isinstance(data.get('highlights'), list) or not data['highlights']:
+        return jsonify({'error': 'highlights must be a non-empty array'}), 400
+
+    try:
+        user = User.query.get(current_user_id)
+        results = HighlightFacade.save_highlights_batch(data['highlights'], user)
+        counts = {status: sum(1 for r in results if r['status'] == status)
+                  for status in ('created', 'duplicate', 'error')}
+        return jsonify({
+            'message': f"Saved {counts['created']} of {len(results)} highlights",
+            **counts,
+            'results': results
+        }), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -32,11 +59,17 @@ def create_highlight():
 def get_all_highlights():
     current_user_id = get_jwt_identity()
     try:
+        page = page_request()
+        if page:
+            result = HighlightFacade.get_user_highlights_page(current_user_id, *page)
+            return jsonify(page_response('highlights', highlights_schema, result)), 200
         highlights = HighlightFacade.get_user_highlights(current_user_id)
         return jsonify({
             'highlights': highlights_schema.dump(highlights),
             'total': len(highlights)
         }), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -54,8 +87,14 @@ def get_highlights_by_user_id(user_id):
         if current_user_id != user_id:
             return jsonify({'error': 'Unauthorized access'}), 403
             
+        page = page_request()
+        if page:
+            result = HighlightFacade.get_user_highlights_page(user_id, *page)
+            return jsonify(page_response('highlights', highlights_schema, result)), 200
         highlights = HighlightFacade.get_user_highlights(user_id)
         return jsonify(highlights_schema.dump(highlights)), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -64,8 +103,31 @@ def get_highlights_by_user_id(user_id):
 def get_my_highlights():
     current_user_id = get_jwt_identity()
     try:
+        page = page_request()
+        if page:
+            result = HighlightFacade.get_user_highlights_page(current_user_id, *page)
+            return jsonify(page_response('highlights', highlights_schema, result)), 200
         highlights = HighlightFacade.get_user_highlights(current_user_id)
         return jsonify(highlights_schema.dump(highlights)), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@highlight_bp.route('/highlights/by-url', methods=['GET'])
+@jwt_required()
+def get_highlights_by_url():
+    current_user_id = get_jwt_identity()
+    url = request.args.get('url', '').strip()
+    if not url:
+        return jsonify({'error': 'url is required'}), 400
+    try:
+        highlights = HighlightFacade.get_highlights_by_url(url, current_user_id)
+        return jsonify({
+            'url': normalize_url(url),
+            'highlights': highlights_compact_schema.dump(highlights),
+            'total': len(highlights)
+        }), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -102,6 +164,8 @@ def update_highlight(highlight_id):
             'message': 'Highlight updated successfully',
             'highlight': highlight_schema.dump(highlight)
         }), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -1,14 +1,54 @@
-from flask import Blueprint, request, jsonify
+import math
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.facade.quiz_facade import QuizFacade
 from app.schemas.quiz import quizzes_schema, quiz_schema, quiz_create_schema
 from app.models.user import User
 from app.models.summary import Summary
+from app.models.quiz import Quiz
+from app.utils.pagination import page_request, page_response
+from app.utils.rate_limiter import ai_rate_limit, estimate_request_tokens, LANE_BATCH
+from app.utils.request_modes import is_instant_request
 
 quiz_bp = Blueprint('quiz', __name__)
 
+def _estimate_create_cost():
+    data = request.get_json(silent=True) or {}
+    if data.get('questions') or is_instant_request(data):
+        return None  # Manually written and instant quizzes do not call the AI
+    summary = Summary.query.get(data.get('summary_id'))
+    quiz = summary.quiz if summary else None
+    if quiz and quiz.pregenerated and QuizFacade.matches_request(quiz, data.get('num_questions', 4)):
+        return None  # Served from the eagerly generated quiz
+    return _quiz_cost(summary.content if summary else '', data.get('num_questions', 4))
+
+def _estimate_regenerate_cost(quiz_id):
+    if is_instant_request(request.get_json(silent=True) or {}):
+        return None
+    quiz = Quiz.query.get(quiz_id)
+    summary = Summary.query.get(quiz.summary_id) if quiz else None
+    data = request.get_json(silent=True) or {}
+    return _quiz_cost(summary.content if summary else '', data.get('num_questions', 4))
+
+def _estimate_batch_cost():
+    data = request.get_json(silent=True) or {}
+    summary_ids = data.get('summary_ids')
+    if not isinstance(summary_ids, list) or not summary_ids:
+        return None  # Rejected by the view before any AI call
+    summaries = Summary.query.filter(Summary.id.in_(summary_ids)).all()
+    costs = [_quiz_cost(summary.content, data.get('num_questions', 4)) for summary in summaries]
+    return sum(c[0] for c in costs) or len(summary_ids), sum(c[1] for c in costs)
+
+def _quiz_cost(content, num_questions):
+    """One AI call, with the whole summary in its prompt, per shard of the quiz"""
+    shards = 1
+    if isinstance(num_questions, int) and num_questions > 0:
+        shards = math.ceil(num_questions / max(current_app.config.get('AI_QUIZ_SHARD_SIZE', 5), 1))
+    return shards, shards * estimate_request_tokens([content])
+
 @quiz_bp.route('/quizzes', methods=['POST'])
 @jwt_required()
+@ai_rate_limit('quizzes.create', _estimate_create_cost)
 def create_quiz():
     current_user_id = get_jwt_identity()
     data = request.get_json()
@@ -27,6 +67,8 @@ def create_quiz():
         if not collection or not collection.can_access(user):
             return jsonify({'error': 'Unauthorized access to collection'}), 403
         
+        if is_instant_request(data):
+            data['mode'] = 'instant'
         quiz = QuizFacade.save_quiz(data)
         return jsonify({
             'message': 'Quiz created successfully',
@@ -37,16 +79,53 @@ def create_quiz():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@quiz_bp.route('/quizzes/batch', methods=['POST'])
+@jwt_required()
+@ai_rate_limit('quizzes.batch', _estimate_batch_cost, LANE_BATCH)
+def create_quizzes_batch():
+    current_user_id = get_jwt_identity()
+    data = request.get_json()
+
+    if not data or not isinstance(data.get('summary_ids'), list) or not data['summary_ids']:
+        return jsonify({'error': 'summary_ids must be a non-empty array'}), 400
+
+    try:
+        user = User.query.get(current_user_id)
+        results = QuizFacade.save_quizzes_batch(
+            data['summary_ids'],
+            user,
+            data.get('num_questions', 4)
+        )
+        created = 0
+        for result in results:
+            if 'quiz' in result:
+                result['quiz'] = quiz_schema.dump(result['quiz'])
+                created += 1
+        return jsonify({
+            'message': f'Successfully created {created} of {len(results)} quizzes',
+            'results': results
+        }), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @quiz_bp.route('/quizzes', methods=['GET'])
 @jwt_required()
 def get_all_quizzes():
     current_user_id = get_jwt_identity()
     try:
+        page = page_request()
+        if page:
+            result = QuizFacade.get_accessible_quizzes_page(current_user_id, *page)
+            return jsonify(page_response('quizzes', quizzes_schema, result)), 200
         quizzes = QuizFacade.get_accessible_quizzes(current_user_id)
         return jsonify({
             'quizzes': quizzes_schema.dump(quizzes),
             'total': len(quizzes)
         }), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -63,6 +142,7 @@ def get_quiz(quiz_id):
         collection = summary.collection
         if not collection or not collection.can_access(user):
             return jsonify({'error': 'Unauthorized access to collection'}), 403
+        quiz = QuizFacade.claim_quiz(quiz)
         return jsonify({
             'quiz': quiz_schema.dump(quiz)
         }), 200
@@ -123,6 +203,7 @@ def delete_quiz(quiz_id):
 
 @quiz_bp.route('/quizzes/<quiz_id>/regenerate', methods=['POST'])
 @jwt_required()
+@ai_rate_limit('quizzes.regenerate', _estimate_regenerate_cost)
 def regenerate_quiz(quiz_id):
     current_user_id = get_jwt_identity()
     data = request.get_json() or {}
@@ -140,6 +221,14 @@ def regenerate_quiz(quiz_id):
         if summary.user_id != current_user_id:
             return jsonify({'error': 'Unauthorized access'}), 403
         
+        if is_instant_request(data):
+            # Built locally from the summary, no AI call
+            regenerated_quiz = QuizFacade.regenerate_quiz_instantly(quiz_id, num_questions)
+            return jsonify({
+                'message': 'Quiz regenerated successfully',
+                'quiz': quiz_schema.dump(regenerated_quiz)
+            }), 200
+
         regenerated_quiz = QuizFacade.regenerate_quiz_with_ai(quiz_id, num_questions)
         return jsonify({
             'message': 'Quiz regenerated successfully with AI',
@@ -167,7 +256,9 @@ def get_quiz_by_summary(summary_id):
         quiz = QuizFacade.get_quiz_by_summary(summary_id)
         if not quiz:
             return jsonify({'error': 'No quiz found for this summary'}), 404
-        
+
+        # Once shown, a pregenerated quiz is the user's and is never replaced in the background
+        quiz = QuizFacade.claim_quiz(quiz)
         return jsonify({
             'quiz': quiz_schema.dump(quiz)
         }), 200
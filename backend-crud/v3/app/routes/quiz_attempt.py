@@ -10,6 +10,7 @@ from app.models.quiz import Quiz
 from app.models.collection import Collection
 from app.models.user import User
 from sqlalchemy.orm import joinedload
+from app.utils.pagination import page_request, page_response
 
 quiz_attempt_bp = Blueprint('quiz_attempt', __name__)
 
@@ -55,6 +56,14 @@ def get_quiz_attempts(quiz_id):
     if not (collection.user_id == current_user_id or collection.is_collaborator(user)):
         return jsonify({'error': 'Unauthorized'}), 403
 
+    try:
+        page = page_request()
+        if page:
+            result = QuizAttemptFacade.get_quiz_attempts_page(quiz_id, *page)
+            return jsonify(page_response('attempts', quiz_attempts_schema, result)), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
     from app.models.quiz_attempt import QuizAttempt
     attempts = QuizAttempt.query.filter_by(quiz_id=quiz_id).options(joinedload(QuizAttempt.user)).all()
     return jsonify(quiz_attempts_schema.dump(attempts)), 200
@@ -71,6 +80,14 @@ def get_quiz_leaderboard(quiz_id):
     if not (collection.user_id == current_user_id or collection.is_collaborator(user)):
         return jsonify({'error': 'Unauthorized'}), 403
 
+    try:
+        page = page_request()
+        if page:
+            result = QuizAttemptFacade.get_quiz_leaderboard_page(quiz_id, *page)
+            return jsonify(page_response('leaderboard', quiz_attempts_schema, result)), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
     leaderboard = QuizAttemptFacade.get_quiz_leaderboard(quiz_id)
     return jsonify(quiz_attempts_schema.dump(leaderboard)), 200
 
@@ -0,0 +1,24 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.facade.search_facade import SearchFacade
+
+search_bp = Blueprint('search', __name__)
+
+@search_bp.route('/search', methods=['GET'])
+@jwt_required()
+def search():
+    current_user_id = get_jwt_identity()
+    q = request.args.get('q', '').strip()
+    types = [t.strip() for t in request.args.get('types', '').split(',') if t.strip()]
+    try:
+        results = SearchFacade.search(current_user_id, q, types=types or None,
+                                      limit=request.args.get('limit', type=int))
+        return jsonify({
+            'query': q,
+            'results': results,
+            'total': len(results)
+        }), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -1,14 +1,45 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.facade.summary_facade import SummaryFacade
+from app.facade.summary_job_facade import SummaryJobFacade
 from app.schemas.summary import summary_schema, summaries_schema, summary_create_schema
+from app.schemas.summary_job import summary_job_schema
+from app.utils.job_queue import JobQueueFull
+from app.utils.ai_service import AIService
+from app.utils.rate_limiter import ai_rate_limit, estimate_request_tokens
+from app.utils.db import db
+import json
 from app.models.collection import Collection
+from app.utils.pagination import page_request, page_response
+from app.utils.request_modes import is_instant_request
 from app.models.user import User
+from app.models.summary import Summary
 
 summary_bp = Blueprint('summary', __name__)
 
+def _estimate_create_cost():
+    data = request.get_json(silent=True) or {}
+    if data.get('content') or is_instant_request(data):
+        return None  # Manually written and instant summaries do not call the AI
+    collection = Collection.query.get(data.get('collection_id'))
+    highlights = collection.highlights if collection else []
+    return 1, estimate_request_tokens(h.text for h in highlights)
+
+def _estimate_regenerate_cost(summary_id):
+    if is_instant_request(request.get_json(silent=True) or {}):
+        return None
+    summary = Summary.query.get(summary_id)
+    highlights = summary.highlights if summary else []
+    return 1, estimate_request_tokens(h.text for h in highlights)
+
+def _estimate_stream_cost(collection_id):
+    collection = Collection.query.get(collection_id)
+    highlights = collection.highlights if collection else []
+    return 1, estimate_request_tokens(h.text for h in highlights)
+
 @summary_bp.route('/summaries', methods=['POST'])
 @jwt_required()
+@ai_rate_limit('summaries.create', _estimate_create_cost)
 def create_summary():
     current_user_id = get_jwt_identity()
     data = request.get_json()
@@ -32,27 +63,75 @@ def create_summary():
         # Fetch all highlight IDs from the collection
         highlight_ids = [h.id for h in collection.highlights]
         data['highlight_ids'] = highlight_ids
+        if is_instant_request(data):
+            data['mode'] = 'instant'
+
+        # Job mode: hand the AI call to the background pool and return at once
+        if _is_async_request(data) and not data.get('content') and data.get('mode') != 'instant':
+            job = SummaryJobFacade.enqueue_summary(data)
+            response = jsonify({
+                'message': 'Summary generation started',
+                'job': summary_job_schema.dump(job)
+            })
+            response.headers['Location'] = f"/api/summaries/jobs/{job.id}"
+            return response, 202
 
         summary = SummaryFacade.save_summary(data)
         return jsonify({
             'message': 'Summary created successfully',
             'summary': summary_schema.dump(summary)
         }), 201
+    except JobQueueFull as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '5'}
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _is_async_request(data):
+    """Job mode is requested with ?async=true or an "async": true field in the body"""
+    flag = request.args.get('async', data.get('async', False))
+    if isinstance(flag, str):
+        return flag.lower() in ('1', 'true', 'yes')
+    return bool(flag)
+
+@summary_bp.route('/summaries/jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def get_summary_job(job_id):
+    current_user_id = get_jwt_identity()
+    try:
+        job = SummaryJobFacade.get_job_by_id(job_id)
+        if job.user_id != current_user_id:
+            return jsonify({'error': 'Unauthorized access'}), 403
+
+        # Long-poll: ?wait=<seconds> blocks until the job finishes or the wait expires
+        wait = request.args.get('wait', 0, type=float)
+        if wait > 0 and not job.is_finished():
+            wait = min(wait, current_app.config.get('AI_JOB_MAX_WAIT', 30))
+            job = SummaryJobFacade.wait_for_job(job_id, wait)
+
+        return jsonify({
+            'job': summary_job_schema.dump(job)
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 404
+
 @summary_bp.route('/summaries', methods=['GET'])
 @jwt_required()
 def get_all_summaries():
     current_user_id = get_jwt_identity()
     try:
+        page = page_request()
+        if page:
+            result = SummaryFacade.get_user_summaries_page(current_user_id, *page)
+            return jsonify(page_response('summaries', summaries_schema, result)), 200
         summaries = SummaryFacade.get_user_summaries(current_user_id)
         return jsonify({
             'summaries': summaries_schema.dump(summaries),
             'total': len(summaries)
         }), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -123,6 +202,7 @@ def delete_summary(summary_id):
 
 @summary_bp.route('/summaries/<summary_id>/regenerate', methods=['POST'])
 @jwt_required()
+@ai_rate_limit('summaries.regenerate', _estimate_regenerate_cost)
 def regenerate_summary(summary_id):
     current_user_id = get_jwt_identity()
     try:
@@ -132,6 +212,22 @@ def regenerate_summary(summary_id):
         if summary.user_id != current_user_id:
             return jsonify({'error': 'Unauthorized access'}), 403
         
+        data = request.get_json(silent=True) or {}
+        if data.get('mode') == 'refresh':
+            # Only send highlights added or removed since the summary was generated
+            refreshed_summary = SummaryFacade.refresh_summary_with_ai(summary_id)
+            return jsonify({
+                'message': 'Summary refreshed successfully with AI',
+                'summary': summary_schema.dump(refreshed_summary)
+            }), 200
+        if is_instant_request(data):
+            # Local extractive summary, no AI call
+            regenerated_summary = SummaryFacade.regenerate_summary_instantly(summary_id)
+            return jsonify({
+                'message': 'Summary regenerated successfully',
+                'summary': summary_schema.dump(regenerated_summary)
+            }), 200
+
         regenerated_summary = SummaryFacade.regenerate_summary_with_ai(summary_id)
         return jsonify({
             'message': 'Summary regenerated successfully with AI',
@@ -155,4 +251,55 @@ def get_summaries_by_collection(collection_id):
         summaries = SummaryFacade.get_summaries_by_collection(collection_id)
         return jsonify(summaries_schema.dump(summaries)), 200
     except Exception as e:
-        return jsonify({'error': str(e)}), 404
\ No newline at end of file
+        return jsonify({'error': str(e)}), 404
+
+def _format_sse(event, data):
+    """Format one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@summary_bp.route('/collections/<collection_id>/summaries/stream', methods=['GET'])
+@jwt_required()
+@ai_rate_limit('summaries.stream', _estimate_stream_cost)
+def stream_summary(collection_id):
+    current_user_id = get_jwt_identity()
+    collection = Collection.query.get(collection_id)
+    if not collection:
+        return jsonify({'error': 'Collection not found'}), 404
+    user = User.query.get(current_user_id)
+    if not collection.can_access(user):
+        return jsonify({'error': 'Unauthorized access to collection'}), 403
+
+    highlights = list(collection.highlights)
+    if not highlights:
+        return jsonify({'error': 'No highlights found for the provided IDs'}), 400
+
+    def generate():
+        parts = []
+        try:
+            ai_service = AIService()
+            for chunk in ai_service.stream_summary_from_highlights(highlights, collection.title):
+                parts.append(chunk)
+                yield _format_sse('token', {'text': chunk})
+
+            # Persist the finished summary once the stream has ended. save_summary
+            # generates a summary when given no content, so an empty stream stops here
+            content = ''.join(parts).strip()
+            if not content:
+                yield _format_sse('error', {'error': 'The AI returned an empty summary'})
+                return
+            summary = SummaryFacade.save_summary({
+                'collection_id': collection_id,
+                'highlight_ids': [h.id for h in highlights],
+                'user_id': current_user_id,
+                'content': content
+            })
+            yield _format_sse('done', {'summary': summary_schema.dump(summary)})
+        except Exception as e:
+            db.session.rollback()
+            yield _format_sse('error', {'error': str(e)})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
\ No newline at end of file
@@ -0,0 +1,21 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.facade.sync_facade import SyncFacade
+
+sync_bp = Blueprint('sync', __name__)
+
+@sync_bp.route('/sync', methods=['GET'])
+@jwt_required()
+def sync_changes():
+    current_user_id = get_jwt_identity()
+    try:
+        changes = SyncFacade.get_changes(
+            current_user_id,
+            cursor=request.args.get('since') or None,
+            limit=request.args.get('limit', type=int)
+        )
+        return jsonify(changes), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
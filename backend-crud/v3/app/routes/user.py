@@ -3,6 +3,7 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.facade.user_facade import UserFacade
 from app.schemas.user import user_schema, user_update_schema
 from marshmallow import ValidationError
+from app.utils.pagination import page_request, page_response
 
 user_bp = Blueprint('user', __name__)
 
@@ -10,8 +11,14 @@ user_bp = Blueprint('user', __name__)
 @jwt_required()
 def get_users():
     try:
+        page = page_request()
+        if page:
+            result = UserFacade.get_users_page(*page)
+            return jsonify(page_response('users', user_schema, result)), 200
         users = UserFacade.get_all_users()
         return jsonify(user_schema.dump(users, many=True)), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -11,7 +11,7 @@ class HighlightSchema(ma.SQLAlchemyAutoSchema):
         model = Highlight
         load_instance = True
         include_fk = True
-        exclude = ('updated_at',)
+        exclude = ('updated_at', 'url_hash', 'content_hash')
 
     url = fields.Str(required=True, validate=validate.Length(max=2048))
     text = fields.Str(required=True)
@@ -25,7 +25,7 @@ class HighlightCreateSchema(ma.SQLAlchemyAutoSchema):
     class Meta:
         model = Highlight
         load_instance = True
-        exclude = ('id', 'user_id')
+        exclude = ('id', 'user_id', 'url_hash', 'content_hash')
 
     url = fields.Str(required=True, validate=validate.Length(max=2048))
     text = fields.Str(required=True)
@@ -34,4 +34,5 @@ class HighlightCreateSchema(ma.SQLAlchemyAutoSchema):
 
 highlight_schema = HighlightSchema()
 highlights_schema = HighlightSchema(many=True)
+highlights_compact_schema = HighlightSchema(many=True, only=('id', 'text', 'timestamp', 'collection_id'))
 highlight_create_schema = HighlightCreateSchema()
\ No newline at end of file
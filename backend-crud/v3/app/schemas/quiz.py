@@ -11,7 +11,7 @@ class QuizSchema(ma.SQLAlchemyAutoSchema):
         model = Quiz
         load_instance = True
         include_fk = True
-        exclude = ('updated_at', 'attempts')
+        exclude = ('updated_at', 'attempts', 'pregenerated', 'pregenerated_at')
 
     summary = fields.Nested(summary_schema, dump_only=True, exclude=('collection', 'quiz'))
     questions = fields.Method('get_questions_without_correct_answer')
@@ -23,6 +23,16 @@ class QuizSchema(ma.SQLAlchemyAutoSchema):
             for q in obj.questions or []
         ]
 
+class QuizExportSchema(QuizSchema):
+    """
+    Flat quiz for the library export, correct answers included; the summary is exported on its own.
+    Only for quizzes whose answers the user may see (see ExportFacade); others use quiz_export_stripped_schema.
+    """
+    class Meta(QuizSchema.Meta):
+        exclude = QuizSchema.Meta.exclude + ('summary',)
+
+    questions = fields.Raw(dump_only=True)
+
 class QuizCreateSchema(ma.Schema):
     summary_id = fields.Str(required=True, validate=validate.Length(equal=36))
     title = fields.Str(required=True)
@@ -31,4 +41,6 @@ class QuizCreateSchema(ma.Schema):
 
 quiz_schema = QuizSchema()
 quizzes_schema = QuizSchema(many=True)
-quiz_create_schema = QuizCreateSchema()
\ No newline at end of file
+quiz_create_schema = QuizCreateSchema()
+quiz_export_schema = QuizExportSchema()
+quiz_export_stripped_schema = QuizSchema(exclude=('summary',))
\ No newline at end of file
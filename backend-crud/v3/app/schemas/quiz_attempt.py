@@ -16,9 +16,17 @@ class QuizAttemptSchema(ma.SQLAlchemyAutoSchema):
     quiz = fields.Nested('QuizSchema', dump_only=True, exclude=('attempts',))
     user = fields.Nested('UserBaseSchema', dump_only=True, only=("id", "username", "email"))
 
+class QuizAttemptExportSchema(QuizAttemptSchema):
+    """Flat attempt for the library export; the quiz is exported on its own"""
+    class Meta(QuizAttemptSchema.Meta):
+        exclude = ('updated_at', 'quiz', 'user')
+
+    quiz_id = fields.Str(dump_only=True)
+
 class QuizAttemptCreateSchema(ma.Schema):
     answers = fields.List(fields.Str(), required=True)  # e.g., ["A", "C", "B", "D"]
 
 quiz_attempt_schema = QuizAttemptSchema()
 quiz_attempts_schema = QuizAttemptSchema(many=True)
-quiz_attempt_create_schema = QuizAttemptCreateSchema() 
\ No newline at end of file
+quiz_attempt_create_schema = QuizAttemptCreateSchema()
+quiz_attempt_export_schema = QuizAttemptExportSchema(many=True) 
\ No newline at end of file
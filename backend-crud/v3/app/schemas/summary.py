@@ -10,7 +10,7 @@ class SummarySchema(ma.SQLAlchemyAutoSchema):
         model = Summary
         load_instance = True
         include_fk = True
-        exclude = ('updated_at',)
+        exclude = ('updated_at', 'coverage')
 
     collection = fields.Nested('CollectionSchema', dump_only=True, exclude=('summaries', 'highlights'))
     highlights = fields.Nested('HighlightSchema', many=True, dump_only=True)
@@ -0,0 +1,17 @@
+from flask_marshmallow import Marshmallow
+from marshmallow import fields
+from app.models.summary_job import SummaryJob
+from app.utils.db import db
+
+ma = Marshmallow()
+
+class SummaryJobSchema(ma.SQLAlchemyAutoSchema):
+    class Meta:
+        model = SummaryJob
+        load_instance = True
+        include_fk = True
+        exclude = ('updated_at', 'highlight_ids')
+
+    summary = fields.Nested('SummarySchema', dump_only=True, exclude=('collection',))
+
+summary_job_schema = SummaryJobSchema()
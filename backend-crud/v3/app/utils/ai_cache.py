@@ -0,0 +1,179 @@
+import copy
+import hashlib
+import json
+import logging
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from flask import current_app, has_app_context
+from sqlalchemy import select, delete, update, func
+from sqlalchemy.exc import IntegrityError
+from app.utils.db import db, after_transaction
+
+logger = logging.getLogger(__name__)
+
+def normalize_text(text):
+    """Collapse whitespace and case so cosmetic edits do not change the cache key"""
+    return re.sub(r'\s+', ' ', str(text or '')).strip().lower()
+
+def make_cache_key(operation, prompt_version, model, temperature, normalized_input):
+    """Content-addressed key: sha256 over everything that determines the completion"""
+    material = json.dumps(
+        [operation, prompt_version, model, temperature, normalized_input],
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+class AICache:
+    """
+    Two-tier cache for AI completions.
+    The first tier is a per-process LRU with a TTL; the second tier is the
+    ai_cache_entries table, shared by every worker. Database access goes
+    through its own connection so it never commits the caller's session.
+    While the caller's session holds the database's write lock (SQLite, after
+    it wrote), database writes wait until its transaction ends.
+    """
+    PRUNE_EVERY = 50  # Writes between size-based prunes of the database tier
+
+    def __init__(self, ttl=7 * 24 * 3600, memory_size=256, db_max_entries=10000):
+        self.ttl = ttl
+        self.memory_size = memory_size
+        self.db_max_entries = db_max_entries
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.writes = 0
+
+    def get(self, key):
+        value = self._memory_get(key)
+        if value is not None:
+            return value
+        value = self._db_get(key)
+        if value is not None:
+            self._memory_set(key, value)
+        return value
+
+    def set(self, key, operation, value):
+        self._memory_set(key, value)
+        after_transaction(lambda: self._db_set(key, operation, value))
+
+    def _memory_get(self, key):
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if datetime.utcnow() > expires_at:
+                del self.memory[key]
+                return None
+            self.memory.move_to_end(key)
+            # Callers may mutate quiz dicts, so never hand out the cached object itself
+            return copy.deepcopy(value)
+
+    def _memory_set(self, key, value):
+        with self.lock:
+            self.memory[key] = (value, datetime.utcnow() + timedelta(seconds=self.ttl))
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.memory_size:
+                self.memory.popitem(last=False)
+
+    def _db_get(self, key):
+        if not has_app_context():
+            return None
+        from app.models.ai_cache_entry import AICacheEntry
+        table = AICacheEntry.__table__
+        now = datetime.utcnow()
+        try:
+            with db.engine.connect() as conn:
+                row = conn.execute(
+                    select(table.c.value, table.c.expires_at).where(table.c.cache_key == key)
+                ).first()
+        except Exception as e:
+            logger.error(f"AI cache read failed: {e}")
+            return None
+        if row is None:
+            return None
+        if now > row.expires_at:
+            after_transaction(lambda: self._db_write(delete(table).where(table.c.cache_key == key)))
+            return None
+        after_transaction(lambda: self._db_write(
+            update(table).where(table.c.cache_key == key).values(hits=table.c.hits + 1, last_hit_at=now)
+        ))
+        return row.value
+
+    def _db_write(self, statement):
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(statement)
+        except Exception as e:
+            logger.error(f"AI cache write failed: {e}")
+
+    def _db_set(self, key, operation, value):
+        if not has_app_context():
+            return
+        from app.models.ai_cache_entry import AICacheEntry
+        table = AICacheEntry.__table__
+        now = datetime.utcnow()
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(delete(table).where(table.c.cache_key == key))
+                conn.execute(table.insert().values(
+                    id=str(uuid.uuid4()),
+                    cache_key=key,
+                    operation=operation,
+                    value=value,
+                    hits=0,
+                    created_at=now,
+                    last_hit_at=now,
+                    expires_at=now + timedelta(seconds=self.ttl),
+                    updated_at=now
+                ))
+        except IntegrityError:
+            # Another worker stored the same key concurrently; its value is equivalent
+            return
+        except Exception as e:
+            logger.error(f"AI cache write failed: {e}")
+            return
+
+        with self.lock:
+            self.writes += 1
+            should_prune = self.writes % self.PRUNE_EVERY == 0
+        if should_prune:
+            self.prune()
+
+    def prune(self):
+        """Drop expired rows, then the least recently used rows beyond db_max_entries"""
+        from app.models.ai_cache_entry import AICacheEntry
+        table = AICacheEntry.__table__
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(delete(table).where(table.c.expires_at < datetime.utcnow()))
+                count = conn.execute(select(func.count()).select_from(table)).scalar()
+                overflow = count - self.db_max_entries
+                if overflow > 0:
+                    stale_ids = conn.execute(
+                        select(table.c.id).order_by(table.c.last_hit_at.asc()).limit(overflow)
+                    ).scalars().all()
+                    conn.execute(delete(table).where(table.c.id.in_(stale_ids)))
+        except Exception as e:
+            logger.error(f"AI cache prune failed: {e}")
+
+_ai_cache = None
+_ai_cache_lock = threading.Lock()
+
+def get_ai_cache():
+    """Return the process-wide AI cache, or None when caching is disabled"""
+    global _ai_cache
+    config = current_app.config if has_app_context() else {}
+    if not config.get('AI_CACHE_ENABLED', True):
+        return None
+    with _ai_cache_lock:
+        if _ai_cache is None:
+            _ai_cache = AICache(
+                ttl=config.get('AI_CACHE_TTL', 7 * 24 * 3600),
+                memory_size=config.get('AI_CACHE_MEMORY_SIZE', 256),
+                db_max_entries=config.get('AI_CACHE_DB_MAX_ENTRIES', 10000)
+            )
+    return _ai_cache
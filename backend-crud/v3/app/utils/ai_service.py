@@ -1,33 +1,90 @@
 import os
-import requests
 import logging
+import math
+import time
 from flask import current_app
-import json
+from concurrent.futures import ThreadPoolExecutor
+from flask import has_app_context
+from app.utils.ai_cache import get_ai_cache, make_cache_key, normalize_text
+from app.utils.llm_client import LLMError, CircuitBreaker
+from app.utils.llm_router import get_llm_router
+from app.utils.single_flight import get_single_flight
+from app.utils.rate_limiter import get_rate_limiter
+from app.utils.dedup import deduplicate_highlights
+from app.utils import extractive_summary, local_quiz
+from app.utils.ai_telemetry import get_ai_telemetry, SOURCE_AI, SOURCE_CACHE, SOURCE_FALLBACK, SOURCE_LOCAL
+from app.utils.quiz_parser import parse_quiz_questions, merge_question_sets, QuizParseError, quiz_parse_stats
 
 logger = logging.getLogger(__name__)
 
 GROQ_API_KEY = os.environ.get("GROQ_API_KEY")
 MODEL_NAME = "llama3-70b-8192"
-GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
+# Any OpenAI-compatible endpoint works, e.g. scripts/mock_llm_server.py for load testing
+GROQ_API_URL = os.environ.get("GROQ_API_URL", "https://api.groq.com/openai/v1/chat/completions")
+AI_TEMPERATURE = 0.2
+
+# Bump these whenever the matching prompt template changes so cached results are not reused
+SUMMARY_PROMPT_VERSION = "1"
+QUIZ_PROMPT_VERSION = "3"
+
+MAX_REDUCE_ROUNDS = 3  # Extra merge rounds when partial summaries still overflow the context
 
 class AIService:
     def __init__(self):
-        self.ai_available = bool(GROQ_API_KEY)
-    def build_quiz_prompt(self, summary):
+        # Routes calls across the providers in AI_PROVIDERS, or to Groq alone by default
+        self.router = get_llm_router(GROQ_API_URL, GROQ_API_KEY, MODEL_NAME)
+        self.ai_available = self.router is not None
+        # Cached completions are only reused while the same providers and models can answer
+        self.models = self.router.models(MODEL_NAME) if self.router else [MODEL_NAME]
+        self.cache = get_ai_cache()
+        self.single_flight = get_single_flight()
+        self.telemetry = get_ai_telemetry()
+        config = current_app.config if has_app_context() else {}
+        # Prompt budget = model context window minus room for the completion
+        self.prompt_token_budget = (config.get('AI_CONTEXT_TOKENS', 8192)
+                                    - config.get('AI_SUMMARY_OUTPUT_TOKENS', 1024))
+        self.map_concurrency = config.get('AI_MAP_CONCURRENCY', 4)
+        self.json_mode = config.get('AI_JSON_MODE', True)
+        self.quiz_shard_size = max(config.get('AI_QUIZ_SHARD_SIZE', 5), 1)
+        self.dedup_enabled = config.get('AI_DEDUP_ENABLED', True)
+        self.dedup_threshold = config.get('AI_DEDUP_THRESHOLD', 0.8)
+
+    def _summary_cache_key(self, highlights):
+        # Highlight order does not change the meaning of the set, so sort it for a stable key
+        texts = sorted(normalize_text(getattr(h, 'text', h)) for h in highlights)
+        return make_cache_key('summary', SUMMARY_PROMPT_VERSION, self.models, AI_TEMPERATURE, texts)
+
+    def _quiz_cache_key(self, summary, num_questions):
+        return make_cache_key('quiz', QUIZ_PROMPT_VERSION, self.models, AI_TEMPERATURE,
+                              [normalize_text(summary), num_questions])
+
+    def build_quiz_prompt(self, summary, num_questions=4, focus=None, avoid=None):
+        """
+        Quiz prompt for `num_questions` questions. `focus` narrows the questions
+        to one section of the summary (one shard of a larger quiz); `avoid`
+        lists questions already asked that must not be repeated.
+        """
+        focus_block = f"""
+Other quizzes cover the rest of the summary, so ask only about this section of it:
+{focus}
+""" if focus else ""
+        avoid_block = "\nThese questions were already asked; do not repeat or rephrase them:\n" + "\n".join(
+            f"- {question}" for question in avoid) + "\n" if avoid else ""
         return f"""
 You are a professional quiz generator.
 
 Your task is to create a multiple-choice quiz based on the provided summary.
 
 Follow these strict rules:
-1. Generate exactly 4 unique and non-redundant questions strictly related to the summary.
+1. Generate exactly {num_questions} unique and non-redundant questions strictly related to the summary.
 2. Each question must have only one correct answer.
 3. Each question must contain 4 distinct answer options labeled "A", "B", "C", and "D".
 4. The correct answer label ("A", "B", "C", or "D") must be randomly assigned for each question.
 5. Avoid repeating or rephrasing the same question in any way.
-6. Return only a valid JSON array in the following format — no explanations, no extra text:
+6. Return only a valid JSON object in the following format, with {num_questions} items in "questions" — no explanations, no extra text:
 
-[
+{{
+    "questions": [
     {{
         "question": "First unique question?",
         "options": {{
@@ -47,33 +104,41 @@ Follow these strict rules:
             "D": "Option text"
         }},
         "correct_answer": "C"
-    }},
-    {{
-        "question": "Third unique question?",
-        "options": {{
-            "A": "Option text",
-            "B": "Option text",
-            "C": "Option text",
-            "D": "Option text"
-        }},
-        "correct_answer": "D"
-    }},
-    {{
-        "question": "Fourth unique question?",
-        "options": {{
-            "A": "Option text",
-            "B": "Option text",
-            "C": "Option text",
-            "D": "Option text"
-        }},
-        "correct_answer": "B"
     }}
 ]
-
+}}
+{focus_block}{avoid_block}
 ==== Summary ====
 
 {summary}
 """
+
+    def plan_quiz_shards(self, num_questions):
+        """Questions asked of each parallel quiz call: at most AI_QUIZ_SHARD_SIZE each, as even as possible"""
+        shards = max(math.ceil(num_questions / self.quiz_shard_size), 1)
+        base, extra = divmod(num_questions, shards)
+        return [base + (1 if i < extra else 0) for i in range(shards)]
+
+    @staticmethod
+    def split_sections(text, count):
+        """Split text into `count` consecutive runs of sentences of similar length"""
+        sentences = extractive_summary.split_sentences(text)
+        if count <= 1 or len(sentences) < count:
+            return [None] * count
+        total = sum(len(sentence) for sentence in sentences)
+        sections, current, size = [], [], 0
+        for i, sentence in enumerate(sentences):
+            current.append(sentence)
+            size += len(sentence)
+            remaining_sections = count - len(sections) - 1
+            # Close the section at its share of the text, leaving a sentence for every later section
+            if remaining_sections and (size >= total * (len(sections) + 1) / count
+                                       or len(sentences) - i - 1 == remaining_sections):
+                sections.append(' '.join(current))
+                current = []
+        sections.append(' '.join(current))
+        return sections
+
     def build_prompt(self, highlights, collection_title=None):
         highlights_text = "\n- ".join([h.text if hasattr(h, 'text') else str(h) for h in highlights])
         return f'''
@@ -94,184 +159,436 @@ Given a list of key highlights selected by a user from various texts or articles
 A well-structured summary based on the above highlights:
 '''
 
-    def generate_summary_from_highlights(self, highlights, collection_title=None):
-        if not self.ai_available:
-            return self._generate_fallback_summary(highlights, collection_title)
+    def build_reduce_prompt(self, partial_summaries, collection_title=None):
+        partials_text = "\n\n".join(
+            f"--- Part {i} ---\n{partial}" for i, partial in enumerate(partial_summaries, 1)
+        )
+        return f'''
+You are an expert content summarizer.
+
+The following partial summaries were each written from a different part of the same collection of highlights. Merge them into a single **clear, concise, and informative summary**.
+
+**Instructions:**
+- Use only the information in the partial summaries.
+- Do not add external knowledge.
+- Combine overlapping points instead of repeating them.
+- Use clear and professional language.
+
+**Partial Summaries:**
+{partials_text}
+
+**Output:**
+A well-structured summary of the whole collection:
+'''
+
+    def build_update_prompt(self, previous_summary, added_highlights, removed_highlights):
+        added_text = "\n- ".join(getattr(h, 'text', str(h)) for h in added_highlights) or "(none)"
+        removed_text = "\n- ".join(getattr(h, 'text', str(h)) for h in removed_highlights) or "(none)"
+        return f'''
+You are an expert content summarizer.
+
+Below is an existing summary of a user's highlights, followed by highlights that were added to and removed from the collection since the summary was written. Update the summary so it reflects the current highlights.
+
+**Instructions:**
+- Integrate the information from the added highlights.
+- Remove information that only came from the removed highlights.
+- Keep everything else from the existing summary.
+- Do not add external knowledge.
+- Use clear and professional language.
+
+**Existing Summary:**
+{previous_summary}
+
+**Added Highlights:**
+- {added_text}
+
+**Removed Highlights:**
+- {removed_text}
+
+**Output:**
+The complete updated summary:
+'''
+
+    @staticmethod
+    def estimate_tokens(text):
+        """Cheap token estimate (~4 characters per token for English text)"""
+        return len(text) // 4 + 1
+
+    def _chunk_texts(self, texts, overhead_tokens):
+        """
+        Greedily pack texts, in order, into chunks whose prompt fits the budget.
+        A single text larger than the budget is truncated to fit on its own.
+        """
+        budget = max(self.prompt_token_budget - overhead_tokens, 1)
+        chunks, current, current_tokens = [], [], 0
+        for text in texts:
+            tokens = self.estimate_tokens(text) + 1  # +1 for the list separator
+            if tokens > budget:
+                text = text[:budget * 4]
+                tokens = budget
+            if current and current_tokens + tokens > budget:
+                chunks.append(current)
+                current, current_tokens = [], 0
+            current.append(text)
+            current_tokens += tokens
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def _run_parallel(self, prompts, operation, json_mode=False, return_exceptions=False):
+        """
+        Run several completions with bounded concurrency, keeping their order.
+        With return_exceptions=True a failed call yields its LLMError instead of raising.
+        """
+        def call(prompt):
+            try:
+                return self._chat(prompt, json_mode=json_mode, operation=operation)
+            except LLMError as e:
+                if not return_exceptions:
+                    raise
+                return e
+
+        if len(prompts) == 1:
+            return [call(prompts[0])]
+        app = current_app._get_current_object() if has_app_context() else None
+
+        def run(prompt):
+            # Worker threads need an app context to coordinate through the lease table
+            if app is None:
+                return call(prompt)
+            with app.app_context():
+                return call(prompt)
+
+        with ThreadPoolExecutor(max_workers=min(self.map_concurrency, len(prompts))) as executor:
+            return list(executor.map(run, prompts))
+
+    def _prepare_summary_prompt(self, highlights, collection_title=None):
+        """
+        Return the prompt for the final summary call.
+        Collections that fit the context window use build_prompt directly. Larger
+        ones are map-reduced: highlights are packed into context-sized chunks,
+        each chunk is summarized in parallel, and partial summaries are merged
+        (in further parallel rounds if they still do not fit) into a reduce prompt.
+        Callers pass highlights already run through _deduplicate.
+        """
         prompt = self.build_prompt(highlights, collection_title)
-        headers = {
-            "Authorization": f"Bearer {GROQ_API_KEY}",
-            "Content-Type": "application/json",
-        }
+        if self.estimate_tokens(prompt) <= self.prompt_token_budget:
+            return prompt
+
+        texts = [getattr(h, 'text', str(h)) for h in highlights]
+        overhead = self.estimate_tokens(self.build_prompt([], collection_title))
+        chunks = self._chunk_texts(texts, overhead)
+        logger.info(f"Summarizing {len(texts)} highlights in {len(chunks)} chunks")
+        partials = self._run_parallel([self.build_prompt(chunk, collection_title) for chunk in chunks],
+                                      'summary_map')
+
+        reduce_overhead = self.estimate_tokens(self.build_reduce_prompt([], collection_title))
+        prompt = self.build_reduce_prompt(partials, collection_title)
+        for _ in range(MAX_REDUCE_ROUNDS):
+            if self.estimate_tokens(prompt) <= self.prompt_token_budget or len(partials) == 1:
+                break
+            chunks = self._chunk_texts(partials, reduce_overhead)
+            partials = self._run_parallel([self.build_reduce_prompt(chunk, collection_title) for chunk in chunks],
+                                          'summary_reduce')
+            prompt = self.build_reduce_prompt(partials, collection_title)
+        return prompt
+
+    def _deduplicate(self, highlights):
+        """Drop exact and near-duplicate highlights so they are not sent twice"""
+        if not self.dedup_enabled or len(highlights) < 2:
+            return highlights
+        result = deduplicate_highlights(highlights, self.dedup_threshold)
+        if result.removed:
+            logger.info(f"Removed {len(result.removed)} duplicate highlights, saving ~{result.tokens_saved} tokens")
+            self.telemetry.increment('dedup_highlights_removed', len(result.removed))
+            self.telemetry.increment('dedup_tokens_saved', result.tokens_saved)
+        return result.kept
+
+    def _build_payload(self, prompt, json_mode=False):
         payload = {
             "model": MODEL_NAME,
             "messages": [
                 {"role": "system", "content": "You are a helpful assistant."},
                 {"role": "user", "content": prompt}
             ],
-            "temperature": 0.2
+            "temperature": AI_TEMPERATURE
         }
+        if json_mode and self.json_mode:
+            # Constrains the provider to emit a single JSON object
+            payload["response_format"] = {"type": "json_object"}
+        return payload
+
+    def _chat(self, prompt, json_mode=False, operation='summary'):
+        """
+        Run one completion through the shared client. Raises LLMError on failure.
+        Identical payloads already in flight, in this or another worker, are
+        awaited instead of being sent upstream again.
+        """
+        payload = self._build_payload(prompt, json_mode)
+        if not self.single_flight:
+            return self._call_llm(payload, operation)
+        key = make_cache_key('chat', None, self.models, AI_TEMPERATURE, payload)
+        return self.single_flight.do(key, lambda: self._call_llm(payload, operation))
+
+    def _call_llm(self, payload, operation):
+        """Make one provider call and record its latency, token usage and retries"""
+        started = time.monotonic()
         try:
-            response = requests.post(GROQ_API_URL, headers=headers, json=payload, timeout=30)
-            if response.status_code == 200:
-                return response.json()["choices"][0]["message"]["content"].strip()
-            else:
-                logger.error(f"Groq API error: {response.status_code} {response.text}")
-                return self._generate_fallback_summary(highlights, collection_title)
-        except Exception as e:
-            logger.error(f"Groq API exception: {e}")
+            result = self.router.chat(payload)
+        except LLMError:
+            self.telemetry.record_llm_call(operation, MODEL_NAME, time.monotonic() - started, error=True)
+            raise
+        self.telemetry.record_llm_call(
+            operation,
+            result.model or MODEL_NAME,
+            result.latency,
+            prompt_tokens=result.usage.get('prompt_tokens', 0),
+            completion_tokens=result.usage.get('completion_tokens', 0),
+            retries=result.retries
+        )
+        return result.content
+
+    def _record(self, operation, source, started):
+        self.telemetry.record_request(operation, source, time.monotonic() - started)
+
+    def generate_summary_from_highlights(self, highlights, collection_title=None, use_cache=True):
+        """
+        Generate a summary from highlights using AI if available, otherwise fallback.
+        Pass use_cache=False to force a fresh completion (the result still refreshes the cache).
+        """
+        started = time.monotonic()
+        if not self.ai_available:
+            self._record('summary', SOURCE_FALLBACK, started)
             return self._generate_fallback_summary(highlights, collection_title)
+        cache_key = self._summary_cache_key(highlights)
+        if use_cache and self.cache:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self._record('summary', SOURCE_CACHE, started)
+                return cached
+        highlights = self._deduplicate(highlights)
+        try:
+            content = self._chat(self._prepare_summary_prompt(highlights, collection_title))
+        except LLMError as e:
+            logger.error(f"Groq API error: {e}")
+            self._record('summary', SOURCE_FALLBACK, started)
+            return self._generate_fallback_summary(highlights, collection_title)
+        if self.cache:
+            self.cache.set(cache_key, 'summary', content)
+        self._record('summary', SOURCE_AI, started)
+        return content
 
-    def generate_quiz_from_summary(self, summary, num_questions=4):
+    def update_summary_with_highlights(self, previous_summary, added_highlights, removed_highlights,
+                                       highlights, collection_title=None):
         """
-        Generate a quiz from a summary using AI if available, otherwise fallback.
-        Returns a dict: { 'title': str, 'questions': list of dicts }
+        Refresh an existing summary by sending only the changed highlights.
+        `highlights` is the full current set, used when the update prompt would not
+        fit the context or when falling back.
         """
+        started = time.monotonic()
         if not self.ai_available:
-            return self._generate_fallback_quiz(summary, num_questions)
-        prompt = self.build_quiz_prompt(summary)
-        headers = {
-            "Authorization": f"Bearer {GROQ_API_KEY}",
-            "Content-Type": "application/json",
-        }
-        payload = {
-            "model": MODEL_NAME,
-            "messages": [
-                {"role": "system", "content": "You are a helpful assistant."},
-                {"role": "user", "content": prompt}
-            ],
-            "temperature": 0.2
-        }
+            self._record('summary_update', SOURCE_FALLBACK, started)
+            return self._generate_fallback_summary(highlights, collection_title)
+        prompt = self.build_update_prompt(previous_summary, added_highlights, removed_highlights)
+        if self.estimate_tokens(prompt) > self.prompt_token_budget:
+            return self.generate_summary_from_highlights(highlights, collection_title)
         try:
-            response = requests.post(GROQ_API_URL, headers=headers, json=payload, timeout=30)
-            if response.status_code == 200:
-                ai_content = response.json()["choices"][0]["message"]["content"].strip()
-                # Try to parse the JSON array from the AI response
-                try:
-                    questions = json.loads(ai_content)
-                    if isinstance(questions, list):
-                        return {
-                            "title": "Quiz based on the summary",
-                            "questions": questions
-                        }
-                    else:
-                        logger.error("AI quiz response is not a list")
-                        return self._generate_fallback_quiz(summary, num_questions)
-                except Exception as e:
-                    logger.error(f"Failed to parse AI quiz JSON: {e}\nAI content: {ai_content}")
-                    return self._generate_fallback_quiz(summary, num_questions)
-            else:
-                logger.error(f"Groq API error: {response.status_code} {response.text}")
-                return self._generate_fallback_quiz(summary, num_questions)
-        except Exception as e:
-            logger.error(f"Groq API exception: {e}")
-            return self._generate_fallback_quiz(summary, num_questions)
+            content = self._chat(prompt, operation='summary_update')
+        except LLMError as e:
+            logger.error(f"Groq API error: {e}")
+            self._record('summary_update', SOURCE_FALLBACK, started)
+            return self._generate_fallback_summary(highlights, collection_title)
+        self._record('summary_update', SOURCE_AI, started)
+        return content
 
-    def _generate_fallback_summary(self, highlights, collection_title=None):
-        highlights_text = self._prepare_highlights_text(highlights)
-        summary = f"""
-        Summary of {collection_title or 'Study Collection'}
-        This is a comprehensive summary of the selected highlights from your study collection. 
-        The content covers important information that has been highlighted for your reference.
-        Key Points:
-        {highlights_text}
-        This summary provides an overview of the main concepts and ideas from your selected highlights. 
-        For more detailed analysis, consider reviewing the original source materials.
+    def stream_summary_from_highlights(self, highlights, collection_title=None, use_cache=True):
         """
-        return summary.strip()
-
-    def _generate_fallback_quiz(self, summary, num_questions=4):
-        questions = []
-        question_templates = [
-            {
-                "question": "What is the main topic of this summary?",
-                "options": {
-                    "A": "Study materials and learning",
-                    "B": "Technology and innovation", 
-                    "C": "Science and research",
-                    "D": "Education and development"
-                },
-                "correct_answer": "A"
-            },
-            {
-                "question": "How many key points are typically covered in a good summary?",
-                "options": {
-                    "A": "1-2 points",
-                    "B": "3-5 points",
-                    "C": "6-8 points", 
-                    "D": "9-10 points"
-                },
-                "correct_answer": "B"
-            },
-            {
-                "question": "What is the purpose of creating summaries?",
-                "options": {
-                    "A": "To make content longer",
-                    "B": "To simplify and organize information",
-                    "C": "To change the original meaning",
-                    "D": "To remove important details"
-                },
-                "correct_answer": "B"
-            },
-            {
-                "question": "Which of the following is NOT a characteristic of a good summary?",
-                "options": {
-                    "A": "Clear and concise",
-                    "B": "Accurate to the source",
-                    "C": "Includes all details",
-                    "D": "Well-organized"
-                },
-                "correct_answer": "C"
-            }
-        ]
-        for i in range(min(num_questions, len(question_templates))):
-            questions.append(question_templates[i])
-        return {
+        Generate a summary as a stream of text chunks.
+        Cached and fallback summaries are yielded as a single chunk. A failure
+        before the first token falls back; a failure mid-stream raises LLMError.
+        """
+        started = time.monotonic()
+        if not self.ai_available:
+            self._record('summary_stream', SOURCE_FALLBACK, started)
+            yield self._generate_fallback_summary(highlights, collection_title)
+            return
+        cache_key = self._summary_cache_key(highlights)
+        if use_cache and self.cache:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self._record('summary_stream', SOURCE_CACHE, started)
+                yield cached
+                return
+        highlights = self._deduplicate(highlights)
+        parts = []
+        prompt = None
+        try:
+            prompt = self._prepare_summary_prompt(highlights, collection_title)
+            call_started = time.monotonic()
+            for delta in self.router.stream_chat(self._build_payload(prompt)):
+                parts.append(delta)
+                yield delta
+        except LLMError as e:
+            logger.error(f"Groq API error: {e}")
+            if prompt is not None:
+                self.telemetry.record_llm_call('summary_stream', MODEL_NAME, time.monotonic() - call_started,
+                                               error=True)
+            if parts:
+                raise
+            self._record('summary_stream', SOURCE_FALLBACK, started)
+            yield self._generate_fallback_summary(highlights, collection_title)
+            return
+        content = ''.join(parts).strip()
+        # Streamed responses carry no usage block, so tokens are estimated
+        self.telemetry.record_llm_call('summary_stream', MODEL_NAME, time.monotonic() - call_started,
+                                       prompt_tokens=self.estimate_tokens(prompt),
+                                       completion_tokens=self.estimate_tokens(content))
+        self._record('summary_stream', SOURCE_AI, started)
+        if self.cache and content:
+            self.cache.set(cache_key, 'summary', content)
+
+    def generate_quiz_from_summary(self, summary, num_questions=4, use_cache=True, context_texts=()):
+        """
+        Generate a quiz from a summary using AI if available, otherwise fallback.
+        Pass use_cache=False to force a fresh completion (the result still refreshes the cache).
+        context_texts (the collection's highlights) supply distractors for the local fallback quiz.
+        Returns a dict: { 'title': str, 'questions': list of dicts }
+        """
+        started = time.monotonic()
+        if not self.ai_available:
+            self._record('quiz', SOURCE_FALLBACK, started)
+            return self._generate_fallback_quiz(summary, num_questions, context_texts)
+        cache_key = self._quiz_cache_key(summary, num_questions)
+        if use_cache and self.cache:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self._record('quiz', SOURCE_CACHE, started)
+                return cached
+        questions = self._generate_quiz_questions(summary, num_questions)
+        if not questions:
+            self._record('quiz', SOURCE_FALLBACK, started)
+            return self._generate_fallback_quiz(summary, num_questions, context_texts)
+        quiz_data = {
             "title": "Quiz based on the summary",
             "questions": questions
         }
+        if self.cache:
+            self.cache.set(cache_key, 'quiz', quiz_data)
+        self._record('quiz', SOURCE_AI, started)
+        return quiz_data
+
+    def generate_instant_summary(self, highlights, collection_title=None):
+        """Summarize locally with the extractive summarizer, without calling the AI"""
+        started = time.monotonic()
+        content = self._generate_fallback_summary(highlights, collection_title)
+        self._record('summary', SOURCE_LOCAL, started)
+        return content
+
+    def _generate_fallback_summary(self, highlights, collection_title=None):
+        # Deduplicating again is a no-op for highlights the AI path already deduplicated
+        highlights = self._deduplicate(highlights)
+        return extractive_summary.summarize_to_text([getattr(h, 'text', str(h)) for h in highlights])
+
+    def _parse_quiz_completion(self, ai_content):
+        """Valid questions of one quiz completion, or None when nothing could be parsed"""
+        try:
+            questions, dropped, repaired = parse_quiz_questions(ai_content)
+        except QuizParseError as e:
+            quiz_parse_stats.record(0)
+            logger.error(f"Failed to parse AI quiz JSON: {e}\nAI content: {ai_content}")
+            return None
+        quiz_parse_stats.record(len(questions), dropped, repaired)
+        if dropped:
+            logger.warning(f"Dropped {dropped} invalid AI quiz questions")
+        if not questions:
+            logger.error(f"AI quiz response has no valid questions\nAI content: {ai_content}")
+        return questions
+
+    def _generate_quiz_questions(self, summary, num_questions):
+        """
+        Ask for the questions in parallel shards of at most AI_QUIZ_SHARD_SIZE,
+        each focused on its own section of the summary, then merge them while
+        dropping questions that repeat one from another shard. A shortfall is
+        made up by one more call that lists the questions already asked.
+        Returns the questions, or an empty list when every call failed.
+        """
+        counts = self.plan_quiz_shards(num_questions)
+        sections = self.split_sections(summary, len(counts))
+        # Each shard asks for one extra question to make up for duplicates across shards
+        extra = 1 if len(counts) > 1 else 0
+        prompts = [self.build_quiz_prompt(summary, count + extra, section)
+                   for count, section in zip(counts, sections)]
+        if len(prompts) > 1:
+            logger.info(f"Generating {num_questions} quiz questions in {len(prompts)} parallel calls")
+
+        question_sets = []
+        for result in self._run_parallel(prompts, 'quiz', json_mode=True, return_exceptions=True):
+            if isinstance(result, LLMError):
+                logger.error(f"Groq API error: {result}")
+                continue
+            questions = self._parse_quiz_completion(result)
+            if questions:
+                question_sets.append(questions)
+        if not question_sets:
+            return []
+
+        questions, duplicates = merge_question_sets(question_sets, num_questions)
+        missing = num_questions - len(questions)
+        if missing > 0:
+            prompt = self.build_quiz_prompt(summary, missing, avoid=[q['question'] for q in questions])
+            try:
+                top_up = self._parse_quiz_completion(self._chat(prompt, json_mode=True, operation='quiz'))
+            except LLMError as e:
+                logger.error(f"Groq API error: {e}")
+                top_up = None
+            if top_up:
+                questions, more_duplicates = merge_question_sets([questions, top_up], num_questions)
+                duplicates += more_duplicates
+        if duplicates:
+            self.telemetry.increment('quiz_duplicate_questions', duplicates)
+        return questions
+
+    def generate_instant_quiz(self, summary, num_questions=4, context_texts=()):
+        """Build a quiz locally from the summary's key sentences and terms, without calling the AI"""
+        started = time.monotonic()
+        quiz_data = self._generate_fallback_quiz(summary, num_questions, context_texts)
+        self._record('quiz', SOURCE_LOCAL, started)
+        return quiz_data
 
-    def _prepare_highlights_text(self, highlights):
-        if not highlights:
-            return "No highlights provided."
-        highlights_text = ""
-        for i, highlight in enumerate(highlights, 1):
-            highlights_text += f"{i}. {getattr(highlight, 'text', str(highlight))}\n"
-            if hasattr(highlight, 'url') and highlight.url:
-                highlights_text += f"   Source: {highlight.url}\n"
-            highlights_text += "\n"
-        return highlights_text
+    def _generate_fallback_quiz(self, summary, num_questions=4, context_texts=()):
+        return local_quiz.generate_quiz(summary, num_questions, context_texts)
 
     def test_connection(self):
-        return self.ai_available
+        # While the circuit is open every call goes straight to the fallback path
+        return self.ai_available and self.router.circuit_state() != CircuitBreaker.OPEN
 
     def get_status(self):
         return {
             "ai_available": self.ai_available,
-            "model": MODEL_NAME if self.ai_available else None
-        } 
-    def generate_quiz(self, summary):
-        if not self.ai_available:
-            return self._generate_fallback_summary(highlights, collection_title)
-        prompt = self.build_quiz_prompt(summary)
-        headers = {
-            "Authorization": f"Bearer {GROQ_API_KEY}",
-            "Content-Type": "application/json",
-        }
-        payload = {
-            "model": MODEL_NAME,
-            "messages": [
-                {"role": "system", "content": "You are a helpful assistant."},
-                {"role": "user", "content": prompt}
-            ],
-            "temperature": 0.2
+            "api_key_configured": self.ai_available,
+            "model": MODEL_NAME if self.ai_available else None,
+            "circuit_state": self.router.circuit_state() if self.router else None,
+            "routing": self.router.get_stats() if self.router else None,
+            "quiz_parse": quiz_parse_stats.snapshot(),
+            "single_flight": self.single_flight.get_stats() if self.single_flight else None,
+            "rate_limit": get_rate_limiter().get_stats() if get_rate_limiter() else None,
+            "telemetry": self.telemetry.summary()
         }
-        try:
-            response = requests.post(GROQ_API_URL, headers=headers, json=payload, timeout=30)
-            if response.status_code == 200:
-                return response.json()["choices"][0]["message"]["content"].strip()
-            else:
-                logger.error(f"Groq API error: {response.status_code} {response.text}")
-                return self._generate_fallback_quiz(summary)
-        except Exception as e:
-            logger.error(f"Groq API exception: {e}")
-            return self._generate_fallback_quiz(summary)
\ No newline at end of file
+
+    def get_prometheus_metrics(self):
+        """Telemetry counters plus circuit and quiz parse state in the Prometheus text format"""
+        circuit_state = self.router.circuit_state() if self.router else None
+        parse = quiz_parse_stats.snapshot()
+        lines = [
+            '# HELP studyaid_ai_available Whether an AI provider is configured.',
+            '# TYPE studyaid_ai_available gauge',
+            f'studyaid_ai_available {int(self.ai_available)}',
+            '# HELP studyaid_ai_circuit_open Whether the LLM circuit breaker is open.',
+            '# TYPE studyaid_ai_circuit_open gauge',
+            f'studyaid_ai_circuit_open {int(circuit_state == CircuitBreaker.OPEN)}',
+            '# HELP studyaid_ai_quiz_parse_total Quiz completions by parse outcome.',
+            '# TYPE studyaid_ai_quiz_parse_total counter'
+        ]
+        for outcome in ('clean', 'repaired', 'failed'):
+            lines.append(f'studyaid_ai_quiz_parse_total{{outcome="{outcome}"}} {parse[outcome]}')
+        return self.telemetry.prometheus() + '\n'.join(lines) + '\n'
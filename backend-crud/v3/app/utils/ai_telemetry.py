@@ -0,0 +1,186 @@
+import math
+import threading
+import time
+from collections import deque
+from flask import current_app, has_app_context
+
+SOURCE_AI = 'ai'
+SOURCE_CACHE = 'cache'
+SOURCE_FALLBACK = 'fallback'
+SOURCE_LOCAL = 'local'  # Requested instant results from the local generators
+
+# Upper bounds (seconds) of the cumulative latency histogram in the Prometheus export
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(fraction * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+class AITelemetry:
+    """
+    In-process telemetry for AI usage.
+    Two kinds of events are recorded: requests (one per summary or quiz the
+    app asked for, served by the AI, the cache, the fallback or locally) and LLM calls
+    (one per provider call, with latency, token usage and retries). Rolling
+    aggregates are computed over the last `window` seconds; the Prometheus
+    export uses cumulative counters since the process started.
+    """
+    def __init__(self, window=900, max_events=10000):
+        self.window = window
+        self.requests = deque(maxlen=max_events)
+        self.calls = deque(maxlen=max_events)
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+        self.request_totals = {}   # (operation, source) -> count
+        self.call_totals = {}      # (operation, model) -> dict of counters
+        self.histograms = {}       # operation -> [count per bucket..., +Inf count]
+        self.counters = {}         # name -> cumulative total
+
+    def record_request(self, operation, source, latency):
+        with self.lock:
+            self.requests.append((time.time(), operation, source, latency))
+            key = (operation, source)
+            self.request_totals[key] = self.request_totals.get(key, 0) + 1
+
+    def record_llm_call(self, operation, model, latency, prompt_tokens=0, completion_tokens=0,
+                        retries=0, error=False):
+        with self.lock:
+            self.calls.append((time.time(), operation, model, latency, prompt_tokens,
+                               completion_tokens, retries, error))
+            totals = self.call_totals.setdefault((operation, model), {
+                'calls': 0, 'errors': 0, 'retries': 0, 'prompt_tokens': 0,
+                'completion_tokens': 0, 'latency_sum': 0.0
+            })
+            totals['calls'] += 1
+            totals['errors'] += int(error)
+            totals['retries'] += retries
+            totals['prompt_tokens'] += prompt_tokens
+            totals['completion_tokens'] += completion_tokens
+            totals['latency_sum'] += latency
+            histogram = self.histograms.setdefault(operation, [0] * (len(LATENCY_BUCKETS) + 1))
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if latency <= bound:
+                    histogram[i] += 1
+            histogram[-1] += 1
+
+    def increment(self, name, amount=1):
+        """Add to a named cumulative counter, exported as studyaid_ai_<name>_total"""
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def summary(self):
+        """Rolling aggregates per operation over the telemetry window"""
+        cutoff = time.time() - self.window
+        with self.lock:
+            requests = [r for r in self.requests if r[0] >= cutoff]
+            calls = [c for c in self.calls if c[0] >= cutoff]
+            counters = dict(self.counters)
+
+        request_stats = {}
+        for operation in sorted({r[1] for r in requests}):
+            events = [r for r in requests if r[1] == operation]
+            latencies = sorted(r[3] for r in events)
+            counts = {source: sum(1 for r in events if r[2] == source)
+                      for source in (SOURCE_AI, SOURCE_CACHE, SOURCE_FALLBACK, SOURCE_LOCAL)}
+            request_stats[operation] = {
+                "count": len(events),
+                **counts,
+                "cache_hit_rate": round(counts[SOURCE_CACHE] / len(events), 4),
+                "fallback_rate": round(counts[SOURCE_FALLBACK] / len(events), 4),
+                "latency_p50": percentile(latencies, 0.50),
+                "latency_p95": percentile(latencies, 0.95),
+                "latency_p99": percentile(latencies, 0.99)
+            }
+
+        call_stats = {}
+        minutes = min(self.window, max(time.time() - self.started_at, 60)) / 60.0
+        for operation in sorted({c[1] for c in calls}):
+            events = [c for c in calls if c[1] == operation]
+            latencies = sorted(c[3] for c in events)
+            prompt_tokens = sum(c[4] for c in events)
+            completion_tokens = sum(c[5] for c in events)
+            call_stats[operation] = {
+                "count": len(events),
+                "errors": sum(1 for c in events if c[7]),
+                "retries": sum(c[6] for c in events),
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "tokens_per_minute": round((prompt_tokens + completion_tokens) / minutes, 1),
+                "latency_p50": percentile(latencies, 0.50),
+                "latency_p95": percentile(latencies, 0.95),
+                "latency_p99": percentile(latencies, 0.99)
+            }
+
+        return {
+            "window_seconds": self.window,
+            "requests": request_stats,
+            "llm_calls": call_stats,
+            "llm_calls_per_minute": round(len(calls) / minutes, 2),
+            "counters": counters
+        }
+
+    def prometheus(self):
+        """Cumulative counters and latency histograms in the Prometheus text format"""
+        with self.lock:
+            request_totals = dict(self.request_totals)
+            call_totals = {key: dict(value) for key, value in self.call_totals.items()}
+            histograms = {key: list(value) for key, value in self.histograms.items()}
+            counters = dict(self.counters)
+
+        lines = [
+            '# HELP studyaid_ai_requests_total Summaries and quizzes requested, by how they were served.',
+            '# TYPE studyaid_ai_requests_total counter'
+        ]
+        for (operation, source), count in sorted(request_totals.items()):
+            lines.append(f'studyaid_ai_requests_total{{operation="{operation}",source="{source}"}} {count}')
+
+        for name, field, help_text in (
+            ('studyaid_ai_llm_calls_total', 'calls', 'Calls made to the LLM provider.'),
+            ('studyaid_ai_llm_errors_total', 'errors', 'LLM provider calls that failed after retries.'),
+            ('studyaid_ai_llm_retries_total', 'retries', 'Retried LLM provider attempts.')
+        ):
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+            for (operation, model), totals in sorted(call_totals.items()):
+                lines.append(f'{name}{{operation="{operation}",model="{model}"}} {totals[field]}')
+
+        lines += [
+            '# HELP studyaid_ai_llm_tokens_total Tokens reported by the provider.',
+            '# TYPE studyaid_ai_llm_tokens_total counter'
+        ]
+        for (operation, model), totals in sorted(call_totals.items()):
+            for kind in ('prompt', 'completion'):
+                lines.append(f'studyaid_ai_llm_tokens_total{{operation="{operation}",model="{model}",'
+                             f'type="{kind}"}} {totals[kind + "_tokens"]}')
+
+        lines += [
+            '# HELP studyaid_ai_llm_latency_seconds Latency of LLM provider calls, including retries.',
+            '# TYPE studyaid_ai_llm_latency_seconds histogram'
+        ]
+        for operation, histogram in sorted(histograms.items()):
+            for bound, count in zip(LATENCY_BUCKETS, histogram):
+                lines.append(f'studyaid_ai_llm_latency_seconds_bucket{{operation="{operation}",le="{bound}"}} {count}')
+            lines.append(f'studyaid_ai_llm_latency_seconds_bucket{{operation="{operation}",le="+Inf"}} {histogram[-1]}')
+            latency_sum = sum(t['latency_sum'] for (op, _), t in call_totals.items() if op == operation)
+            lines.append(f'studyaid_ai_llm_latency_seconds_sum{{operation="{operation}"}} {latency_sum:.6f}')
+            lines.append(f'studyaid_ai_llm_latency_seconds_count{{operation="{operation}"}} {histogram[-1]}')
+        for name, value in sorted(counters.items()):
+            lines += [f'# TYPE studyaid_ai_{name}_total counter', f'studyaid_ai_{name}_total {value}']
+        return '\n'.join(lines) + '\n'
+
+_ai_telemetry = None
+_ai_telemetry_lock = threading.Lock()
+
+def get_ai_telemetry():
+    """Return the process-wide AI telemetry collector"""
+    global _ai_telemetry
+    with _ai_telemetry_lock:
+        if _ai_telemetry is None:
+            config = current_app.config if has_app_context() else {}
+            _ai_telemetry = AITelemetry(
+                window=config.get('AI_TELEMETRY_WINDOW', 900),
+                max_events=config.get('AI_TELEMETRY_MAX_EVENTS', 10000)
+            )
+    return _ai_telemetry
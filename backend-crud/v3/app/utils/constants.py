@@ -1,44 +0,0 @@
-STATIC_SUMMARY_TEXT = "This is a static summary of the selected highlights from the collection."
-
-STATIC_QUIZ_QUESTIONS = [
-    {
-        "question": "What is the Pythagorean theorem?",
-        "options": {
-            "A": "a² + b² = c²",
-            "B": "a + b = c",
-            "C": "a² - b² = c²",
-            "D": "a × b = c"
-        },
-        "correct_answer": "A"
-    },
-    {
-        "question": "What is the quadratic formula?",
-        "options": {
-            "A": "x = [-b ± √(b² - 4ac)] / 2a",
-            "B": "x = b ± √(b² - 4ac)",
-            "C": "x = [-b ± √(b² + 4ac)] / 2a",
-            "D": "x = b ± √(b² + 4ac)"
-        },
-        "correct_answer": "A"
-    },
-    {
-        "question": "What is the value of π (pi) to two decimal places?",
-        "options": {
-            "A": "3.14",
-            "B": "3.16",
-            "C": "3.12",
-            "D": "3.18"
-        },
-        "correct_answer": "A"
-    },
-    {
-        "question": "What is the derivative of x²?",
-        "options": {
-            "A": "2x",
-            "B": "x²",
-            "C": "2",
-            "D": "x"
-        },
-        "correct_answer": "A"
-    }
-]
\ No newline at end of file
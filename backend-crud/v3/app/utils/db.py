@@ -1 +1,45 @@
-from app import db
\ No newline at end of file
+from app import db
+from flask import has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+WROTE = 'wrote'  # Session.info flag: the open transaction has flushed changes
+PENDING_WRITES = 'pending_writes'  # Session.info list of writes waiting for the transaction to end
+
+def holds_write_lock():
+    """
+    Whether the current session's transaction has written to a SQLite database.
+    SQLite locks the whole database for that transaction, so any other
+    connection that writes would wait on it until it commits or rolls back.
+    """
+    if not has_app_context():
+        return False
+    session = db.session()
+    return bool(session.info.get(WROTE)) and db.engine.dialect.name == 'sqlite'
+
+def after_transaction(write):
+    """Run `write` (which uses its own connection) now, or once the session's write lock is released"""
+    if not has_app_context():
+        return
+    if not holds_write_lock():
+        write()
+        return
+    db.session().info.setdefault(PENDING_WRITES, []).append(write)
+
+@event.listens_for(Session, 'after_flush')
+def _mark_written(session, flush_context):
+    session.info[WROTE] = True
+
+@event.listens_for(Session, 'do_orm_execute')
+def _mark_statement_written(orm_execute_state):
+    # Bulk insert/update/delete statements run through Session.execute, not flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info[WROTE] = True
+
+@event.listens_for(Session, 'after_transaction_end')
+def _run_pending_writes(session, transaction):
+    # Commit, rollback and close all end the transaction and release its locks
+    if transaction.parent is None:
+        session.info.pop(WROTE, None)
+        for write in session.info.pop(PENDING_WRITES, []):
+            write()
@@ -0,0 +1,147 @@
+import re
+import zlib
+from functools import lru_cache
+import numpy as np
+
+SHINGLE_SIZE = 5  # Words per shingle
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 32  # 32 bands of 2 rows: pairs sharing ~20% of their shingles become candidates
+MERSENNE_PRIME = (1 << 31) - 1
+
+_rng = np.random.RandomState(20240601)  # Fixed seed so signatures are stable across processes
+_PERM_A = _rng.randint(1, MERSENNE_PRIME, size=NUM_PERMUTATIONS, dtype=np.int64).astype(np.uint64)
+_PERM_B = _rng.randint(0, MERSENNE_PRIME, size=NUM_PERMUTATIONS, dtype=np.int64).astype(np.uint64)
+
+def _words(text):
+    return re.findall(r'\w+', str(text or '').lower())
+
+@lru_cache(maxsize=65536)
+def _word_hash(word):
+    return zlib.crc32(word.encode('utf-8'))
+
+def shingle_hashes(word_lists, size=SHINGLE_SIZE):
+    """
+    32-bit hashes of the overlapping word k-grams of many texts at once.
+    Returns (hashes, offsets): the shingles of text i are hashes[offsets[i]:offsets[i + 1]].
+    Texts shorter than `size` words get a single shingle of all their words.
+    """
+    word_lists = [words or [''] for words in word_lists]
+    lengths = np.array([len(words) for words in word_lists], dtype=np.int64)
+    ids = np.fromiter((_word_hash(w) for words in word_lists for w in words),
+                      dtype=np.uint64, count=int(lengths.sum()))
+    windows = np.minimum(lengths, size)
+    counts = lengths - windows + 1
+    offsets = np.r_[0, np.cumsum(counts)]
+    word_starts = np.r_[0, np.cumsum(lengths)[:-1]]
+
+    owner = np.repeat(np.arange(len(word_lists)), counts)
+    first_word = word_starts[owner] + (np.arange(offsets[-1]) - offsets[:-1][owner])
+    window = windows[owner]
+    # Polynomial hash over each window of word hashes, for every shingle of every text together
+    hashes = np.zeros(offsets[-1], dtype=np.uint64)
+    for offset in range(size):
+        active = offset < window
+        word = ids[np.minimum(first_word + offset, len(ids) - 1)]
+        hashes = np.where(active, (hashes * np.uint64(1000003) + word) & np.uint64(0xFFFFFFFF), hashes)
+    return hashes, offsets
+
+def minhash_signatures(hashes, offsets):
+    """MinHash signature per text: the minimum of each random hash permutation over its shingles"""
+    signatures = np.empty((len(offsets) - 1, NUM_PERMUTATIONS), dtype=np.uint64)
+    for k in range(NUM_PERMUTATIONS):
+        permuted = (_PERM_A[k] * hashes + _PERM_B[k]) % np.uint64(MERSENNE_PRIME)
+        signatures[:, k] = np.minimum.reduceat(permuted, offsets[:-1])
+    return signatures
+
+class DedupResult:
+    """Outcome of near-duplicate removal"""
+    def __init__(self, kept, removed, tokens_saved):
+        self.kept = kept
+        self.removed = removed
+        self.tokens_saved = tokens_saved
+
+    def __repr__(self):
+        return f"<DedupResult kept={len(self.kept)} removed={len(self.removed)} tokens_saved={self.tokens_saved}>"
+
+def _find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+def deduplicate_highlights(highlights, threshold=0.8):
+    """
+    Collapse exact and near-duplicate highlights before prompt construction.
+    Candidate pairs come from MinHash LSH over word shingles and are confirmed
+    with exact shingle overlap: two highlights are duplicates when their
+    Jaccard similarity, or the share of the shorter one contained in the
+    longer one, reaches `threshold`. Each group keeps its longest highlight,
+    in the original order. Highlights may be models with a `text` attribute or strings.
+    """
+    texts = [str(getattr(h, 'text', h) or '') for h in highlights]
+    word_lists = [_words(text) for text in texts]
+    n = len(texts)
+    parent = list(range(n))
+
+    # Exact duplicates after normalization never need MinHash
+    first_seen = {}
+    unique = []
+    for i, words in enumerate(word_lists):
+        key = ' '.join(words)
+        if key in first_seen:
+            parent[i] = first_seen[key]
+        else:
+            first_seen[key] = i
+            unique.append(i)
+
+    if len(unique) > 1:
+        hashes, offsets = shingle_hashes([word_lists[i] for i in unique])
+        signatures = minhash_signatures(hashes, offsets)
+        position_of = {i: position for position, i in enumerate(unique)}
+        shingles = {}
+
+        def shingle_set(i):
+            if i not in shingles:
+                position = position_of[i]
+                shingles[i] = np.unique(hashes[offsets[position]:offsets[position + 1]])
+            return shingles[i]
+
+        rows = NUM_PERMUTATIONS // LSH_BANDS
+        candidates = set()
+        for band in range(LSH_BANDS):
+            band_values = signatures[:, band * rows:(band + 1) * rows]
+            keys = band_values[:, 0].copy()
+            for column in range(1, rows):
+                keys = keys * np.uint64(MERSENNE_PRIME) + band_values[:, column]
+            # Sort the band keys so equal keys (shared buckets) are adjacent
+            order = np.argsort(keys, kind='stable')
+            sorted_keys = keys[order]
+            starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+            ends = np.r_[starts[1:], len(sorted_keys)]
+            for start, end in zip(starts[ends - starts > 1], ends[ends - starts > 1]):
+                members = [unique[p] for p in order[start:end]]
+                for a in range(len(members)):
+                    for b in range(a + 1, len(members)):
+                        candidates.add((members[a], members[b]))
+
+        for i, j in candidates:
+            a, b = shingle_set(i), shingle_set(j)
+            overlap = len(np.intersect1d(a, b, assume_unique=True))
+            if not overlap:
+                continue
+            jaccard = overlap / (len(a) + len(b) - overlap)
+            smaller = min(len(a), len(b))
+            if jaccard >= threshold or overlap / smaller >= threshold:
+                root_i, root_j = _find(parent, i), _find(parent, j)
+                if root_i != root_j:
+                    parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    groups = {}
+    for i in range(n):
+        groups.setdefault(_find(parent, i), []).append(i)
+    keep = sorted(max(members, key=lambda i: (len(texts[i]), -i)) for members in groups.values())
+    keep_set = set(keep)
+    removed = [highlights[i] for i in range(n) if i not in keep_set]
+    # Same estimate as AIService.estimate_tokens, plus the list separator
+    tokens_saved = sum(len(texts[i]) // 4 + 2 for i in range(n) if i not in keep_set)
+    return DedupResult([highlights[i] for i in keep], removed, tokens_saved)
@@ -0,0 +1,168 @@
+import math
+import re
+import numpy as np
+
+MAX_SENTENCES = 1500  # Sentences ranked with TextRank; larger inputs are pre-filtered by centroid similarity
+MAX_VOCABULARY = 4096  # Most widespread terms kept in the TF-IDF vectors
+DAMPING = 0.85
+MMR_LAMBDA = 0.5  # Relevance vs. novelty trade-off when picking sentences
+MAX_SIMILARITY = 0.8  # Sentences this similar to one already picked are never picked
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being below
+between both but by can could did do does doing down during each few for from further had has have having
+he her here hers herself him himself his how i if in into is it its itself just me more most my myself no
+nor not now of off on once only or other our ours ourselves out over own same she should so some such than
+that the their theirs them themselves then there these they this those through to too under until up very
+was we were what when where which while who whom why will with would you your yours yourself yourselves
+""".split())
+
+_SENTENCE_RE = re.compile(r'(?<=[.!?])\s+|\n+')
+_WORD_RE = re.compile(r'[a-z0-9][a-z0-9\'-]*')
+
+def split_sentences(text):
+    """Split text into trimmed sentences, dropping fragments too short to carry content"""
+    sentences = []
+    for part in _SENTENCE_RE.split(str(text or '')):
+        part = re.sub(r'\s+', ' ', part).strip(' -•*\t')
+        if len(part.split()) >= 4:
+            sentences.append(part)
+    return sentences
+
+def _terms(sentence):
+    return [w for w in _WORD_RE.findall(sentence.lower()) if w not in STOPWORDS and len(w) > 2]
+
+def sparse_tfidf(sentences):
+    """
+    L2-normalized TF-IDF weights over the most widespread terms, as the nonzero
+    entries only: (rows, columns, weights, vocabulary size). Memory grows with
+    the number of words, not with sentences times vocabulary.
+    """
+    vocabulary = {}
+    rows, columns = [], []
+    for row, sentence in enumerate(sentences):
+        for term in _terms(sentence):
+            rows.append(row)
+            columns.append(vocabulary.setdefault(term, len(vocabulary)))
+    n, v = len(sentences), len(vocabulary)
+    if not v:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0, dtype=np.float32), 1
+
+    # One entry per (sentence, term) with its count
+    pairs, counts = np.unique(np.asarray(rows, dtype=np.int64) * v + np.asarray(columns, dtype=np.int64),
+                              return_counts=True)
+    rows, columns = pairs // v, pairs % v
+    document_frequency = np.bincount(columns, minlength=v)
+    if v > MAX_VOCABULARY:
+        keep = np.argsort(-document_frequency, kind='stable')[:MAX_VOCABULARY]
+        remap = np.full(v, -1, dtype=np.int64)
+        remap[keep] = np.arange(len(keep))
+        mask = remap[columns] >= 0
+        rows, columns, counts = rows[mask], remap[columns[mask]], counts[mask]
+        document_frequency = document_frequency[keep]
+        v = len(keep)
+
+    idf = np.log((1.0 + n) / (1.0 + document_frequency)).astype(np.float32) + 1.0
+    weights = np.log1p(counts.astype(np.float32)) * idf[columns]
+    norms = np.sqrt(np.bincount(rows, weights=weights * weights, minlength=n)).astype(np.float32)
+    weights /= np.where(norms == 0, 1.0, norms)[rows]
+    return rows, columns, weights, v
+
+def dense_rows(tfidf, n, selected=None):
+    """Dense float32 matrix of the `selected` rows (all `n` by default) of a sparse_tfidf result"""
+    rows, columns, weights, v = tfidf
+    if selected is None:
+        selected = np.arange(n)
+    position = np.full(n, -1, dtype=np.int64)
+    position[selected] = np.arange(len(selected))
+    mask = position[rows] >= 0
+    matrix = np.zeros((len(selected), v), dtype=np.float32)
+    matrix[position[rows[mask]], columns[mask]] = weights[mask]
+    return matrix
+
+def central_rows(tfidf, n, count):
+    """Indices, in order, of the `count` rows most similar to the centroid of all `n` rows"""
+    rows, columns, weights, v = tfidf
+    centroid = np.bincount(columns, weights=weights, minlength=v) / n
+    similarity = np.bincount(rows, weights=weights * centroid[columns], minlength=n)
+    return np.sort(np.argsort(-similarity, kind='stable')[:count])
+
+def tfidf_matrix(sentences):
+    """L2-normalized TF-IDF rows (float32), one per sentence, over the most widespread terms"""
+    return dense_rows(sparse_tfidf(sentences), len(sentences))
+
+def textrank_scores(similarity, iterations=50, tolerance=1e-6):
+    """PageRank over the sentence similarity graph, by power iteration"""
+    n = similarity.shape[0]
+    weights = similarity.copy()
+    np.fill_diagonal(weights, 0.0)
+    out_weight = weights.sum(axis=1, keepdims=True)
+    # Sentences sharing no terms with any other keep uniform outgoing weight
+    transition = np.where(out_weight > 0, weights / np.where(out_weight == 0, 1.0, out_weight), 1.0 / n)
+    scores = np.full(n, 1.0 / n, dtype=np.float32)
+    for _ in range(iterations):
+        updated = (1 - DAMPING) / n + DAMPING * (transition.T @ scores)
+        if np.abs(updated - scores).sum() < tolerance:
+            return updated
+        scores = updated
+    return scores
+
+def mmr_select(scores, similarity, count, trade_off=MMR_LAMBDA, max_similarity=MAX_SIMILARITY):
+    """
+    Maximal marginal relevance: greedily pick high-scoring sentences unlike those already picked.
+    Sentences more similar than `max_similarity` to a picked one are skipped,
+    so fewer than `count` may be returned.
+    """
+    relevance = scores / scores.max() if scores.max() > 0 else scores
+    selected = []
+    redundancy = np.zeros(len(scores), dtype=np.float32)
+    available = np.ones(len(scores), dtype=bool)
+    for _ in range(min(count, len(scores))):
+        eligible = available & (redundancy <= max_similarity)
+        if not eligible.any():
+            break
+        gain = np.where(eligible, trade_off * relevance - (1 - trade_off) * redundancy, -np.inf)
+        best = int(np.argmax(gain))
+        selected.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, similarity[best])
+    return selected
+
+def summarize(texts, max_sentences=10, ratio=0.2):
+    """
+    Extractive summary of the given texts, in milliseconds and without a network call.
+    Sentences are embedded as TF-IDF vectors, ranked by TextRank centrality
+    and picked with MMR so the summary covers different points; the picked
+    sentences are returned in their original order. Returns a list of sentences.
+    """
+    sentences, seen = [], set()
+    for text in texts:
+        for sentence in split_sentences(text):
+            key = sentence.lower()
+            if key not in seen:
+                seen.add(key)
+                sentences.append(sentence)
+    if len(sentences) <= 3:
+        return sentences
+
+    tfidf = sparse_tfidf(sentences)
+    candidates = np.arange(len(sentences))
+    if len(sentences) > MAX_SENTENCES:
+        # TextRank is quadratic, so keep the sentences closest to the collection's centroid.
+        # The filter runs on the sparse weights; only the kept sentences are made dense
+        candidates = central_rows(tfidf, len(sentences), MAX_SENTENCES)
+    matrix = dense_rows(tfidf, len(sentences), candidates)
+
+    similarity = matrix @ matrix.T
+    scores = textrank_scores(similarity)
+    count = min(max_sentences, max(3, math.ceil(ratio * len(candidates))))
+    picked = sorted(mmr_select(scores, similarity, count))
+    return [sentences[candidates[i]] for i in picked]
+
+def summarize_to_text(texts, max_sentences=10):
+    """summarize() joined into one paragraph; texts too short to split into sentences are kept as they are"""
+    sentences = summarize(texts, max_sentences)
+    if sentences:
+        return " ".join(sentences)
+    return "\n".join(t.strip() for t in texts if t and t.strip()) or "No highlights provided."
@@ -0,0 +1,73 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from app.utils.db import db
+
+logger = logging.getLogger(__name__)
+
+class JobQueueFull(Exception):
+    """Raised when the worker pool already has the maximum number of pending jobs"""
+    pass
+
+class JobQueue:
+    """
+    Bounded background worker pool for slow AI work.
+    Jobs run inside an application context so they can use the database,
+    and the number of queued + running jobs is capped so a burst of requests
+    cannot pile up unbounded work behind the request workers.
+    """
+    def __init__(self, max_workers=4, max_pending=100):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ai-job')
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.events = {}
+        self.lock = threading.Lock()
+
+    def submit(self, job_id, fn, *args, **kwargs):
+        if not self.slots.acquire(blocking=False):
+            raise JobQueueFull("Too many pending AI jobs, please retry later")
+
+        app = current_app._get_current_object()
+        with self.lock:
+            self.events[job_id] = threading.Event()
+
+        def run():
+            try:
+                with app.app_context():
+                    try:
+                        fn(*args, **kwargs)
+                    except Exception as e:
+                        logger.error(f"Background job {job_id} failed: {e}")
+                    finally:
+                        db.session.remove()
+            finally:
+                self.slots.release()
+                with self.lock:
+                    event = self.events.pop(job_id, None)
+                if event:
+                    event.set()
+
+        return self.executor.submit(run)
+
+    def wait(self, job_id, timeout):
+        """Wait for a job running in this process. Returns False if the job is not known here."""
+        with self.lock:
+            event = self.events.get(job_id)
+        if event is None:
+            return False
+        event.wait(timeout)
+        return True
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+def get_job_queue():
+    """Return the process-wide job queue, creating it from the app config on first use"""
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue(
+                max_workers=current_app.config.get('AI_JOB_WORKERS', 4),
+                max_pending=current_app.config.get('AI_JOB_MAX_PENDING', 100)
+            )
+    return _job_queue
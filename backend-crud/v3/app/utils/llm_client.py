@@ -0,0 +1,338 @@
+import email.utils
+import json
+import logging
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from flask import current_app, has_app_context
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+class LLMError(Exception):
+    """Raised when a chat completion could not be obtained"""
+    pass
+
+class CircuitOpenError(LLMError):
+    """Raised without calling the provider while the circuit breaker is open"""
+    pass
+
+class LLMCancelled(LLMError):
+    """Raised when a call was cancelled because another request already answered"""
+    pass
+
+class ChatResult:
+    """A finished chat completion"""
+    def __init__(self, content, model=None, usage=None, retries=0, latency=0.0, provider=None):
+        self.content = content
+        self.model = model
+        self.usage = usage or {}
+        self.retries = retries
+        self.latency = latency
+        self.provider = provider
+
+    def __repr__(self):
+        return f"<ChatResult {self.model} retries={self.retries} latency={self.latency:.2f}s>"
+
+class CircuitBreaker:
+    """
+    Classic three-state breaker.
+    After failure_threshold consecutive failures the circuit opens and every
+    call is rejected for reset_timeout seconds. Then a single trial call is let
+    through (half-open): success closes the circuit, failure opens it again.
+    allow() hands out a permit; only the permit of the trial call can give
+    the trial slot back through release().
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    PERMIT = 'permit'  # Permit of an ordinary call while the circuit is closed
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial = None  # Permit of the half-open trial call in flight
+        self.lock = threading.Lock()
+
+    @property
+    def trial_in_flight(self):
+        return self.trial is not None
+
+    def allow(self):
+        """Return a permit for one call, or None while the circuit rejects calls"""
+        with self.lock:
+            if self.state == self.CLOSED:
+                return self.PERMIT
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self.trial = None
+            if self.state == self.HALF_OPEN and self.trial is None:
+                self.trial = object()
+                return self.trial
+            return None
+
+    def record_success(self):
+        with self.lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.trial = None
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning("LLM circuit breaker opened")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self.trial = None
+
+    def release(self, permit):
+        """Give back the half-open trial slot if `permit` holds it, when the call got no answer"""
+        with self.lock:
+            if permit is not None and permit is self.trial:
+                self.trial = None
+
+    def get_state(self):
+        with self.lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self.state
+
+class LLMClient:
+    """
+    Pooled client for an OpenAI-compatible chat-completions endpoint.
+    One keep-alive session is shared by every call in the process. Calls
+    are capped by a semaphore, 429/5xx responses are retried with jittered
+    exponential backoff (honoring Retry-After), and a circuit breaker stops
+    calling the provider while it is unhealthy.
+    """
+    def __init__(self, api_url, api_key, timeout=30, max_retries=3, backoff_base=0.5,
+                 backoff_max=8.0, max_in_flight=8, failure_threshold=5, reset_timeout=30):
+        self.api_url = api_url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.in_flight = threading.BoundedSemaphore(max_in_flight)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_in_flight)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+        })
+
+    def chat(self, payload, cancel=None):
+        """
+        Send a chat-completions payload and return a ChatResult, or raise LLMError.
+        Once the optional `cancel` event is set no further attempt is made; a
+        request already sent cannot be aborted, so its response is discarded.
+        """
+        permit = self.breaker.allow()
+        if not permit:
+            raise CircuitOpenError("LLM provider circuit is open")
+
+        started = time.monotonic()
+        retries = 0
+        healthy = None  # What this call showed about the provider, reported to the breaker once it ends
+        try:
+            while True:
+                error, retry_after = None, None
+                if cancel is not None and cancel.is_set():
+                    raise LLMCancelled("LLM call cancelled")
+                try:
+                    response = self._post(payload)
+                    if response.status_code == 200:
+                        data = response.json()
+                        content = (data["choices"][0]["message"].get("content") or "").strip()
+                        if content:
+                            healthy = True
+                            return ChatResult(
+                                content=content,
+                                model=data.get("model", payload.get("model")),
+                                usage=data.get("usage"),
+                                retries=retries,
+                                latency=time.monotonic() - started
+                            )
+                        error = "empty completion"
+                    else:
+                        error = f"{response.status_code} {response.text[:500]}"
+                        if response.status_code not in RETRYABLE_STATUS_CODES:
+                            # Client errors are our fault, not the provider's, so they do not trip the breaker
+                            healthy = True
+                            raise LLMError(f"LLM API error: {error}")
+                        retry_after = self._parse_retry_after(response.headers.get('Retry-After'))
+                except LLMError:
+                    raise
+                except (requests.RequestException, ValueError, KeyError, IndexError, TypeError, AttributeError) as e:
+                    error = str(e) or type(e).__name__
+
+                if retries >= self.max_retries:
+                    healthy = False
+                    raise LLMError(f"LLM API failed after {retries + 1} attempts: {error}")
+
+                delay = self._backoff(retries, retry_after)
+                if delay is None:
+                    healthy = False
+                    raise LLMError(f"LLM API asked to retry after {retry_after}s: {error}")
+                logger.warning(f"LLM API error ({error}), retrying in {delay:.2f}s")
+                if cancel is not None:
+                    cancel.wait(delay)  # Wakes early when the call is cancelled
+                else:
+                    time.sleep(delay)
+                retries += 1
+        finally:
+            self._settle(permit, healthy)
+
+    def _settle(self, permit, healthy):
+        """Report a finished call to the breaker; a call that never got an answer gives back its trial slot"""
+        if healthy is True:
+            self.breaker.record_success()
+        elif healthy is False:
+            self.breaker.record_failure()
+        else:
+            self.breaker.release(permit)
+
+    def stream_chat(self, payload):
+        """
+        Stream a completion, yielding content deltas as they arrive.
+        Failures before the first token, including a stream without any
+        content, are retried like chat(); once tokens have been yielded a
+        failure raises LLMError to the consumer. If the consumer stops early
+        (a client disconnect closes the generator) the breaker is still settled.
+        """
+        permit = self.breaker.allow()
+        if not permit:
+            raise CircuitOpenError("LLM provider circuit is open")
+
+        payload = dict(payload, stream=True)
+        retries = 0
+        streamed = False
+        healthy = None
+        try:
+            while True:
+                error, retry_after = None, None
+                if not self.in_flight.acquire(timeout=self.timeout):
+                    raise LLMError("Too many in-flight LLM requests")
+                response = None
+                try:
+                    response = self.session.post(self.api_url, json=payload, timeout=self.timeout, stream=True)
+                    if response.status_code == 200:
+                        for delta in self._iter_stream_deltas(response):
+                            streamed = True
+                            yield delta
+                        if streamed:
+                            healthy = True
+                            return
+                        error = "empty completion"
+                    else:
+                        error = f"{response.status_code} {response.text[:500]}"
+                        if response.status_code not in RETRYABLE_STATUS_CODES:
+                            healthy = True
+                            raise LLMError(f"LLM API error: {error}")
+                        retry_after = self._parse_retry_after(response.headers.get('Retry-After'))
+                except LLMError:
+                    raise
+                except (requests.RequestException, ValueError, KeyError, IndexError, TypeError, AttributeError) as e:
+                    if streamed:
+                        healthy = False
+                        raise LLMError(f"LLM stream interrupted: {e}")
+                    error = str(e) or type(e).__name__
+                finally:
+                    if response is not None:
+                        response.close()
+                    self.in_flight.release()
+
+                if retries >= self.max_retries:
+                    healthy = False
+                    raise LLMError(f"LLM API failed after {retries + 1} attempts: {error}")
+
+                delay = self._backoff(retries, retry_after)
+                if delay is None:
+                    healthy = False
+                    raise LLMError(f"LLM API asked to retry after {retry_after}s: {error}")
+                logger.warning(f"LLM API error ({error}), retrying in {delay:.2f}s")
+                time.sleep(delay)
+                retries += 1
+        finally:
+            # A stream closed by its consumer after tokens arrived shows the provider is healthy
+            self._settle(permit, True if healthy is None and streamed else healthy)
+
+    @staticmethod
+    def _iter_stream_deltas(response):
+        """Parse an OpenAI-style SSE body into content deltas"""
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith('data:'):
+                continue
+            data = line[len('data:'):].strip()
+            if data == '[DONE]':
+                break
+            chunk = json.loads(data)
+            delta = chunk["choices"][0].get("delta", {}).get("content")
+            if delta:
+                yield delta
+
+    def _post(self, payload):
+        if not self.in_flight.acquire(timeout=self.timeout):
+            raise LLMError("Too many in-flight LLM requests")
+        try:
+            return self.session.post(self.api_url, json=payload, timeout=self.timeout)
+        finally:
+            self.in_flight.release()
+
+    def _backoff(self, attempt, retry_after=None):
+        """Delay before the next attempt, or None if Retry-After is longer than we are willing to wait"""
+        if retry_after is not None:
+            if retry_after > self.backoff_max:
+                return None
+            return retry_after + random.uniform(0, self.backoff_base)
+        # Full jitter keeps concurrent callers from retrying in lockstep
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    @staticmethod
+    def _parse_retry_after(value):
+        if not value:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+        try:
+            retry_at = email.utils.parsedate_to_datetime(value)
+            return max(retry_at.timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            return None
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_llm_client(api_url, api_key):
+    """Return the process-wide client for an endpoint, creating it from the app config on first use"""
+    key = (api_url, api_key)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            config = current_app.config if has_app_context() else {}
+            client = LLMClient(
+                api_url,
+                api_key,
+                timeout=config.get('AI_REQUEST_TIMEOUT', 30),
+                max_retries=config.get('AI_MAX_RETRIES', 3),
+                backoff_base=config.get('AI_BACKOFF_BASE', 0.5),
+                backoff_max=config.get('AI_BACKOFF_MAX', 8.0),
+                max_in_flight=config.get('AI_MAX_IN_FLIGHT', 8),
+                failure_threshold=config.get('AI_CIRCUIT_FAILURE_THRESHOLD', 5),
+                reset_timeout=config.get('AI_CIRCUIT_RESET_TIMEOUT', 30)
+            )
+            _clients[key] = client
+    return client
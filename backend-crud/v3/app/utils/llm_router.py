@@ -0,0 +1,237 @@
+import json
+import logging
+import os
+import random
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from flask import current_app, has_app_context
+from app.utils.llm_client import get_llm_client, LLMError, CircuitBreaker
+from app.utils.ai_telemetry import get_ai_telemetry, percentile
+
+logger = logging.getLogger(__name__)
+
+class Provider:
+    """One OpenAI-compatible endpoint and model, with its recent successful latencies"""
+    def __init__(self, name, client, model, weight=1.0, latency_window=200):
+        self.name = name
+        self.client = client
+        self.model = model
+        self.weight = float(weight)
+        self.latencies = deque(maxlen=latency_window)
+        self.lock = threading.Lock()
+
+    def record_latency(self, latency):
+        with self.lock:
+            self.latencies.append(latency)
+
+    def latency_percentile(self, fraction):
+        with self.lock:
+            latencies = sorted(self.latencies)
+        return percentile(latencies, fraction)
+
+    def is_open(self):
+        return self.client.breaker.get_state() == CircuitBreaker.OPEN
+
+    def __repr__(self):
+        return f"<Provider {self.name} {self.model} weight={self.weight}>"
+
+class LLMRouter:
+    """
+    Routes chat completions across weighted providers and hedges slow calls.
+    Each call goes to a provider picked at random by weight, skipping those
+    whose circuit is open. If it has not answered once the provider's
+    `hedge_percentile` latency has passed, the same request is also sent to
+    another provider (or again to the same one when it is the only one). The
+    first valid response wins and the other call is cancelled. At most
+    `hedge_max_rate` of calls are hedged, so the extra cost stays bounded.
+    """
+    def __init__(self, providers, hedge_enabled=True, hedge_percentile=0.95, hedge_min_delay=1.0,
+                 hedge_default_delay=5.0, hedge_min_samples=20, hedge_max_rate=0.1, max_workers=16,
+                 telemetry=None):
+        self.providers = providers
+        self.hedge_enabled = hedge_enabled
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_default_delay = hedge_default_delay
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_max_rate = hedge_max_rate
+        self.telemetry = telemetry
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='llm-hedge')
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def _pick(self, exclude=None):
+        candidates = [p for p in self.providers if p is not exclude and not p.is_open()]
+        if not candidates:
+            # Every circuit is open: the client rejects the call without reaching the provider
+            candidates = [p for p in self.providers if p is not exclude]
+        if not candidates:
+            return None
+        return random.choices(candidates, weights=[max(p.weight, 0.0) or 1e-9 for p in candidates])[0]
+
+    def hedge_delay(self, provider):
+        """Seconds to wait for `provider` before hedging: its latency percentile once enough calls were seen"""
+        with provider.lock:
+            samples = len(provider.latencies)
+        if samples < self.hedge_min_samples:
+            return self.hedge_default_delay
+        return max(provider.latency_percentile(self.hedge_percentile), self.hedge_min_delay)
+
+    def _hedge_allowed(self):
+        with self.lock:
+            # One hedge of slack so the first slow calls after startup can be hedged too
+            if self.hedge_max_rate <= 0 or self.hedged >= self.hedge_max_rate * self.calls + 1:
+                return False
+            self.hedged += 1
+            return True
+
+    def _increment(self, name):
+        if self.telemetry:
+            self.telemetry.increment(name)
+
+    def _call(self, provider, payload, cancel=None):
+        result = provider.client.chat(dict(payload, model=provider.model or payload.get('model')), cancel)
+        if not result.content:
+            raise LLMError(f"Empty completion from {provider.name}")
+        provider.record_latency(result.latency)
+        result.provider = provider.name
+        return result
+
+    def chat(self, payload):
+        """Return the first valid ChatResult from the primary or hedge call, or raise LLMError"""
+        primary = self._pick()
+        with self.lock:
+            self.calls += 1
+        if not self.hedge_enabled:
+            return self._call(primary, payload)
+
+        calls = {}
+        cancel = threading.Event()
+        primary_future = self.executor.submit(self._call, primary, payload, cancel)
+        calls[primary_future] = primary
+        done, _ = wait([primary_future], timeout=self.hedge_delay(primary))
+        hedge_future = None
+        if not done and self._hedge_allowed():
+            backup = self._pick(exclude=primary) or primary
+            logger.info(f"Hedging LLM call to {primary.name} with {backup.name}")
+            self._increment('llm_hedges')
+            hedge_future = self.executor.submit(self._call, backup, payload, cancel)
+            calls[hedge_future] = backup
+
+        pending, error = set(calls), None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except LLMError as e:
+                    error = e
+                    continue
+                # The loser makes no further attempts and its response is discarded
+                cancel.set()
+                for other in pending:
+                    other.cancel()
+                if future is hedge_future:
+                    with self.lock:
+                        self.hedge_wins += 1
+                    self._increment('llm_hedge_wins')
+                return result
+        raise error
+
+    def stream_chat(self, payload):
+        """Stream from one provider picked by weight; streams are not hedged"""
+        provider = self._pick()
+        yield from provider.client.stream_chat(dict(payload, model=provider.model or payload.get('model')))
+
+    def models(self, default_model=None):
+        """Sorted `provider:model` of every provider a call may be answered by"""
+        return sorted(f"{p.name}:{p.model or default_model}" for p in self.providers)
+
+    def circuit_state(self):
+        """Open only when every provider's circuit is open"""
+        states = [p.client.breaker.get_state() for p in self.providers]
+        for state in (CircuitBreaker.CLOSED, CircuitBreaker.HALF_OPEN):
+            if state in states:
+                return state
+        return CircuitBreaker.OPEN
+
+    def get_stats(self):
+        with self.lock:
+            calls, hedged, hedge_wins = self.calls, self.hedged, self.hedge_wins
+        return {
+            "calls": calls,
+            "hedged": hedged,
+            "hedge_wins": hedge_wins,
+            "hedge_rate": round(hedged / calls, 4) if calls else None,
+            "providers": [{
+                "name": p.name,
+                "model": p.model,
+                "weight": p.weight,
+                "circuit_state": p.client.breaker.get_state(),
+                "latency_p50": p.latency_percentile(0.50),
+                "latency_p95": p.latency_percentile(0.95),
+                "hedge_delay": round(self.hedge_delay(p), 3)
+            } for p in self.providers]
+        }
+
+def parse_providers(value, default_url, default_key, default_model):
+    """
+    Provider entries from AI_PROVIDERS, a JSON list of objects with `url`,
+    `api_key` or `api_key_env`, and optional `name`, `model` and `weight`.
+    Without it the single Groq endpoint is used. Entries without an API key are skipped.
+    """
+    entries = []
+    if value:
+        try:
+            entries = json.loads(value)
+            if not isinstance(entries, list):
+                raise ValueError("AI_PROVIDERS must be a JSON list")
+        except ValueError as e:
+            logger.error(f"Ignoring invalid AI_PROVIDERS: {e}")
+            entries = []
+    if not entries:
+        entries = [{"name": "groq", "url": default_url, "api_key": default_key, "model": default_model}]
+
+    providers = []
+    for i, entry in enumerate(entries):
+        if not isinstance(entry, dict) or not entry.get('url'):
+            logger.error(f"Ignoring AI provider entry without a url: {entry!r}")
+            continue
+        api_key = entry.get('api_key') or os.environ.get(entry.get('api_key_env', ''), '')
+        if not api_key:
+            continue
+        providers.append(Provider(
+            entry.get('name', f"provider{i + 1}"),
+            get_llm_client(entry['url'], api_key),
+            entry.get('model', default_model),
+            entry.get('weight', 1.0)
+        ))
+    return providers
+
+_llm_router = None
+_llm_router_lock = threading.Lock()
+
+def get_llm_router(default_url, default_key, default_model):
+    """Return the process-wide LLM router, or None when no provider has an API key"""
+    global _llm_router
+    with _llm_router_lock:
+        if _llm_router is None:
+            config = current_app.config if has_app_context() else {}
+            providers = parse_providers(config.get('AI_PROVIDERS'), default_url, default_key, default_model)
+            if not providers:
+                return None
+            _llm_router = LLMRouter(
+                providers,
+                hedge_enabled=config.get('AI_HEDGE_ENABLED', True),
+                hedge_percentile=config.get('AI_HEDGE_PERCENTILE', 0.95),
+                hedge_min_delay=config.get('AI_HEDGE_MIN_DELAY', 1.0),
+                hedge_default_delay=config.get('AI_HEDGE_DEFAULT_DELAY', 5.0),
+                hedge_min_samples=config.get('AI_HEDGE_MIN_SAMPLES', 20),
+                hedge_max_rate=config.get('AI_HEDGE_MAX_RATE', 0.1),
+                max_workers=2 * config.get('AI_MAX_IN_FLIGHT', 8),
+                telemetry=get_ai_telemetry()
+            )
+    return _llm_router
@@ -0,0 +1,183 @@
+import math
+import re
+import zlib
+import numpy as np
+from app.utils.extractive_summary import STOPWORDS, split_sentences, tfidf_matrix, textrank_scores
+from app.utils.quiz_parser import OPTION_LABELS, validate_question
+
+BLANK = "_____"
+MAX_STATEMENT_LENGTH = 160  # Longer sentences are asked as cloze questions only, to keep options readable
+# Only used when the summary and its collection have too few terms of their own
+GENERIC_DISTRACTORS = ("structure", "function", "process", "system", "pattern", "theory", "method", "evidence")
+
+# Words that commonly come right before (BEFORE_NOUN) or right after (AFTER_NOUN) a noun,
+# a cheap stand-in for part-of-speech tagging so answers and distractors are mostly nouns
+BEFORE_NOUN = frozenset("a an the of in into on from by with for its their his her this these those each every".split())
+AFTER_NOUN = frozenset("of in into on from by with for to and or is are was were which that . , ; : ! ? )".split())
+EXTRA_STOPWORDS = frozenset("""
+across along among around toward towards within without upon onto also often usually typically many much
+several various however therefore thus although though whereas whether either neither rather quite
+""".split())
+
+_TOKEN_RE = re.compile(r"\d+(?:[.,]\d+)?%?|[A-Za-z][A-Za-z'-]*[A-Za-z]|[A-Za-z]|[.,;:!?()]")
+
+def _is_number(term):
+    return term[0].isdigit()
+
+def _stem(term):
+    """Singular form, so "cell" and "cells" never appear as two options"""
+    return term[:-1] if term.endswith('s') and not term.endswith('ss') else term
+
+def _candidate_terms(sentence):
+    """
+    (key, surface form, is first word, noun evidence) of the words in a sentence
+    that can be blanked out. Noun evidence is positive when the neighbouring
+    words suggest a noun and negative when a determiner follows (a verb).
+    """
+    tokens = _TOKEN_RE.findall(sentence)
+    lowered = [token.lower() for token in tokens]
+    terms = []
+    for position, (surface, key) in enumerate(zip(tokens, lowered)):
+        if not _is_number(key) and (len(key) <= 3 or key in STOPWORDS or key in EXTRA_STOPWORDS):
+            continue
+        previous = lowered[position - 1] if position else None
+        following = lowered[position + 1] if position + 1 < len(lowered) else '.'
+        evidence = int(previous in BEFORE_NOUN) + int(following in AFTER_NOUN) - int(following in BEFORE_NOUN)
+        terms.append((key, surface, position == 0, evidence))
+    return terms
+
+def _term_salience(sentences, context_sentences):
+    """
+    TF-IDF weight of every term over the summary and its collection.
+    Terms in the summary count double, so answers and distractors lean towards
+    what the summary is about. Returns (salience by key, display form by key,
+    keys of terms that look like nouns).
+    """
+    documents = [(sentence, 2.0) for sentence in sentences] + [(sentence, 1.0) for sentence in context_sentences]
+    frequency, document_frequency, inline, acronyms, evidence = {}, {}, {}, set(), {}
+    for sentence, weight in documents:
+        seen = set()
+        for key, surface, first_word, noun_evidence in _candidate_terms(sentence):
+            frequency[key] = frequency.get(key, 0.0) + weight
+            evidence[key] = evidence.get(key, 0) + noun_evidence
+            # A capital at the start of a sentence says nothing about how the term is written
+            if not first_word:
+                inline.setdefault(key, surface)
+            elif surface.isupper():
+                acronyms.add(key)
+            if key not in seen:
+                seen.add(key)
+                document_frequency[key] = document_frequency.get(key, 0) + 1
+    total = len(documents)
+    salience = {key: frequency[key] * (math.log((1.0 + total) / (1.0 + document_frequency[key])) + 1.0)
+                for key in frequency}
+    surfaces = {key: inline.get(key, key.upper() if key in acronyms else key) for key in frequency}
+    nouns = {key for key, value in evidence.items() if value > 0 or _is_number(key)}
+    return salience, surfaces, nouns
+
+def _number_distractors(answer):
+    """Nearby values for a numeric answer, in the answer's own format"""
+    suffix = '%' if answer.endswith('%') else ''
+    digits = answer.rstrip('%').replace(',', '')
+    try:
+        value = float(digits)
+    except ValueError:
+        return []
+    decimals = len(digits.split('.')[1]) if '.' in digits else 0
+    candidates = [value * 2, value / 2, value + 1, value - 1, value + 10, value * 10]
+    upper = 100 if suffix else math.inf
+    return [f"{candidate:.{decimals}f}{suffix}" for candidate in candidates if 0 < candidate <= upper]
+
+def _pick_distractors(answer_key, sentence_keys, salience, surfaces, nouns, used):
+    """
+    Three other salient terms of the same kind as the answer that do not occur in the sentence.
+    Terms that match the answer in looking like a noun and in their ending
+    (e.g. plural -s, -tion) are preferred.
+    """
+    numeric = _is_number(answer_key)
+    noun = answer_key in nouns
+    excluded = {_stem(key) for key in sentence_keys} | {_stem(key) for key in used}
+    candidates = [key for key in salience if _stem(key) not in excluded and _is_number(key) == numeric]
+    candidates.sort(key=lambda key: ((key in nouns) != noun, key[-2:] != answer_key[-2:], -salience[key], key))
+    distractors = [surfaces[key] for key in candidates]
+    if numeric:
+        distractors += _number_distractors(surfaces[answer_key])
+    distractors += [word for word in GENERIC_DISTRACTORS if word not in excluded]
+
+    picked, seen = [], {_stem(answer_key)}
+    for distractor in distractors:
+        if _stem(distractor.lower()) not in seen:
+            seen.add(_stem(distractor.lower()))
+            picked.append(distractor)
+        if len(picked) == len(OPTION_LABELS) - 1:
+            break
+    return picked
+
+def _replace_term(sentence, surface, replacement):
+    pattern = re.compile(r'(?<![\w-])' + re.escape(surface) + r'(?![\w-])', re.IGNORECASE)
+    def substitute(match):
+        if match.group(0)[0].isupper() and replacement[:1].islower():
+            return replacement[0].upper() + replacement[1:]
+        return replacement
+    return pattern.sub(substitute, sentence)
+
+def _build_question(sentence, answer, distractors, statement):
+    # The correct option's position is derived from the sentence, so it varies but never changes between runs
+    position = zlib.crc32(sentence.encode('utf-8')) % len(OPTION_LABELS)
+    choices = list(distractors)
+    choices.insert(position, answer)
+    if statement:
+        question = "Which of the following statements is accurate according to the summary?"
+        choices = [_replace_term(sentence, answer, choice) for choice in choices]
+    else:
+        question = f"Fill in the blank: {_replace_term(sentence, answer, BLANK)}"
+    return validate_question({
+        "question": question,
+        "options": dict(zip(OPTION_LABELS, choices)),
+        "correct_answer": OPTION_LABELS[position]
+    })
+
+def generate_quiz(summary, num_questions=4, context_texts=()):
+    """
+    Build multiple-choice questions from a summary without calling the AI.
+    Key sentences are ranked with TextRank; in each one the most salient term
+    is blanked out (cloze questions) or swapped for a distractor (pick the
+    accurate statement). Distractors are other salient terms from the summary
+    and `context_texts`, usually the collection's highlights. The same input
+    always gives the same quiz. Returns a dict shaped like the AI quizzes.
+    """
+    sentences = split_sentences(summary)
+    context_sentences = [s for text in context_texts for s in split_sentences(text)]
+    salience, surfaces, nouns = _term_salience(sentences, context_sentences)
+
+    if len(sentences) > 1:
+        matrix = tfidf_matrix(sentences)
+        scores = textrank_scores(matrix @ matrix.T)
+        order = [int(i) for i in np.argsort(-scores, kind='stable')]
+    else:
+        order = list(range(len(sentences)))
+
+    questions, used = [], set()
+    # A second pass over the sentences asks about their next most salient term
+    for _ in range(2):
+        for index in order:
+            if len(questions) >= num_questions:
+                break
+            sentence = sentences[index]
+            terms = {key: surfaces[key] for key, _, _, _ in _candidate_terms(sentence)}
+            answers = sorted((key for key in terms if key not in used),
+                             key=lambda key: (key not in nouns, -salience[key], key))
+            if not answers:
+                continue
+            answer_key = answers[0]
+            distractors = _pick_distractors(answer_key, terms, salience, surfaces, nouns, used)
+            statement = len(questions) % 2 == 1 and len(sentence) <= MAX_STATEMENT_LENGTH
+            question = _build_question(sentence, terms[answer_key], distractors, statement)
+            if question:
+                used.add(answer_key)
+                questions.append(question)
+
+    return {
+        "title": "Quiz based on the summary",
+        "questions": questions
+    }
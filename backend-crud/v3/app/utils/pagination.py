@@ -0,0 +1,117 @@
+import base64
+import json
+import threading
+import time
+from datetime import datetime
+from flask import current_app, has_app_context, request
+from sqlalchemy import and_, or_, DateTime
+
+class Page:
+    """One page of a keyset-paginated list"""
+    def __init__(self, items, next_cursor, total):
+        self.items = items
+        self.next_cursor = next_cursor  # None on the last page
+        self.total = total
+
+def newest_first(model):
+    """The default list order: newest `timestamp` first, with the id breaking ties"""
+    return [(model.timestamp, True), (model.id, True)]
+
+def encode_cursor(values):
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor, order):
+    """Values of the order columns for the last row of the previous page"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(order):
+            raise ValueError
+        return [datetime.fromisoformat(v) if isinstance(column.type, DateTime) else v
+                for v, (column, _) in zip(values, order)]
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+def _after(order, values):
+    """Rows that come after `values` in `order`, as (a > x) or (a = x and b > y) or ..."""
+    clauses = []
+    for i, (column, descending) in enumerate(order):
+        equal = [c == v for (c, _), v in zip(order[:i], values)]
+        clauses.append(and_(*equal, column < values[i] if descending else column > values[i]))
+    return or_(*clauses)
+
+def page_request():
+    """(limit, cursor) when the request asked for a page with ?limit= or ?cursor=, else None"""
+    if 'limit' not in request.args and 'cursor' not in request.args:
+        return None
+    config = current_app.config
+    limit = request.args.get('limit', config.get('PAGINATION_DEFAULT_LIMIT', 50), type=int)
+    if limit is None or limit < 1 or limit > config.get('PAGINATION_MAX_LIMIT', 200):
+        raise ValueError(f"limit must be between 1 and {config.get('PAGINATION_MAX_LIMIT', 200)}")
+    return limit, request.args.get('cursor') or None
+
+def paginate(query, order, limit, cursor=None, count_key=None):
+    """
+    Keyset pagination: rows after the cursor in `order`, a list of (column,
+    descending) ending with a unique column, read with one indexed range scan
+    however deep the page is. The total comes from a separate count: it is
+    recounted on the first page and cached under `count_key` for the next
+    pages, for PAGINATION_COUNT_TTL seconds.
+    """
+    page_query = query
+    if cursor:
+        page_query = page_query.filter(_after(order, decode_cursor(cursor, order)))
+    page_query = page_query.order_by(*[column.desc() if descending else column.asc() for column, descending in order])
+    rows = page_query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([getattr(rows[-1], column.key) for column, _ in order])
+
+    count = lambda: query.order_by(None).count()
+    total = get_count_cache().get(count_key, count, refresh=not cursor) if count_key else count()
+    return Page(rows, next_cursor, total)
+
+def page_response(key, schema, page):
+    """The JSON body of a paged list: the rows dumped with `schema` under `key`, the total and next_cursor"""
+    return {
+        key: schema.dump(page.items, many=True),
+        'total': page.total,
+        'next_cursor': page.next_cursor
+    }
+
+class CountCache:
+    """Row counts kept for `ttl` seconds, so paging through a list does not recount it every page"""
+    def __init__(self, ttl=30, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def get(self, key, compute, refresh=False):
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry[1] > now and not refresh:
+                return entry[0]
+        value = compute()
+        with self.lock:
+            if len(self.entries) >= self.max_entries:
+                self.entries = {k: e for k, e in self.entries.items() if e[1] > now}
+                if len(self.entries) >= self.max_entries:
+                    self.entries.clear()
+            self.entries[key] = (value, now + self.ttl)
+        return value
+
+_count_cache = None
+_count_cache_lock = threading.Lock()
+
+def get_count_cache():
+    """Return the process-wide count cache"""
+    global _count_cache
+    with _count_cache_lock:
+        if _count_cache is None:
+            config = current_app.config if has_app_context() else {}
+            _count_cache = CountCache(ttl=config.get('PAGINATION_COUNT_TTL', 30))
+    return _count_cache
@@ -0,0 +1,222 @@
+import itertools
+import json
+import re
+import threading
+from app.utils.extractive_summary import STOPWORDS
+
+OPTION_LABELS = ("A", "B", "C", "D")
+
+_FENCE_RE = re.compile(r'```(?:json|JSON)?\s*(.*?)(?:```|$)', re.DOTALL)
+_TRAILING_COMMA_RE = re.compile(r',\s*([}\]])')
+_ANSWER_LABEL_RE = re.compile(r'^\W*(?:option|answer)?\W*([A-Da-d])\b', re.IGNORECASE)
+_CLOSERS = {'[': ']', '{': '}'}
+_WORD_RE = re.compile(r'\w+')
+
+class QuizParseError(ValueError):
+    """Raised when no JSON value at all can be recovered from a completion"""
+    pass
+
+def _strip_fences(text):
+    match = _FENCE_RE.search(text)
+    return match.group(1) if match else text
+
+def _close_truncated(text):
+    """
+    Cut a truncated JSON document back to the last complete nested value and
+    close whatever is still open, e.g. '[{...}, {"quest' -> '[{...}]'.
+    """
+    stack, in_string, escaped = [], False, False
+    cut = None
+    for i, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char in _CLOSERS:
+            stack.append(char)
+        elif char in ']}' and stack:
+            stack.pop()
+            if stack:
+                cut = (i + 1, list(stack))
+    if not stack and not in_string:
+        return text
+    if cut is None:
+        return None
+    position, open_stack = cut
+    return text[:position] + ''.join(_CLOSERS[c] for c in reversed(open_stack))
+
+def extract_json(text):
+    """
+    Recover a JSON value from a model completion.
+    Handles markdown fences, prose before or after the JSON, trailing commas
+    and output cut off mid-value. Returns (value, repaired) where repaired is
+    False only when the completion was clean JSON; raises QuizParseError.
+    """
+    text = (text or '').strip()
+    try:
+        return json.loads(text), False
+    except ValueError:
+        pass
+
+    body = _strip_fences(text)
+    starts = [i for i in (body.find('['), body.find('{')) if i >= 0]
+    if not starts:
+        raise QuizParseError("No JSON found in completion")
+    body = body[min(starts):]
+
+    decoder = json.JSONDecoder()
+    candidates = [body, _TRAILING_COMMA_RE.sub(r'\1', body)]
+    closed = _close_truncated(candidates[-1])
+    if closed:
+        candidates.append(_TRAILING_COMMA_RE.sub(r'\1', closed))
+    for candidate in candidates:
+        try:
+            # raw_decode ignores anything after the first complete value
+            value, _ = decoder.raw_decode(candidate)
+            return value, True
+        except ValueError:
+            continue
+    raise QuizParseError("Could not repair JSON in completion")
+
+def _normalize_options(options):
+    if isinstance(options, list):
+        options = dict(zip(OPTION_LABELS, options)) if len(options) == len(OPTION_LABELS) else {}
+    if not isinstance(options, dict):
+        return None
+    normalized = {}
+    for key, value in options.items():
+        match = _ANSWER_LABEL_RE.match(str(key))
+        if not match or not isinstance(value, (str, int, float)) or not str(value).strip():
+            return None
+        normalized[match.group(1).upper()] = str(value).strip()
+    if sorted(normalized) != list(OPTION_LABELS):
+        return None
+    if len({v.lower() for v in normalized.values()}) != len(OPTION_LABELS):
+        return None
+    return normalized
+
+def _normalize_answer(answer, options):
+    if not isinstance(answer, str):
+        return None
+    answer = answer.strip()
+    # Some models answer with the option text instead of its label
+    for label, text in options.items():
+        if answer.lower() == text.lower():
+            return label
+    match = _ANSWER_LABEL_RE.match(answer)
+    return match.group(1).upper() if match else None
+
+def validate_question(item):
+    """Return a normalized question dict, or None if the item does not fit the quiz schema"""
+    if not isinstance(item, dict):
+        return None
+    question = item.get('question')
+    if not isinstance(question, str) or not question.strip():
+        return None
+    options = _normalize_options(item.get('options'))
+    if options is None:
+        return None
+    correct_answer = _normalize_answer(item.get('correct_answer', item.get('answer')), options)
+    if correct_answer is None:
+        return None
+    return {
+        "question": question.strip(),
+        "options": options,
+        "correct_answer": correct_answer
+    }
+
+def parse_quiz_questions(text):
+    """
+    Parse and validate the questions in a quiz completion.
+    Invalid or duplicate questions are dropped one by one instead of
+    rejecting the whole quiz. Returns (questions, dropped, repaired).
+    """
+    value, repaired = extract_json(text)
+    if isinstance(value, dict):
+        items = value.get('questions')
+        if items is None:
+            items = [value] if 'question' in value else []
+    else:
+        items = value
+    if not isinstance(items, list):
+        raise QuizParseError("Quiz completion does not contain a list of questions")
+
+    questions, seen, dropped = [], set(), 0
+    for item in items:
+        question = validate_question(item)
+        key = question['question'].lower() if question else None
+        if question is None or key in seen:
+            dropped += 1
+            continue
+        seen.add(key)
+        questions.append(question)
+    return questions, dropped, repaired
+
+def _question_terms(question):
+    """Content words of a question and its correct answer, for near-duplicate detection"""
+    text = f"{question['question']} {question['options'].get(question['correct_answer'], '')}"
+    return {w for w in _WORD_RE.findall(text.lower()) if len(w) > 2 and w not in STOPWORDS}
+
+def merge_question_sets(question_sets, limit=None, threshold=0.6):
+    """
+    Merge the questions of several quiz completions, taking them round-robin
+    so every set is represented when the result is cut to `limit`. A question
+    is dropped when its content words (with those of its correct answer)
+    overlap a kept question's by `threshold` or more (Jaccard).
+    Returns (questions, duplicates dropped).
+    """
+    merged, kept_terms, duplicates = [], [], 0
+    for round_questions in itertools.zip_longest(*question_sets):
+        for question in round_questions:
+            if question is None or (limit is not None and len(merged) >= limit):
+                continue
+            terms = _question_terms(question)
+            if any(len(terms & other) >= threshold * len(terms | other) for other in kept_terms if terms | other):
+                duplicates += 1
+                continue
+            kept_terms.append(terms)
+            merged.append(question)
+    return merged, duplicates
+
+class QuizParseStats:
+    """Process-wide counters for how quiz completions parse"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.clean = 0
+        self.repaired = 0
+        self.failed = 0
+        self.questions_kept = 0
+        self.questions_dropped = 0
+
+    def record(self, kept, dropped=0, repaired=False):
+        with self.lock:
+            self.calls += 1
+            self.questions_kept += kept
+            self.questions_dropped += dropped
+            if not kept:
+                self.failed += 1
+            elif repaired or dropped:
+                self.repaired += 1
+            else:
+                self.clean += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "calls": self.calls,
+                "clean": self.clean,
+                "repaired": self.repaired,
+                "failed": self.failed,
+                "success_rate": round((self.clean + self.repaired) / self.calls, 4) if self.calls else None,
+                "questions_kept": self.questions_kept,
+                "questions_dropped": self.questions_dropped
+            }
+
+quiz_parse_stats = QuizParseStats()
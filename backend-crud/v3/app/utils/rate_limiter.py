@@ -0,0 +1,182 @@
+import math
+import threading
+import time
+from functools import wraps
+from flask import current_app, has_app_context, jsonify
+from flask_jwt_extended import get_jwt_identity
+
+LANE_INTERACTIVE = 'interactive'
+LANE_BATCH = 'batch'
+
+class RateLimitExceeded(Exception):
+    """Raised when a request does not fit one of the AI budgets"""
+    def __init__(self, scope, wait):
+        # Whole seconds for the Retry-After header; a zero-rate bucket never refills
+        self.retry_after = 60 if math.isinf(wait) else max(math.ceil(wait), 1)
+        self.scope = scope
+        super().__init__(f"AI rate limit exceeded ({scope}), retry in {self.retry_after}s")
+
+class TokenBucket:
+    """
+    Bucket holding up to `capacity` units, refilled continuously at `rate` units per second.
+    A request larger than the bucket is admitted once the bucket is full and
+    leaves it in debt (a negative level), so it is paid for in full before
+    anything else is admitted.
+    """
+    def __init__(self, capacity, rate):
+        self.capacity = float(capacity)
+        self.rate = float(rate)
+        self.level = float(capacity)
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, reserve=0.0):
+        """Seconds until `amount` units can be taken without going below `reserve`"""
+        # A request larger than the bucket would never fit, so it only needs a full bucket;
+        # consume() then charges all of it
+        needed = min(min(amount, self.capacity) + reserve * self.capacity, self.capacity)
+        if self.level >= needed:
+            return 0.0
+        if self.rate <= 0:
+            return math.inf
+        return (needed - self.level) / self.rate
+
+    def consume(self, amount):
+        self.level -= amount
+
+    def is_full(self):
+        return self.level >= self.capacity
+
+class AIRateLimiter:
+    """
+    Admission control for endpoints that call the AI provider.
+    Every request is charged against token buckets for the user, for the
+    user on that endpoint, and for the provider budget, each in requests and
+    in estimated tokens. Buckets live in process memory, so each worker gets
+    its own copy: get_rate_limiter() gives every worker an equal share of the
+    provider budget. A request is admitted only if
+    every bucket has room, so a rejected request costs nothing.
+    Batch requests may not draw the global buckets below `batch_reserve`
+    of their capacity; that headroom is kept for interactive requests.
+    """
+    PRUNE_EVERY = 1000  # Checks between sweeps of idle per-user buckets
+
+    def __init__(self, user_rpm=20, user_tpm=40000, endpoint_rpm=6, global_rpm=120,
+                 global_tpm=120000, batch_reserve=0.25):
+        self.user_rpm = user_rpm
+        self.user_tpm = user_tpm
+        self.endpoint_rpm = endpoint_rpm
+        self.batch_reserve = batch_reserve
+        self.global_buckets = {
+            'global requests': TokenBucket(global_rpm, global_rpm / 60.0),
+            'global tokens': TokenBucket(global_tpm, global_tpm / 60.0)
+        }
+        self.buckets = {}
+        self.lock = threading.Lock()
+        self.checks = 0
+        self.rejected = {}
+
+    def _bucket(self, key, per_minute):
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = TokenBucket(per_minute, per_minute / 60.0)
+        return bucket
+
+    def check(self, user_id, endpoint, tokens, requests=1, lane=LANE_INTERACTIVE):
+        """Admit a request or raise RateLimitExceeded with the time until it would fit"""
+        now = time.monotonic()
+        reserve = self.batch_reserve if lane == LANE_BATCH else 0.0
+        with self.lock:
+            charges = [
+                ('user requests', self._bucket(('user', user_id, 'requests'), self.user_rpm), requests, 0.0),
+                ('user tokens', self._bucket(('user', user_id, 'tokens'), self.user_tpm), tokens, 0.0),
+                (f'{endpoint} requests', self._bucket(('endpoint', user_id, endpoint), self.endpoint_rpm), requests, 0.0),
+                ('global requests', self.global_buckets['global requests'], requests, reserve),
+                ('global tokens', self.global_buckets['global tokens'], tokens, reserve)
+            ]
+            scope, retry_after = None, 0.0
+            for name, bucket, amount, bucket_reserve in charges:
+                bucket.refill(now)
+                wait = bucket.wait_time(amount, bucket_reserve)
+                if wait > retry_after:
+                    scope, retry_after = name, wait
+
+            self.checks += 1
+            if self.checks % self.PRUNE_EVERY == 0:
+                # Full buckets behave exactly like new ones, so idle users can be forgotten
+                self.buckets = {k: b for k, b in self.buckets.items() if not b.is_full()}
+
+            if scope is not None:
+                self.rejected[scope] = self.rejected.get(scope, 0) + 1
+                raise RateLimitExceeded(scope, retry_after)
+            for _, bucket, amount, _ in charges:
+                bucket.consume(amount)
+
+    def get_stats(self):
+        with self.lock:
+            now = time.monotonic()
+            for bucket in self.global_buckets.values():
+                bucket.refill(now)
+            return {
+                "global_requests_available": int(self.global_buckets['global requests'].level),
+                "global_tokens_available": int(self.global_buckets['global tokens'].level),
+                "tracked_users": len({key[1] for key in self.buckets}),
+                "rejected": dict(self.rejected)
+            }
+
+def estimate_request_tokens(texts):
+    """Estimated prompt tokens for the given texts plus the room reserved for the completion"""
+    config = current_app.config if has_app_context() else {}
+    prompt_tokens = sum(len(text or '') // 4 + 1 for text in texts)
+    return prompt_tokens + config.get('AI_SUMMARY_OUTPUT_TOKENS', 1024)
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+def get_rate_limiter():
+    """Return the process-wide AI rate limiter, or None when rate limiting is disabled"""
+    global _rate_limiter
+    config = current_app.config if has_app_context() else {}
+    if not config.get('AI_RATE_LIMIT_ENABLED', True):
+        return None
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            # The provider budget is split between the worker processes, which do not share buckets
+            workers = max(config.get('AI_RATE_WORKERS', 1), 1)
+            _rate_limiter = AIRateLimiter(
+                user_rpm=config.get('AI_RATE_USER_RPM', 20),
+                user_tpm=config.get('AI_RATE_USER_TPM', 40000),
+                endpoint_rpm=config.get('AI_RATE_ENDPOINT_RPM', 6),
+                global_rpm=config.get('AI_RATE_GLOBAL_RPM', 120) / workers,
+                global_tpm=config.get('AI_RATE_GLOBAL_TPM', 120000) / workers,
+                batch_reserve=config.get('AI_RATE_BATCH_RESERVE', 0.25)
+            )
+    return _rate_limiter
+
+def ai_rate_limit(endpoint, estimate, lane=LANE_INTERACTIVE):
+    """
+    Admission control for a view that calls the AI provider. Apply below @jwt_required().
+    `estimate(**view_args)` returns (requests, tokens) for the request, or None
+    when the request will not call the provider (e.g. content was supplied).
+    Rejected requests get 429 with a Retry-After header.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            limiter = get_rate_limiter()
+            cost = estimate(**kwargs) if limiter else None
+            if cost is not None:
+                requests, tokens = cost
+                try:
+                    limiter.check(get_jwt_identity(), endpoint, tokens, requests, lane)
+                except RateLimitExceeded as e:
+                    return jsonify({
+                        'error': str(e),
+                        'retry_after': e.retry_after
+                    }), 429, {'Retry-After': str(e.retry_after)}
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,7 @@
+from flask import request
+
+def is_instant_request(data):
+    """Instant mode is requested with ?instant=true or "mode": "instant" in the body"""
+    if data.get('mode') == 'instant':
+        return True
+    return request.args.get('instant', '').lower() in ('1', 'true', 'yes')
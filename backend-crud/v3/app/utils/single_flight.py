@@ -0,0 +1,214 @@
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from flask import current_app, has_app_context
+from sqlalchemy import select, delete, update
+from sqlalchemy.exc import IntegrityError
+from app.utils.db import db, after_transaction, holds_write_lock
+
+logger = logging.getLogger(__name__)
+
+class _Flight:
+    """One upstream call that callers in this process can wait on"""
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+class SingleFlight:
+    """
+    Coalesces identical in-flight AI calls so each prompt is sent upstream once.
+    Within a process, the first caller for a key (the leader) runs the call
+    and later callers wait on its result. Across workers, the leader holds a
+    row in the ai_leases table; leaders in other workers see the lease and
+    poll it until the owner stores the result, takes longer than the lease
+    TTL, or gives up after a failure (in which case they run the call).
+    Lease rows are written on their own connection. A caller whose session
+    already wrote to SQLite holds the database's write lock, so its lease
+    write could only wait for that lock; such a caller runs uncoordinated at
+    once. Facades make their AI calls before writing for this reason.
+    """
+    ACQUIRED, WAIT, DONE, UNCOORDINATED = 'acquired', 'wait', 'done', 'uncoordinated'
+    PRUNE_EVERY = 50  # Leases acquired between deletes of expired rows
+
+    def __init__(self, lease_ttl=120, poll_interval=0.25, result_ttl=30):
+        self.lease_ttl = lease_ttl
+        self.poll_interval = poll_interval
+        self.result_ttl = result_ttl
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"[:64]
+        self.flights = {}
+        self.lock = threading.Lock()
+        self.acquired = 0
+        self.stats = {"leaders": 0, "local_followers": 0, "remote_followers": 0}
+
+    def do(self, key, fn):
+        """Return fn() for the first caller of key and share its result (or error) with concurrent callers"""
+        with self.lock:
+            flight = self.flights.get(key)
+            if flight is None:
+                flight = self.flights[key] = _Flight()
+                leader = True
+            else:
+                leader = False
+                self.stats["local_followers"] += 1
+
+        if not leader:
+            if not flight.event.wait(self.lease_ttl):
+                logger.warning("Timed out waiting for an identical AI call, calling upstream")
+                return fn()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = self._lead(key, fn)
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self.lock:
+                self.flights.pop(key, None)
+            flight.event.set()
+
+    def _lead(self, key, fn):
+        started = datetime.utcnow()
+        deadline = time.monotonic() + self.lease_ttl
+        counted = False
+        while True:
+            state, value = self._try_acquire(key, started)
+            if state == self.DONE:
+                return value
+            if state != self.WAIT or time.monotonic() >= deadline:
+                break
+            if not counted:
+                with self.lock:
+                    self.stats["remote_followers"] += 1
+                counted = True
+            time.sleep(self.poll_interval)
+
+        with self.lock:
+            self.stats["leaders"] += 1
+        try:
+            value = fn()
+        except Exception:
+            if state == self.ACQUIRED:
+                self._release(key)
+            raise
+        if state == self.ACQUIRED:
+            self._complete(key, value)
+        return value
+
+    def _try_acquire(self, key, started):
+        """Take the lease for key, or report that another worker holds it or has just finished it"""
+        if not has_app_context():
+            return self.UNCOORDINATED, None
+        if holds_write_lock():
+            logger.warning("AI call made while the request holds the SQLite write lock; not coordinating it")
+            return self.UNCOORDINATED, None
+        from app.models.ai_lease import AILease
+        table = AILease.__table__
+        now = datetime.utcnow()
+        try:
+            with db.engine.begin() as conn:
+                row = conn.execute(
+                    select(table.c.id, table.c.value, table.c.completed_at, table.c.expires_at)
+                    .where(table.c.lease_key == key)
+                ).first()
+                if row is not None:
+                    # A result is only shared with callers that were already waiting when it was stored
+                    if row.completed_at is not None and row.completed_at >= started:
+                        return self.DONE, row.value
+                    if row.completed_at is None and row.expires_at > now:
+                        return self.WAIT, None
+                    conn.execute(delete(table).where(table.c.id == row.id))
+                conn.execute(table.insert().values(
+                    id=str(uuid.uuid4()),
+                    lease_key=key,
+                    owner=self.owner,
+                    value=None,
+                    acquired_at=now,
+                    completed_at=None,
+                    expires_at=now + timedelta(seconds=self.lease_ttl),
+                    updated_at=now
+                ))
+        except IntegrityError:
+            # Another worker inserted the lease between our read and our insert
+            return self.WAIT, None
+        except Exception as e:
+            # The lease table is an optimization; never block the AI call on it
+            logger.error(f"AI lease acquire failed: {e}")
+            return self.UNCOORDINATED, None
+
+        with self.lock:
+            self.acquired += 1
+            should_prune = self.acquired % self.PRUNE_EVERY == 0
+        if should_prune:
+            self.prune()
+        return self.ACQUIRED, None
+
+    def _complete(self, key, value):
+        after_transaction(lambda: self._store(key, value))
+
+    def _store(self, key, value):
+        from app.models.ai_lease import AILease
+        table = AILease.__table__
+        now = datetime.utcnow()
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(
+                    update(table)
+                    .where(table.c.lease_key == key, table.c.owner == self.owner)
+                    .values(value=value, completed_at=now,
+                            expires_at=now + timedelta(seconds=self.result_ttl), updated_at=now)
+                )
+        except Exception as e:
+            logger.error(f"AI lease complete failed: {e}")
+
+    def _release(self, key):
+        after_transaction(lambda: self._drop(key))
+
+    def _drop(self, key):
+        from app.models.ai_lease import AILease
+        table = AILease.__table__
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(delete(table).where(table.c.lease_key == key, table.c.owner == self.owner))
+        except Exception as e:
+            logger.error(f"AI lease release failed: {e}")
+
+    def prune(self):
+        """Drop leases whose owner died and results nobody is waiting for any more"""
+        from app.models.ai_lease import AILease
+        table = AILease.__table__
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(delete(table).where(table.c.expires_at < datetime.utcnow()))
+        except Exception as e:
+            logger.error(f"AI lease prune failed: {e}")
+
+    def get_stats(self):
+        with self.lock:
+            return dict(self.stats, in_flight=len(self.flights))
+
+_single_flight = None
+_single_flight_lock = threading.Lock()
+
+def get_single_flight():
+    """Return the process-wide single-flight group, or None when coalescing is disabled"""
+    global _single_flight
+    config = current_app.config if has_app_context() else {}
+    if not config.get('AI_SINGLE_FLIGHT_ENABLED', True):
+        return None
+    with _single_flight_lock:
+        if _single_flight is None:
+            _single_flight = SingleFlight(
+                lease_ttl=config.get('AI_SINGLE_FLIGHT_LEASE_TTL', 120),
+                poll_interval=config.get('AI_SINGLE_FLIGHT_POLL_INTERVAL', 0.25),
+                result_ttl=config.get('AI_SINGLE_FLIGHT_RESULT_TTL', 30)
+            )
+    return _single_flight
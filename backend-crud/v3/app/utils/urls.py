@@ -0,0 +1,39 @@
+import hashlib
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+# Query parameters that only track where a visit came from; the page is the same without them
+TRACKING_PARAMS = frozenset(('fbclid', 'gclid', 'dclid', 'msclkid', 'mc_cid', 'mc_eid', 'ref_src', '_ga'))
+
+def _is_tracking(name):
+    name = name.lower()
+    return name.startswith('utm_') or name in TRACKING_PARAMS
+
+def normalize_url(url):
+    """
+    The form of a page URL used to match highlights to the page they were
+    made on: lowercase scheme and host, no default port, user info or
+    fragment, no trailing slash, and sorted query parameters without tracking ones.
+    """
+    url = (url or '').strip()
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    if not parts.scheme or not parts.netloc:
+        return url
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if ':' in host:
+        host = f"[{host}]"  # IPv6 literal
+    if port and DEFAULT_PORTS.get(scheme) != port:
+        host = f"{host}:{port}"
+    path = parts.path.rstrip('/') or '/'
+    query = urlencode(sorted((name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+                             if not _is_tracking(name)))
+    return urlunsplit((scheme, host, path, query, ''))
+
+def url_hash(url):
+    """Fixed-width key of a URL: sha256 hex of its normalized form"""
+    return hashlib.sha256(normalize_url(url).encode('utf-8')).hexdigest()
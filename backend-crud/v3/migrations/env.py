@@ -51,6 +51,18 @@ def get_metadata():
     return target_db.metadata
 
 
+def include_object(object, name, type_, reflected, compare_to):
+    # The search_documents_fts FTS5 table and its shadow tables are created by
+    # DDL in app/models/search_document.py, not by the models, so autogenerate
+    # would otherwise emit drop_table for them on SQLite
+    if type_ == 'table' and name.startswith('search_documents_fts'):
+        return False
+    # The FULLTEXT index on search_documents.body only exists on MySQL
+    if type_ == 'index' and name == 'ix_search_documents_body':
+        return context.get_context().dialect.name == 'mysql'
+    return True
+
+
 def run_migrations_offline():
     """Run migrations in 'offline' mode.
 
@@ -65,7 +77,8 @@ def run_migrations_offline():
     """
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url, target_metadata=get_metadata(), literal_binds=True
+        url=url, target_metadata=get_metadata(), literal_binds=True,
+        include_object=include_object
     )
 
     with context.begin_transaction():
@@ -93,6 +106,8 @@ def run_migrations_online():
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    if conf_args.get("include_object") is None:
+        conf_args["include_object"] = include_object
 
     connectable = get_engine()
 
@@ -0,0 +1,106 @@
+"""key search_documents_fts by search_rowid
+
+Revision ID: a4c2e8f61b39
+Revises: c7b95e2f0a61
+Create Date: 2026-10-18 23:12:40.528931
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from datetime import datetime, timedelta
+
+# Same statements as app/models/search_document.py, copied so the migration does not depend on the model
+SQLITE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_documents_fts USING fts5("
+    "body, content='search_documents', content_rowid='search_rowid', tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS search_documents_ai AFTER INSERT ON search_documents BEGIN "
+    "INSERT INTO search_documents_fts(rowid, body) VALUES (new.search_rowid, new.body); END",
+    "CREATE TRIGGER IF NOT EXISTS search_documents_ad AFTER DELETE ON search_documents BEGIN "
+    "INSERT INTO search_documents_fts(search_documents_fts, rowid, body) "
+    "VALUES ('delete', old.search_rowid, old.body); END",
+    "CREATE TRIGGER IF NOT EXISTS search_documents_au AFTER UPDATE ON search_documents BEGIN "
+    "INSERT INTO search_documents_fts(search_documents_fts, rowid, body) "
+    "VALUES ('delete', old.search_rowid, old.body); "
+    "INSERT INTO search_documents_fts(rowid, body) VALUES (new.search_rowid, new.body); END",
+]
+
+# The d5e27b9a4f18 index, keyed by the implicit rowid
+PREVIOUS_SQLITE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_documents_fts USING fts5("
+    "body, content='search_documents', content_rowid='rowid', tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS search_documents_ai AFTER INSERT ON search_documents BEGIN "
+    "INSERT INTO search_documents_fts(rowid, body) VALUES (new.rowid, new.body); END",
+    "CREATE TRIGGER IF NOT EXISTS search_documents_ad AFTER DELETE ON search_documents BEGIN "
+    "INSERT INTO search_documents_fts(search_documents_fts, rowid, body) VALUES ('delete', old.rowid, old.body); END",
+    "CREATE TRIGGER IF NOT EXISTS search_documents_au AFTER UPDATE ON search_documents BEGIN "
+    "INSERT INTO search_documents_fts(search_documents_fts, rowid, body) VALUES ('delete', old.rowid, old.body); "
+    "INSERT INTO search_documents_fts(rowid, body) VALUES (new.rowid, new.body); END",
+]
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4c2e8f61b39'
+down_revision = 'c7b95e2f0a61'
+branch_labels = None
+depends_on = None
+
+
+def drop_sqlite_fts():
+    for name in ('search_documents_ai', 'search_documents_ad', 'search_documents_au'):
+        op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    op.execute("DROP TABLE IF EXISTS search_documents_fts")
+
+
+def create_sqlite_fts(statements):
+    for statement in statements:
+        op.execute(statement)
+    op.execute("INSERT INTO search_documents_fts(search_documents_fts) VALUES ('rebuild')")
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'sqlite':
+        drop_sqlite_fts()
+
+    # ### commands auto generated by Alembic - please adjust! ###
+    with op.batch_alter_table('search_documents', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('search_rowid', sa.BigInteger(), nullable=True))
+
+    # ### end Alembic commands ###
+    # Keys increase with updated_at, as new_search_rowid() gives them: microseconds shifted by 10 bits
+    documents = sa.table('search_documents', sa.column('id'), sa.column('search_rowid'))
+    rows = bind.execute(sa.text("SELECT id, updated_at FROM search_documents ORDER BY updated_at, id")).all()
+    values, last = [], 0
+    for row_id, updated_at in rows:
+        if isinstance(updated_at, str):
+            updated_at = datetime.fromisoformat(updated_at)
+        last = max((updated_at - datetime(1970, 1, 1)) // timedelta(microseconds=1) << 10, last + 1)
+        values.append({'row_id': row_id, 'search_rowid': last})
+    for start in range(0, len(values), 1000):
+        bind.execute(
+            documents.update().where(documents.c.id == sa.bindparam('row_id'))
+            .values(search_rowid=sa.bindparam('search_rowid')),
+            values[start:start + 1000]
+        )
+
+    with op.batch_alter_table('search_documents', schema=None) as batch_op:
+        batch_op.alter_column('search_rowid', existing_type=sa.BigInteger(), nullable=False)
+        batch_op.create_index('ix_search_documents_search_rowid', ['search_rowid'], unique=True)
+
+    if bind.dialect.name == 'sqlite':
+        create_sqlite_fts(SQLITE_FTS_DDL)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'sqlite':
+        drop_sqlite_fts()
+
+    # ### commands auto generated by Alembic - please adjust! ###
+    with op.batch_alter_table('search_documents', schema=None) as batch_op:
+        batch_op.drop_index('ix_search_documents_search_rowid')
+        batch_op.drop_column('search_rowid')
+
+    # ### end Alembic commands ###
+    if bind.dialect.name == 'sqlite':
+        create_sqlite_fts(PREVIOUS_SQLITE_FTS_DDL)
@@ -0,0 +1,97 @@
+"""merge duplicate highlights and make content_hash not null
+
+Revision ID: b3e9d1a7c254
+Revises: a4c2e8f61b39
+Create Date: 2026-10-18 23:41:17.206583
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import hashlib
+import unicodedata
+import uuid
+from datetime import datetime
+
+from app.utils.urls import normalize_url
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3e9d1a7c254'
+down_revision = 'a4c2e8f61b39'
+branch_labels = None
+depends_on = None
+
+
+def content_hash(user_id, url, text):
+    # Same as Highlight.compute_content_hash at the time of this revision
+    text = ' '.join(unicodedata.normalize('NFC', text or '').split())
+    return hashlib.sha256('\n'.join((user_id or '', normalize_url(url), text)).encode('utf-8')).hexdigest()
+
+
+def upgrade():
+    # c7b95e2f0a61 left a NULL hash on every copy of a duplicate but the oldest.
+    # Each copy is merged into the row holding its hash (or the oldest copy when
+    # none does): summaries and coverage point at the kept row, which takes over
+    # a collection or client_key it lacks, and sync clients get a tombstone.
+    bind = op.get_bind()
+    highlights = sa.table('highlights', sa.column('id'), sa.column('user_id'), sa.column('collection_id'),
+                          sa.column('client_key'), sa.column('content_hash'), sa.column('updated_at'))
+    links = sa.table('summary_highlights', sa.column('summary_id'), sa.column('highlight_id'))
+    summaries = sa.table('summaries', sa.column('id'), sa.column('coverage', sa.JSON))
+    documents = sa.table('search_documents', sa.column('entity_type'), sa.column('entity_id'))
+    tombstones = sa.table('tombstones', sa.column('id'), sa.column('entity_type'), sa.column('entity_id'),
+                          sa.column('user_id'), sa.column('updated_at'))
+    now = datetime.utcnow()
+
+    keepers = {(user_id, value): [row_id, collection_id, client_key] for row_id, user_id, collection_id, client_key, value
+               in bind.execute(sa.text("SELECT id, user_id, collection_id, client_key, content_hash FROM highlights "
+                                       "WHERE content_hash IS NOT NULL")).all()}
+    rows = bind.execute(sa.text("SELECT id, user_id, url, text, collection_id, client_key FROM highlights "
+                                "WHERE content_hash IS NULL ORDER BY timestamp, id")).all()
+    merged = {}
+    for row_id, user_id, url, text, collection_id, client_key in rows:
+        value = content_hash(user_id, url, text)
+        keeper = keepers.get((user_id, value))
+        if keeper is None:
+            keepers[(user_id, value)] = [row_id, collection_id, client_key]
+            bind.execute(highlights.update().where(highlights.c.id == row_id).values(content_hash=value))
+            continue
+        keeper_id = keeper[0]
+        merged[row_id] = keeper_id
+
+        linked = set(bind.execute(sa.select(links.c.summary_id).where(links.c.highlight_id == keeper_id)).scalars())
+        for summary_id in bind.execute(sa.select(links.c.summary_id).where(links.c.highlight_id == row_id)).scalars().all():
+            if summary_id not in linked:
+                bind.execute(links.insert().values(summary_id=summary_id, highlight_id=keeper_id))
+        bind.execute(links.delete().where(links.c.highlight_id == row_id))
+        bind.execute(documents.delete().where(documents.c.entity_type == 'highlight', documents.c.entity_id == row_id))
+        bind.execute(highlights.delete().where(highlights.c.id == row_id))
+        bind.execute(tombstones.insert().values(id=str(uuid.uuid4()), entity_type='highlight', entity_id=row_id,
+                                                user_id=user_id, updated_at=now))
+
+        changes = {}
+        if keeper[1] is None and collection_id is not None:
+            changes['collection_id'] = keeper[1] = collection_id
+        if keeper[2] is None and client_key is not None:
+            changes['client_key'] = keeper[2] = client_key
+        if changes:
+            bind.execute(highlights.update().where(highlights.c.id == keeper_id).values(updated_at=now, **changes))
+
+    if merged:
+        for summary_id, coverage in bind.execute(sa.select(summaries.c.id, summaries.c.coverage)).all():
+            stale = [highlight_id for highlight_id in coverage or {} if highlight_id in merged]
+            if not stale:
+                continue
+            for highlight_id in stale:
+                coverage.setdefault(merged[highlight_id], coverage[highlight_id])
+                del coverage[highlight_id]
+            bind.execute(summaries.update().where(summaries.c.id == summary_id).values(coverage=coverage))
+
+    with op.batch_alter_table('highlights', schema=None) as batch_op:
+        batch_op.alter_column('content_hash', existing_type=sa.String(length=64), nullable=False)
+
+
+def downgrade():
+    # Merged duplicates are not restored
+    with op.batch_alter_table('highlights', schema=None) as batch_op:
+        batch_op.alter_column('content_hash', existing_type=sa.String(length=64), nullable=True)
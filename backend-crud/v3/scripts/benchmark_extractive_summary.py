@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Time the local extractive summarizer against collections of different sizes.
+
+Highlights are generated from a fixed vocabulary with a fixed seed, so runs
+are comparable across machines and commits:
+    python scripts/benchmark_extractive_summary.py
+    python scripts/benchmark_extractive_summary.py --sizes 100 1000 10000 --repeat 5
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app.utils.extractive_summary import summarize
+
+TOPICS = ["photosynthesis", "mitochondria", "enzymes", "osmosis", "ribosomes", "chlorophyll",
+          "glucose", "membranes", "proteins", "genetics", "evolution", "ecosystems"]
+VERBS = ["converts", "regulates", "produces", "transports", "depends on", "breaks down", "stores", "controls"]
+OBJECTS = ["light energy", "chemical energy", "cell growth", "water balance", "amino acids",
+           "genetic information", "carbon dioxide", "oxygen levels", "metabolic pathways"]
+
+def make_highlights(count, rng):
+    highlights = []
+    for _ in range(count):
+        sentences = []
+        for _ in range(rng.randint(1, 3)):
+            sentences.append(f"The process of {rng.choice(TOPICS)} {rng.choice(VERBS)} "
+                             f"{rng.choice(OBJECTS)} in living {rng.choice(TOPICS)} cells.")
+        highlights.append(" ".join(sentences))
+    return highlights
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000, 5000],
+                        help="Collection sizes, in highlights")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per size; the median is reported")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'highlights':>10} {'median ms':>10} {'min ms':>10} {'sentences':>10}")
+    for size in args.sizes:
+        highlights = make_highlights(size, random.Random(args.seed))
+        timings, picked = [], []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            picked = summarize(highlights)
+            timings.append((time.perf_counter() - started) * 1000)
+        print(f"{size:>10} {statistics.median(timings):>10.1f} {min(timings):>10.1f} {len(picked):>10}")
+
+if __name__ == '__main__':
+    main()
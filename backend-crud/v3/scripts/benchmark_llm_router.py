@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Compare chat-completion latency with and without hedged requests.
+
+Starts two local mock LLM servers (scripts/mock_llm_server.py): a primary
+with a heavy latency tail and a backup, then sends the same sequence of
+calls through the LLM router with hedging off and on, and reports latency
+percentiles, the share of hedged calls and how many the hedge won:
+    python scripts/benchmark_llm_router.py
+    python scripts/benchmark_llm_router.py --calls 400 --primary-latency lognormal:0.3,1.2
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SCRIPTS_DIR, '..'))
+
+from app.utils.ai_telemetry import percentile
+from app.utils.llm_client import LLMClient, LLMError
+from app.utils.llm_router import LLMRouter, Provider
+
+def start_mock(port, latency, seed):
+    process = subprocess.Popen([sys.executable, os.path.join(SCRIPTS_DIR, 'mock_llm_server.py'),
+                                '--port', str(port), '--latency', latency, '--seed', str(seed),
+                                '--canned', '--quiet'])
+    time.sleep(0.5)
+    return process
+
+def run(router, calls, concurrency):
+    payload = {"model": "mock", "messages": [{"role": "user", "content": "Summarize: benchmark"}]}
+
+    def call(_):
+        started = time.perf_counter()
+        try:
+            router.chat(payload)
+        except LLMError:
+            return None
+        return time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = sorted(l for l in executor.map(call, range(calls)) if l is not None)
+    return latencies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--primary-latency', default='lognormal:0.2,1.0')
+    parser.add_argument('--backup-latency', default='lognormal:0.3,0.5')
+    parser.add_argument('--percentile', type=float, default=0.95, help="Hedge after this primary latency percentile")
+    parser.add_argument('--max-rate', type=float, default=0.1, help="Largest share of calls that may be hedged")
+    parser.add_argument('--port', type=int, default=8091, help="Primary port; the backup uses the next one")
+    args = parser.parse_args()
+
+    servers = [start_mock(args.port, args.primary_latency, 1), start_mock(args.port + 1, args.backup_latency, 2)]
+    try:
+        print(f"{'hedging':>8} {'p50 s':>8} {'p95 s':>8} {'p99 s':>8} {'max s':>8} {'hedged':>8} {'won':>6}")
+        for hedge_enabled in (False, True):
+            clients = [LLMClient(f"http://127.0.0.1:{port}/openai/v1/chat/completions", 'mock',
+                                 max_in_flight=2 * args.concurrency)
+                       for port in (args.port, args.port + 1)]
+            # Only the primary takes regular traffic; the backup just answers hedges
+            router = LLMRouter([Provider('primary', clients[0], 'mock', 1.0),
+                                Provider('backup', clients[1], 'mock', 0.0)],
+                               hedge_enabled=hedge_enabled, hedge_percentile=args.percentile,
+                               hedge_min_delay=0.1, hedge_default_delay=1.0,
+                               hedge_max_rate=args.max_rate, max_workers=4 * args.concurrency)
+            latencies = run(router, args.calls, args.concurrency)
+            stats = router.get_stats()
+            print(f"{'on' if hedge_enabled else 'off':>8} {percentile(latencies, 0.5):>8.3f} "
+                  f"{percentile(latencies, 0.95):>8.3f} {percentile(latencies, 0.99):>8.3f} "
+                  f"{latencies[-1]:>8.3f} {stats['hedged']:>8} {stats['hedge_wins']:>6}")
+    finally:
+        for server in servers:
+            server.terminate()
+
+if __name__ == '__main__':
+    main()
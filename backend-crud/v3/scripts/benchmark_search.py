@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Time full-text search over a large library on SQLite (FTS5).
+
+Builds a throwaway database with one user whose highlights are generated
+from a fixed vocabulary and seed, plus highlights of other users the search
+must skip, then reports latency percentiles for a few kinds of queries:
+    python scripts/benchmark_search.py
+    python scripts/benchmark_search.py --highlights 100000 --repeat 50
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app.config import Config
+
+SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "ta", "vo", "zi", "pe", "so", "du", "fa", "gri", "bel", "tor", "mon"]
+COMMON = ["energy", "cells", "process", "system", "protein", "light", "growth", "water"]
+
+def make_vocabulary(size, rng):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+def make_text(vocabulary, rng):
+    words = [rng.choice(vocabulary) if rng.random() < 0.7 else rng.choice(COMMON) for _ in range(rng.randint(8, 40))]
+    return " ".join(words).capitalize() + "."
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--highlights', type=int, default=100000, help="Highlights of the searching user")
+    parser.add_argument('--other-highlights', type=int, default=20000, help="Highlights of other users")
+    parser.add_argument('--repeat', type=int, default=20, help="Runs per query; median and p95 are reported")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    database = os.path.join(tempfile.mkdtemp(), 'search.db')
+    Config.SQLALCHEMY_DATABASE_URI = 'sqlite:///' + database
+    from app import create_app
+    from app.facade.search_facade import SearchFacade
+    from app.models.search_document import SearchDocument, document_row
+    from app.utils.db import db
+    from sqlalchemy import insert
+
+    app = create_app()
+    rng = random.Random(args.seed)
+    vocabulary = make_vocabulary(20000, rng)
+    user_id, other_user_id = str(uuid.uuid4()), str(uuid.uuid4())
+    with app.app_context():
+        db.create_all()
+        started = time.perf_counter()
+        for owner, count in ((user_id, args.highlights), (other_user_id, args.other_highlights)):
+            for offset in range(0, count, 5000):
+                db.session.execute(insert(SearchDocument), [
+                    document_row('highlight', str(uuid.uuid4()), owner, None, make_text(vocabulary, rng))
+                    for _ in range(min(5000, count - offset))
+                ])
+        db.session.commit()
+        print(f"Indexed {args.highlights + args.other_highlights} highlights in {time.perf_counter() - started:.1f} s")
+
+        queries = {
+            "common word": (user_id, "energy"),
+            "rare word": (user_id, vocabulary[len(vocabulary) // 2]),
+            "two words": (user_id, f"light {vocabulary[7]}"),
+            "prefix": (user_id, vocabulary[100][:4]),
+            "other user": (other_user_id, "energy"),  # A smaller library, so still ranked
+        }
+        print(f"{'query':>12} {'median ms':>10} {'p95 ms':>10} {'results':>8}")
+        for name, (searcher, q) in queries.items():
+            timings, results = [], []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                results = SearchFacade.search(searcher, q)
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            p95 = timings[min(int(0.95 * len(timings)), len(timings) - 1)]
+            print(f"{name:>12} {statistics.median(timings):>10.1f} {p95:>10.1f} {len(results):>8}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Local Groq/OpenAI-compatible chat-completions server for load and latency testing.
+
+Speaks POST .../chat/completions (plain and stream=true), with configurable
+latency distributions, error rates, 429 bursts and canned or derived outputs,
+so the summary and quiz paths can be benchmarked without network or API quota.
+
+Point the backend at it with:
+    GROQ_API_URL=http://127.0.0.1:8081/openai/v1/chat/completions GROQ_API_KEY=mock python run.py
+
+Latency specs:
+    fixed:SECONDS
+    uniform:LOW,HIGH
+    normal:MEAN,STDDEV
+    lognormal:MEDIAN,SIGMA
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+QUIZ_LABELS = ["A", "B", "C", "D"]
+
+def parse_latency(spec):
+    """Turn a latency spec into a zero-argument sampler returning seconds"""
+    kind, _, params = spec.partition(':')
+    values = [float(v) for v in params.split(',')] if params else []
+    if kind == 'fixed':
+        return lambda: values[0]
+    if kind == 'uniform':
+        return lambda: random.uniform(values[0], values[1])
+    if kind == 'normal':
+        return lambda: max(random.gauss(values[0], values[1]), 0.0)
+    if kind == 'lognormal':
+        return lambda: random.lognormvariate(math.log(values[0]), values[1])
+    raise argparse.ArgumentTypeError(f"Unknown latency spec: {spec}")
+
+def estimate_tokens(text):
+    return len(text) // 4 + 1
+
+def split_sentences(text):
+    return [s.strip() for s in re.split(r'(?<=[.!?])\s+', text) if len(s.strip()) > 20]
+
+def derive_summary(prompt):
+    """Build a plausible summary from the highlights or partial summaries in the prompt"""
+    section = prompt
+    for marker in ('**Highlights:**', '**Partial Summaries:**', '**Existing Summary:**'):
+        if marker in prompt:
+            section = prompt.split(marker, 1)[1]
+            break
+    section = section.split('**Output:**', 1)[0]
+    sources = re.findall(r'^- (.+)$', section, flags=re.MULTILINE)
+    sources += [p for p in re.split(r'--- Part \d+ ---', section) if p.strip() and not p.strip().startswith('- ')]
+    sentences = []
+    for source in sources or [section]:
+        found = split_sentences(source)
+        sentences.append(found[0] if found else source.strip())
+    return "Summary: " + " ".join(s for s in sentences[:12] if s)
+
+def derive_quiz(prompt, json_object=False):
+    """Build multiple-choice questions from the sentences of the summary in the prompt"""
+    match = re.search(r'exactly (\d+)', prompt)
+    count = int(match.group(1)) if match else 4
+    summary = prompt.split('==== Summary ====')[-1]
+    # Sharded quizzes name the section of the summary each call should cover
+    focus = re.search(r'ask only about this section of it:\n(.+?)\n', prompt)
+    sentences = split_sentences(focus.group(1) if focus else summary) or ["The summary covers the selected highlights."]
+    questions = []
+    for i in range(count):
+        sentence = sentences[i % len(sentences)]
+        words = re.findall(r'[A-Za-z]{5,}', sentence) or ["content"]
+        answer = words[len(words) // 2]
+        distractors = [w for w in re.findall(r'[A-Za-z]{5,}', summary) if w.lower() != answer.lower()]
+        random.shuffle(distractors)
+        options = [answer] + (distractors + ["None", "All", "Other"])[:3]
+        random.shuffle(options)
+        questions.append({
+            "question": "Which word completes: " + re.sub(rf'\b{answer}\b', '_____', sentence, count=1),
+            "options": dict(zip(QUIZ_LABELS, options)),
+            "correct_answer": QUIZ_LABELS[options.index(answer)]
+        })
+    return json.dumps({"questions": questions} if json_object else questions)
+
+class MockState:
+    def __init__(self, args):
+        self.args = args
+        self.latency = parse_latency(args.latency)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.responses = {}
+        self.burst_remaining = 0
+
+    def next_outcome(self):
+        """Decide the status code for the next request"""
+        with self.lock:
+            self.requests += 1
+            if self.burst_remaining > 0:
+                self.burst_remaining -= 1
+                status = 429
+            elif self.args.burst_every and self.requests % self.args.burst_every == 0:
+                self.burst_remaining = self.args.burst_length - 1
+                status = 429
+            elif random.random() < self.args.error_rate:
+                status = 500
+            else:
+                status = 200
+            self.responses[status] = self.responses.get(status, 0) + 1
+            return status
+
+    def completion_text(self, payload):
+        prompt = payload.get("messages", [{}])[-1].get("content", "")
+        json_object = (payload.get("response_format") or {}).get("type") == "json_object"
+        is_quiz = 'quiz generator' in prompt.lower()
+        if self.args.canned:
+            if is_quiz and self.args.canned_quiz:
+                with open(self.args.canned_quiz) as f:
+                    return f.read()
+            if not is_quiz and self.args.canned_summary:
+                return self.args.canned_summary
+        return derive_quiz(prompt, json_object) if is_quiz else derive_summary(prompt)
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            if not state.args.quiet:
+                super().log_message(format, *args)
+
+        def _send_json(self, status, body, headers=None):
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path.rstrip('/') == '/stats':
+                with state.lock:
+                    return self._send_json(200, {'requests': state.requests, 'responses': state.responses})
+            self._send_json(404, {'error': {'message': 'Not found'}})
+
+        def do_POST(self):
+            if not self.path.rstrip('/').endswith('/chat/completions'):
+                return self._send_json(404, {'error': {'message': 'Not found'}})
+            length = int(self.headers.get('Content-Length', 0))
+            try:
+                payload = json.loads(self.rfile.read(length) or b'{}')
+            except ValueError:
+                return self._send_json(400, {'error': {'message': 'Invalid JSON body'}})
+
+            status = state.next_outcome()
+            time.sleep(state.latency())
+            if status == 429:
+                return self._send_json(429, {'error': {'message': 'Rate limit reached', 'type': 'rate_limit_exceeded'}},
+                                       {'Retry-After': str(state.args.retry_after)})
+            if status != 200:
+                return self._send_json(status, {'error': {'message': 'Mock upstream error', 'type': 'server_error'}})
+
+            text = state.completion_text(payload)
+            prompt_text = " ".join(m.get("content", "") for m in payload.get("messages", []))
+            model = payload.get("model", "mock-model")
+            usage = {
+                "prompt_tokens": estimate_tokens(prompt_text),
+                "completion_tokens": estimate_tokens(text),
+                "total_tokens": estimate_tokens(prompt_text) + estimate_tokens(text)
+            }
+            completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+            if payload.get("stream"):
+                return self._stream(completion_id, model, text)
+            self._send_json(200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                "usage": usage
+            })
+
+        def _stream(self, completion_id, model, text):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            chunks = re.findall(r'\S+\s*', text)
+            for i, chunk in enumerate(chunks):
+                event = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": chunk}, "finish_reason": None}]
+                }
+                self.wfile.write(f"data: {json.dumps(event)}\n\n".encode('utf-8'))
+                self.wfile.flush()
+                if i + 1 < len(chunks):
+                    time.sleep(state.args.token_delay)
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+            self.close_connection = True
+
+    return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Groq/OpenAI chat-completions server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency', default='fixed:0.2',
+                        help="Time before the first byte, e.g. fixed:0.5, uniform:0.2,2, lognormal:1.0,0.6")
+    parser.add_argument('--token-delay', type=float, default=0.02, help="Seconds between streamed chunks")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests answered with 500")
+    parser.add_argument('--burst-every', type=int, default=0, help="Start a 429 burst every N requests (0 = never)")
+    parser.add_argument('--burst-length', type=int, default=3, help="Number of consecutive 429 responses per burst")
+    parser.add_argument('--retry-after', type=float, default=1, help="Retry-After seconds sent with 429 responses")
+    parser.add_argument('--canned', action='store_true', help="Return canned outputs instead of deriving them")
+    parser.add_argument('--canned-summary', default="This is a canned summary from the mock LLM server.")
+    parser.add_argument('--canned-quiz', help="Path to a file whose content is returned for quiz prompts")
+    parser.add_argument('--seed', type=int, help="Random seed for reproducible runs")
+    parser.add_argument('--quiet', action='store_true', help="Do not log every request")
+    args = parser.parse_args()
+
+    try:
+        parse_latency(args.latency)
+    except (argparse.ArgumentTypeError, IndexError, ValueError) as e:
+        parser.error(f"Invalid --latency: {e}")
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(MockState(args)))
+    print(f"🧪 Mock LLM server listening on http://{args.host}:{args.port}/openai/v1/chat/completions")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Shutting down")
+        server.server_close()
+        sys.exit(0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+from datetime import datetime
+
+import pytest
+
+from app import create_app
+from app.config import Config
+from app.utils.db import db
+
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    # Extensions read the database URI when the app is created
+    original = Config.SQLALCHEMY_DATABASE_URI
+    Config.SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path_factory.mktemp('db') / 'test.db'}"
+    try:
+        app = create_app()
+    finally:
+        Config.SQLALCHEMY_DATABASE_URI = original
+    app.config.update(TESTING=True, AI_EAGER_QUIZ_ENABLED=False, AI_CACHE_ENABLED=False)
+    return app
+
+
+@pytest.fixture
+def session(app):
+    with app.app_context():
+        db.create_all()
+        yield db.session
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def user(session):
+    from app.models.user import User
+    user = User(username='student', email='student@example.com')
+    session.add(user)
+    session.commit()
+    return user
+
+
+@pytest.fixture
+def summary(session, user):
+    from app.models.collection import Collection
+    from app.models.summary import Summary
+    collection = Collection(title='Biology', timestamp=datetime.utcnow(), user_id=user.id)
+    session.add(collection)
+    session.flush()
+    summary = Summary(content='Photosynthesis converts light energy into chemical energy in plants.',
+                      timestamp=datetime.utcnow(), collection_id=collection.id, user_id=user.id)
+    session.add(summary)
+    session.commit()
+    return summary
+
+
+@pytest.fixture
+def client(app, session):
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_headers(user):
+    from flask_jwt_extended import create_access_token
+    return {'Authorization': f'Bearer {create_access_token(identity=user.id)}'}
+
+
+@pytest.fixture
+def collaborator(session, summary):
+    """A second user collaborating on the collection of `summary`"""
+    from app.models.user import User
+    peer = User(username='peer', email='peer@example.com')
+    session.add(peer)
+    summary.collection.collaborators.append(peer)
+    session.commit()
+    return peer
+
+
+@pytest.fixture
+def collaborator_headers(collaborator):
+    from flask_jwt_extended import create_access_token
+    return {'Authorization': f'Bearer {create_access_token(identity=collaborator.id)}'}
@@ -0,0 +1,62 @@
+import time
+from datetime import datetime
+
+import pytest
+
+from app.models.ai_cache_entry import AICacheEntry
+from app.models.collection import Collection
+from app.utils.ai_cache import AICache
+from app.utils.llm_router import LLMRouter, Provider
+
+
+@pytest.fixture
+def cache(session):
+    return AICache()
+
+
+def stored(key):
+    return AICacheEntry.query.filter_by(cache_key=key).one_or_none()
+
+
+def test_write_waits_for_the_sessions_transaction(session, user, cache):
+    session.add(Collection(title='Pending', timestamp=datetime.utcnow(), user_id=user.id))
+    session.flush()
+    started = time.monotonic()
+    cache.set('key', 'summary', 'content')
+    # Written straight away, the entry would wait on the session's write lock
+    assert time.monotonic() - started < 1
+    session.commit()
+    assert stored('key').value == 'content'
+
+
+def test_write_is_immediate_without_a_transaction(session, cache):
+    session.commit()
+    cache.set('key', 'summary', 'content')
+    assert session.info.get('pending_writes') is None
+    assert stored('key').value == 'content'
+
+
+def test_write_survives_a_rollback(session, user, cache):
+    session.add(Collection(title='Discarded', timestamp=datetime.utcnow(), user_id=user.id))
+    session.flush()
+    cache.set('key', 'summary', 'content')
+    session.rollback()
+    assert stored('key').value == 'content'
+    assert Collection.query.filter_by(title='Discarded').count() == 0
+
+
+def test_hits_are_counted_after_the_transaction(session, user, cache):
+    session.commit()
+    cache.set('key', 'summary', 'content')
+    cache.memory.clear()
+    session.add(Collection(title='Pending', timestamp=datetime.utcnow(), user_id=user.id))
+    session.flush()
+    assert cache.get('key') == 'content'
+    session.commit()
+    assert stored('key').hits == 1
+
+
+def test_cache_key_models_follow_the_configured_providers():
+    router = LLMRouter([Provider('groq', None, None), Provider('backup', None, 'llama-3.1-8b')],
+                       hedge_enabled=False, max_workers=1)
+    assert router.models('llama3-70b-8192') == ['backup:llama-3.1-8b', 'groq:llama3-70b-8192']
@@ -0,0 +1,56 @@
+from app.utils import ai_service
+from app.utils.ai_service import AIService
+from app.utils.dedup import deduplicate_highlights
+
+BASE = ("Mitochondria produce most of the chemical energy needed to power the biochemical "
+        "reactions of the cell and store it in adenosine triphosphate")
+
+
+class FakeHighlight:
+    def __init__(self, text):
+        self.text = text
+
+
+def test_exact_duplicates_keep_the_first():
+    result = deduplicate_highlights([BASE, BASE.upper(), "Ribosomes build proteins from amino acids"])
+    assert result.kept == [BASE, "Ribosomes build proteins from amino acids"]
+    assert result.removed == [BASE.upper()]
+    assert result.tokens_saved == len(BASE) // 4 + 2
+
+
+def test_near_duplicate_keeps_the_longest():
+    longer = BASE + " molecules"
+    result = deduplicate_highlights([BASE, "Ribosomes build proteins from amino acids", longer])
+    assert result.kept == ["Ribosomes build proteins from amino acids", longer]
+    assert result.removed == [BASE]
+
+
+def test_contained_highlight_is_a_duplicate():
+    excerpt = "produce most of the chemical energy needed to power the biochemical reactions of the cell"
+    result = deduplicate_highlights([excerpt, BASE], threshold=0.8)
+    assert result.kept == [BASE]
+
+
+def test_distinct_highlights_are_kept():
+    texts = [f"Highlight number {i} talks about a completely different topic {i * 7}" for i in range(50)]
+    texts += ["The water cycle moves water between the oceans, the atmosphere and the land"]
+    result = deduplicate_highlights(texts)
+    assert len(result.kept) + len(result.removed) == len(texts)
+    assert texts[-1] in result.kept
+    assert result.tokens_saved == sum(len(t) // 4 + 2 for t in result.removed)
+
+
+def test_models_are_returned_as_given():
+    highlights = [FakeHighlight(BASE), FakeHighlight(BASE)]
+    result = deduplicate_highlights(highlights)
+    assert result.kept == [highlights[0]]
+    assert result.removed == [highlights[1]]
+
+
+def test_fallback_summary_is_deduplicated(app, monkeypatch):
+    monkeypatch.setattr(ai_service, 'get_llm_router', lambda *args: None)
+    highlights = [FakeHighlight(BASE + "."), FakeHighlight(BASE + " molecules."),
+                  FakeHighlight("Ribosomes build proteins from amino acids.")]
+    with app.app_context():
+        content = AIService().generate_summary_from_highlights(highlights)
+    assert content == BASE + " molecules. Ribosomes build proteins from amino acids."
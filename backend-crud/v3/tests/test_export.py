@@ -0,0 +1,61 @@
+import gzip
+import json
+from datetime import datetime
+
+from app.models.quiz import Quiz
+from app.models.quiz_attempt import QuizAttempt
+
+QUESTIONS = [{'question': 'What does chlorophyll absorb?', 'options': {'A': 'Light', 'B': 'Water'},
+              'correct_answer': 'A'}]
+
+
+def add_quiz(session, summary, **fields):
+    quiz = Quiz(summary_id=summary.id, title='Photosynthesis', questions=QUESTIONS, timestamp=datetime.utcnow(),
+                **fields)
+    session.add(quiz)
+    session.commit()
+    return quiz
+
+
+def records(response):
+    body = response.get_data()
+    if response.headers.get('Content-Encoding') == 'gzip':
+        body = gzip.decompress(body)
+    return [json.loads(line) for line in body.decode('utf-8').splitlines()]
+
+
+def test_export_keeps_correct_answers(client, auth_headers, session, summary):
+    quiz_id = add_quiz(session, summary).id
+    exported = [r for r in records(client.get('/api/export', headers=auth_headers)) if r['type'] == 'quiz']
+    assert [r['data']['id'] for r in exported] == [quiz_id]
+    assert exported[0]['data']['questions'] == QUESTIONS
+    assert 'summary' not in exported[0]['data']
+
+
+def test_export_skips_unclaimed_pregenerated_quizzes(client, auth_headers, session, summary):
+    add_quiz(session, summary, pregenerated=True, pregenerated_at=datetime.utcnow())
+    exported = records(client.get('/api/export', headers=auth_headers))
+    assert [r['type'] for r in exported] == ['export', 'collection', 'summary', 'end']
+
+
+def test_export_resumes_after_a_cursor(client, auth_headers, session, summary):
+    add_quiz(session, summary)
+    full = records(client.get('/api/export', headers={**auth_headers, 'Accept-Encoding': 'gzip'}))
+    resumed = records(client.get(f"/api/export?cursor={full[2]['cursor']}", headers=auth_headers))
+    assert resumed == full[3:]
+
+
+def test_collaborator_gets_answers_only_for_quizzes_they_attempted(client, collaborator_headers, collaborator,
+                                                                   session, summary):
+    quiz_id = add_quiz(session, summary).id
+
+    def exported_questions():
+        exported = records(client.get('/api/export', headers=collaborator_headers))
+        return [r['data']['questions'] for r in exported if r['type'] == 'quiz']
+
+    assert exported_questions() == [[{k: v for k, v in q.items() if k != 'correct_answer'} for q in QUESTIONS]]
+
+    session.add(QuizAttempt(quiz_id=quiz_id, user_id=collaborator.id, answers=['A'], score=1, total_questions=1,
+                            percentage=100))
+    session.commit()
+    assert exported_questions() == [QUESTIONS]
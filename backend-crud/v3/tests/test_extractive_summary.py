@@ -0,0 +1,85 @@
+import numpy as np
+
+from app.utils import extractive_summary
+from app.utils.extractive_summary import (central_rows, dense_rows, mmr_select, sparse_tfidf, split_sentences,
+                                         summarize, summarize_to_text, tfidf_matrix)
+
+
+def test_split_sentences_drops_short_fragments():
+    text = "Cells divide by mitosis in most tissues. Yes. Meiosis produces four haploid cells!\n- Gametes fuse at fertilization"
+    assert split_sentences(text) == [
+        "Cells divide by mitosis in most tissues.",
+        "Meiosis produces four haploid cells!",
+        "Gametes fuse at fertilization",
+    ]
+
+
+def test_mmr_skips_sentences_too_similar_to_a_picked_one():
+    scores = np.array([1.0, 0.95, 0.2], dtype=np.float32)
+    similarity = np.array([
+        [1.0, 0.85, 0.1],
+        [0.85, 1.0, 0.1],
+        [0.1, 0.1, 1.0],
+    ], dtype=np.float32)
+    assert mmr_select(scores, similarity, 3) == [0, 2]
+    assert mmr_select(scores, similarity, 3, max_similarity=1.0) == [0, 2, 1]
+
+
+def test_mmr_prefers_novel_sentences():
+    scores = np.array([1.0, 0.9, 0.6], dtype=np.float32)
+    similarity = np.array([
+        [1.0, 0.7, 0.0],
+        [0.7, 1.0, 0.0],
+        [0.0, 0.0, 1.0],
+    ], dtype=np.float32)
+    assert mmr_select(scores, similarity, 2) == [0, 2]
+    assert mmr_select(scores, similarity, 2, trade_off=1.0) == [0, 1]
+
+
+def test_summary_keeps_original_order_and_covers_topics():
+    texts = [
+        "Photosynthesis converts light energy into chemical energy stored in glucose.",
+        "Plants perform photosynthesis using chlorophyll in the chloroplasts of leaf cells.",
+        "Photosynthesis in plants converts light energy into glucose using chlorophyll.",
+        "The French Revolution began in 1789 and abolished the monarchy.",
+        "Napoleon rose to power after the French Revolution ended.",
+        "Volcanoes form where tectonic plates diverge or converge.",
+    ] * 3
+    sentences = summarize(texts, max_sentences=3)
+    assert len(sentences) == 3
+    assert sentences == sorted(sentences, key=texts.index)
+    # The two near-identical photosynthesis sentences are not both picked
+    assert sum('light energy' in s for s in sentences) == 1
+    assert any('Revolution' in s for s in sentences)
+
+
+def test_short_texts_are_kept_as_they_are():
+    assert summarize_to_text(["Short note", "Another one"]) == "Short note\nAnother one"
+    assert summarize_to_text([]) == "No highlights provided."
+
+
+def test_large_inputs_are_prefiltered(monkeypatch):
+    monkeypatch.setattr(extractive_summary, 'MAX_SENTENCES', 20)
+    texts = [f"Sentence number {i} mentions topic {i % 7} and detail {i}." for i in range(60)]
+    sentences = summarize(texts, max_sentences=5)
+    assert 0 < len(sentences) <= 5
+
+
+def test_sparse_prefilter_matches_the_dense_centroid():
+    sentences = [f"Sentence number {i} mentions topic {i % 7} and detail {i % 11}." for i in range(40)]
+    dense = tfidf_matrix(sentences)
+    expected = np.sort(np.argsort(-(dense @ dense.mean(axis=0)), kind='stable')[:10])
+    tfidf = sparse_tfidf(sentences)
+    picked = central_rows(tfidf, len(sentences), 10)
+    assert picked.tolist() == expected.tolist()
+    assert np.allclose(dense_rows(tfidf, len(sentences), picked), dense[picked])
+
+
+def test_only_candidates_are_made_dense(monkeypatch):
+    monkeypatch.setattr(extractive_summary, 'MAX_SENTENCES', 20)
+    shapes = []
+    original = extractive_summary.dense_rows
+    monkeypatch.setattr(extractive_summary, 'dense_rows',
+                        lambda *args: shapes.append(original(*args).shape[0]) or original(*args))
+    summarize([f"Sentence number {i} mentions topic {i % 7} and detail {i}." for i in range(60)])
+    assert shapes == [20]
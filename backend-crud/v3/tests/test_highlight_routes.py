@@ -0,0 +1,99 @@
+from app.models.highlight import Highlight
+
+
+def post(client, auth_headers, **fields):
+    data = dict({'url': 'https://example.com/page', 'text': 'Chlorophyll absorbs blue and red light.',
+                 'timestamp': '2026-01-01T10:00:00Z'}, **fields)
+    return client.post('/api/highlights', json=data, headers=auth_headers)
+
+
+def test_new_highlight_is_created(client, auth_headers):
+    response = post(client, auth_headers)
+    assert response.status_code == 201
+    assert Highlight.query.count() == 1
+
+
+def test_same_text_on_the_same_page_returns_the_stored_highlight(client, auth_headers):
+    first = post(client, auth_headers).get_json()['highlight']
+    response = post(client, auth_headers, url='https://EXAMPLE.com/page/?utm_source=feed',
+                    text='Chlorophyll  absorbs blue and red light.')
+    assert response.status_code == 200
+    assert response.get_json()['highlight']['id'] == first['id']
+    assert Highlight.query.count() == 1
+
+
+def test_retry_with_the_same_client_key_returns_the_stored_highlight(client, auth_headers):
+    first = post(client, auth_headers, client_key='retry-1').get_json()['highlight']
+    response = post(client, auth_headers, client_key='retry-1', text='Edited before the retry arrived.')
+    assert response.status_code == 200
+    assert response.get_json()['highlight']['id'] == first['id']
+
+
+def test_update_into_a_duplicate_is_rejected(client, auth_headers):
+    post(client, auth_headers)
+    other = post(client, auth_headers, text='Mitochondria produce ATP.').get_json()['highlight']
+    response = client.put(f"/api/highlights/{other['id']}", headers=auth_headers,
+                          json={'text': 'Chlorophyll absorbs blue and red light.'})
+    assert response.status_code == 400
+
+
+def post_batch(client, auth_headers, items):
+    return client.post('/api/highlights/batch', json={'highlights': items}, headers=auth_headers)
+
+
+def batch_item(text, **fields):
+    return dict({'url': 'https://example.com/page', 'text': text, 'timestamp': '2026-01-01T10:00:00Z'}, **fields)
+
+
+def test_replayed_batch_creates_nothing(client, auth_headers):
+    items = [batch_item('Chlorophyll absorbs blue and red light.', client_key='k1'),
+             batch_item('Mitochondria produce ATP.', client_key='k2')]
+    first = post_batch(client, auth_headers, items).get_json()
+    replay = post_batch(client, auth_headers, items).get_json()
+    assert first['created'] == 2
+    assert (replay['created'], replay['duplicate']) == (0, 2)
+    assert [r['id'] for r in replay['results']] == [r['id'] for r in first['results']]
+    assert Highlight.query.count() == 2
+
+
+def test_duplicates_within_a_batch_point_at_the_first_item(client, auth_headers):
+    body = post_batch(client, auth_headers, [
+        batch_item('Chlorophyll absorbs blue and red light.', client_key='k1'),
+        batch_item('Chlorophyll  absorbs blue and red light.'),
+        batch_item('Chlorophyll absorbs blue and red light.', client_key='k1'),
+    ]).get_json()
+    first, same_text, same_key = body['results']
+    assert first['status'] == 'created'
+    assert (same_text['status'], same_text['id']) == ('duplicate', first['id'])
+    assert (same_key['status'], same_key['id']) == ('duplicate', first['id'])
+    assert Highlight.query.count() == 1
+
+
+def test_reused_client_key_with_different_text_is_an_error(client, auth_headers):
+    body = post_batch(client, auth_headers, [
+        batch_item('Chlorophyll absorbs blue and red light.', client_key='k1'),
+        batch_item('Mitochondria produce ATP.', client_key='k1'),
+    ]).get_json()
+    assert [r['status'] for r in body['results']] == ['created', 'error']
+    assert 'item 0' in body['results'][1]['error']
+    assert Highlight.query.count() == 1
+
+
+def test_malformed_items_are_reported_without_failing_the_batch(client, auth_headers):
+    response = post_batch(client, auth_headers, [
+        'not an object',
+        batch_item('  '),
+        batch_item('No timestamp', timestamp='yesterday'),
+        batch_item('Bad key', client_key=42),
+        batch_item('Unknown collection', collection_id='missing'),
+        batch_item('Mitochondria produce ATP.'),
+    ])
+    body = response.get_json()
+    assert response.status_code == 200
+    assert (body['created'], body['error']) == (1, 5)
+    assert [r['status'] for r in body['results']] == ['error'] * 5 + ['created']
+    assert all(r['error'] for r in body['results'][:5])
+
+
+def test_empty_batch_is_rejected(client, auth_headers):
+    assert post_batch(client, auth_headers, []).status_code == 400
@@ -0,0 +1,197 @@
+import threading
+
+import pytest
+
+from app.utils.llm_client import LLMClient, LLMError, CircuitOpenError, CircuitBreaker
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, json_data=None, headers=None):
+        self.status_code = status_code
+        self._json = json_data
+        self.headers = headers or {}
+        self.text = str(json_data)
+
+    def json(self):
+        return self._json
+
+    def iter_lines(self, decode_unicode=False):
+        return iter(self._json)
+
+    def close(self):
+        pass
+
+
+def completion(content):
+    return FakeResponse(200, {"model": "test-model", "choices": [{"message": {"content": content}}]})
+
+
+def stream(*deltas):
+    lines = [f'data: {{"choices": [{{"delta": {{"content": "{delta}"}}}}]}}' for delta in deltas]
+    return FakeResponse(200, lines + ['data: [DONE]'])
+
+
+def make_client(responses, **kwargs):
+    """A client whose provider answers with `responses` in turn"""
+    options = dict(max_retries=2, backoff_base=0, backoff_max=0, failure_threshold=2, reset_timeout=0)
+    options.update(kwargs)
+    client = LLMClient('http://llm.invalid/v1/chat/completions', 'key', **options)
+    queue = list(responses)
+    client.session.post = lambda *args, **kw: queue.pop(0)
+    return client
+
+
+def open_circuit(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_breaker_lets_one_trial_through_after_reset_timeout():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0)
+    open_circuit(breaker)
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_breaker_stays_open_before_reset_timeout():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    open_circuit(breaker)
+    assert not breaker.allow()
+
+
+def test_chat_retries_server_errors():
+    client = make_client([FakeResponse(503, {}), completion(' Hello ')])
+    result = client.chat({"model": "m"})
+    assert result.content == 'Hello'
+    assert result.retries == 1
+
+
+def test_chat_treats_null_content_as_provider_failure():
+    client = make_client([completion(None)] * 3)
+    with pytest.raises(LLMError):
+        client.chat({"model": "m"})
+    assert client.breaker.failures == 1
+
+
+def test_chat_recovers_from_null_content():
+    client = make_client([completion(None), completion('answer')])
+    assert client.chat({"model": "m"}).content == 'answer'
+
+
+def test_failed_trial_reopens_circuit():
+    client = make_client([FakeResponse(500, {})] * 10, max_retries=0)
+    for _ in range(2):
+        with pytest.raises(LLMError):
+            client.chat({"model": "m"})
+    assert client.breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(LLMError):
+        client.chat({"model": "m"})  # The half-open trial
+    assert client.breaker.state == CircuitBreaker.OPEN
+    assert not client.breaker.trial_in_flight
+
+
+def test_unexpected_error_in_trial_gives_the_slot_back():
+    client = make_client([])
+    open_circuit(client.breaker)
+
+    def broken_post(*args, **kwargs):
+        raise RuntimeError("bug")
+    client.session.post = broken_post
+    with pytest.raises(RuntimeError):
+        client.chat({"model": "m"})
+    assert not client.breaker.trial_in_flight
+
+    client.session.post = lambda *args, **kwargs: completion('ok')
+    assert client.chat({"model": "m"}).content == 'ok'
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_client_errors_do_not_trip_the_breaker():
+    client = make_client([FakeResponse(400, {})] * 5)
+    for _ in range(3):
+        with pytest.raises(LLMError):
+            client.chat({"model": "m"})
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_open_circuit_rejects_without_calling_provider():
+    client = make_client([], reset_timeout=60)
+    open_circuit(client.breaker)
+    with pytest.raises(CircuitOpenError):
+        client.chat({"model": "m"})
+
+
+def test_stream_chat_yields_deltas():
+    client = make_client([stream('Hel', 'lo')])
+    assert list(client.stream_chat({"model": "m"})) == ['Hel', 'lo']
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_stream_without_content_is_retried():
+    client = make_client([stream(), stream('ok')])
+    assert list(client.stream_chat({"model": "m"})) == ['ok']
+
+
+def test_closing_a_trial_stream_settles_the_breaker():
+    client = make_client([stream('a', 'b', 'c')])
+    open_circuit(client.breaker)
+    chunks = client.stream_chat({"model": "m"})
+    assert next(chunks) == 'a'
+    chunks.close()  # The SSE client went away
+    assert client.breaker.state == CircuitBreaker.CLOSED
+    assert not client.breaker.trial_in_flight
+
+
+def test_closing_a_trial_stream_before_any_token_gives_the_slot_back():
+    client = make_client([])
+    open_circuit(client.breaker)
+    chunks = client.stream_chat({"model": "m"})
+
+    def broken_post(*args, **kwargs):
+        raise RuntimeError("bug")
+    client.session.post = broken_post
+    with pytest.raises(RuntimeError):
+        next(chunks)
+    assert not client.breaker.trial_in_flight
+
+
+def test_only_the_trial_permit_releases_the_trial_slot():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    open_circuit(breaker)
+    trial = breaker.allow()
+    assert breaker.allow() is None
+
+    breaker.release(CircuitBreaker.PERMIT)
+    breaker.release(None)
+    assert breaker.trial_in_flight
+
+    breaker.release(trial)
+    assert not breaker.trial_in_flight
+
+
+def test_stale_trial_permit_does_not_release_a_newer_trial():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    open_circuit(breaker)
+    old_trial = breaker.allow()
+    breaker.record_failure()  # Another call failed and reopened the circuit
+    new_trial = breaker.allow()
+    breaker.release(old_trial)
+    assert breaker.trial is new_trial
+
+
+def test_cancelled_call_does_not_release_another_callers_trial():
+    client = make_client([])
+    open_circuit(client.breaker)
+    client.breaker.allow()  # Another caller holds the trial
+    # This call was admitted while the circuit was still closed and is cancelled as a hedge loser
+    client.breaker.allow = lambda: CircuitBreaker.PERMIT
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(LLMError):
+        client.chat({"model": "m"}, cancel)
+    assert client.breaker.trial_in_flight
@@ -0,0 +1,120 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.highlight import Highlight
+from app.utils import pagination
+from app.utils.pagination import CountCache, decode_cursor, encode_cursor, newest_first, paginate
+
+
+@pytest.fixture
+def highlights(session, user):
+    # Pairs share a timestamp, so the id has to break ties
+    base = datetime(2026, 1, 1)
+    rows = [Highlight(url=f'https://example.com/{i}', text=f'Highlight {i}', timestamp=base + timedelta(hours=i // 2),
+                      user_id=user.id) for i in range(7)]
+    session.add_all(rows)
+    session.commit()
+    return sorted(rows, key=lambda h: (h.timestamp, h.id), reverse=True)
+
+
+def test_cursor_round_trips_datetimes():
+    order = newest_first(Highlight)
+    values = [datetime(2026, 1, 1, 12, 30, 15, 250), 'abc']
+    assert decode_cursor(encode_cursor(values), order) == values
+
+
+@pytest.mark.parametrize('cursor', ['not base64!', encode_cursor(['only one value']), encode_cursor({'a': 1})])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError, match='Invalid cursor'):
+        decode_cursor(cursor, newest_first(Highlight))
+
+
+def test_pages_cover_every_row_once_in_order(highlights, user):
+    expected = [h.id for h in highlights]
+    seen, cursor = [], None
+    while True:
+        page = paginate(Highlight.query.filter_by(user_id=user.id), newest_first(Highlight), 3, cursor)
+        assert page.total == len(expected)
+        seen += [h.id for h in page.items]
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert seen == expected
+
+
+def test_last_full_page_has_no_next_cursor(highlights, user):
+    page = paginate(Highlight.query.filter_by(user_id=user.id), newest_first(Highlight), len(highlights))
+    assert page.next_cursor is None
+
+
+def test_total_is_cached_for_later_pages(highlights, user, session, monkeypatch):
+    monkeypatch.setattr(pagination, '_count_cache', CountCache(ttl=60))
+    query = Highlight.query.filter_by(user_id=user.id)
+    first = paginate(query, newest_first(Highlight), 2, count_key=('highlights', user.id))
+    session.add(Highlight(url='https://example.com/new', text='New', timestamp=datetime(2027, 1, 1), user_id=user.id))
+    session.commit()
+    second = paginate(query, newest_first(Highlight), 2, first.next_cursor, count_key=('highlights', user.id))
+    assert second.total == first.total == 7
+    # The first page recounts
+    assert paginate(query, newest_first(Highlight), 2, count_key=('highlights', user.id)).total == 8
+
+
+def test_count_cache_expires_and_stays_bounded(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(pagination.time, 'time', lambda: now[0])
+    cache = CountCache(ttl=10, max_entries=2)
+    assert cache.get('a', lambda: 1) == 1
+    assert cache.get('a', lambda: 2) == 1
+    now[0] += 11
+    assert cache.get('a', lambda: 3) == 3
+    cache.get('b', lambda: 1)
+    cache.get('c', lambda: 1)
+    assert len(cache.entries) <= 2
+
+
+def test_page_request_validates_limit(app):
+    with app.test_request_context('/?limit=0'):
+        with pytest.raises(ValueError):
+            pagination.page_request()
+    with app.test_request_context('/?cursor=abc'):
+        assert pagination.page_request() == (app.config['PAGINATION_DEFAULT_LIMIT'], 'abc')
+    with app.test_request_context('/'):
+        assert pagination.page_request() is None
+
+
+def test_paged_route_response(client, auth_headers, highlights):
+    body = client.get('/api/highlights', query_string={'limit': 3}, headers=auth_headers).get_json()
+    assert set(body) == {'highlights', 'total', 'next_cursor'}
+    assert [h['id'] for h in body['highlights']] == [h.id for h in highlights[:3]]
+    assert body['total'] == len(highlights)
+
+
+def test_leaderboard_page_loads_users_with_the_attempts(app, session, summary):
+    from sqlalchemy import event
+    from app.facade.quiz_attempt_facade import QuizAttemptFacade
+    from app.models.quiz import Quiz
+    from app.models.quiz_attempt import QuizAttempt
+    from app.models.user import User
+    from app.utils.db import db
+    quiz = Quiz(title='Biology quiz', questions=[], timestamp=datetime.utcnow(), summary_id=summary.id)
+    session.add(quiz)
+    for i in range(3):
+        player = User(username=f'player{i}', email=f'player{i}@example.com')
+        session.add(player)
+        session.flush()
+        session.add(QuizAttempt(quiz_id=quiz.id, user_id=player.id, answers={}, percentage=i * 10))
+    session.commit()
+    quiz_id = quiz.id
+    session.expunge_all()
+
+    statements = []
+    count = lambda *args: statements.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        page = QuizAttemptFacade.get_quiz_leaderboard_page(quiz_id, 2)
+        assert [attempt.user.username for attempt in page.items] == ['player2', 'player1']
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+    # The page and its count, with no query per user
+    assert len(statements) == 2
@@ -0,0 +1,136 @@
+from datetime import datetime
+
+import pytest
+
+from app.facade.quiz_facade import QuizFacade
+from app.models.quiz import Quiz
+from app.models.summary import Summary
+from app.utils.ai_service import AIService
+from app.utils.db import db
+
+
+def make_questions(count):
+    return [{'question': f'Question {i}?', 'options': {'A': 'a', 'B': 'b', 'C': 'c', 'D': 'd'}, 'correct_answer': 'A'}
+            for i in range(count)]
+
+
+@pytest.fixture
+def generated(monkeypatch):
+    """Question counts the AI was asked for"""
+    calls = []
+
+    def generate_quiz_from_summary(self, summary, num_questions=4, use_cache=True, context_texts=()):
+        calls.append(num_questions)
+        return {'title': 'Generated', 'questions': make_questions(num_questions)}
+
+    monkeypatch.setattr(AIService, 'generate_quiz_from_summary', generate_quiz_from_summary)
+    return calls
+
+
+def pregenerate(session, summary, count=4):
+    now = datetime.utcnow()
+    quiz = Quiz(summary_id=summary.id, title='Pregenerated', questions=make_questions(count),
+                timestamp=now, pregenerated=True, pregenerated_at=now)
+    session.add(quiz)
+    session.commit()
+    return quiz
+
+
+def test_save_quiz_generates_requested_number_of_questions(summary, generated):
+    quiz = QuizFacade.save_quiz({'summary_id': summary.id, 'num_questions': 12})
+    assert len(quiz.questions) == 12
+    assert generated == [12]
+
+
+def test_save_quiz_claims_matching_pregenerated_quiz(session, summary, generated):
+    pregenerated = pregenerate(session, summary)
+    quiz = QuizFacade.save_quiz({'summary_id': summary.id, 'num_questions': 4})
+    assert quiz.id == pregenerated.id
+    assert not quiz.pregenerated
+    assert generated == []
+
+
+def test_save_quiz_replaces_pregenerated_quiz_of_another_size(session, summary, generated):
+    pregenerated_id = pregenerate(session, summary).id
+    quiz = QuizFacade.save_quiz({'summary_id': summary.id, 'num_questions': 20})
+    assert quiz.id != pregenerated_id
+    assert len(quiz.questions) == 20
+    assert Quiz.query.filter_by(summary_id=summary.id).count() == 1
+
+
+def test_save_quiz_instant_mode_does_not_claim_pregenerated_quiz(session, summary, generated):
+    pregenerated_id = pregenerate(session, summary).id
+    quiz = QuizFacade.save_quiz({'summary_id': summary.id, 'num_questions': 4, 'mode': 'instant'})
+    assert quiz.id != pregenerated_id
+    assert quiz.title != 'Pregenerated'
+
+
+def test_instant_quiz_from_a_too_short_summary_is_not_stored(session, summary):
+    summary.content = 'Cells divide.'
+    session.commit()
+    with pytest.raises(ValueError, match='Not enough content'):
+        QuizFacade.save_quiz({'summary_id': summary.id, 'num_questions': 4, 'mode': 'instant'})
+    assert Quiz.query.count() == 0
+
+
+def test_instant_regeneration_keeps_the_quiz_when_no_questions_can_be_built(session, summary):
+    quiz = pregenerate(session, summary)
+    summary.content = 'Cells divide.'
+    session.commit()
+    with pytest.raises(ValueError, match='Not enough content'):
+        QuizFacade.regenerate_quiz_instantly(quiz.id)
+    session.expire_all()
+    assert len(Quiz.query.get(quiz.id).questions) == 4
+
+
+def test_save_quiz_rejects_second_quiz(session, summary, generated):
+    QuizFacade.save_quiz({'summary_id': summary.id})
+    with pytest.raises(ValueError):
+        QuizFacade.save_quiz({'summary_id': summary.id})
+
+
+def test_batch_replaces_pregenerated_quiz_of_another_size(session, summary, user, generated):
+    pregenerate(session, summary)
+    [result] = QuizFacade.save_quizzes_batch([summary.id], user, num_questions=8)
+    assert result['status'] == 'created'
+    assert len(result['quiz'].questions) == 8
+    assert generated == [8]
+
+
+def test_unclaimed_pregenerated_quiz_is_hidden_until_claimed(session, summary, user):
+    quiz = pregenerate(session, summary)
+    assert QuizFacade.get_accessible_quizzes(user.id) == []
+
+    QuizFacade.claim_quiz(quiz)
+    assert [q.id for q in QuizFacade.get_accessible_quizzes(user.id)] == [quiz.id]
+
+
+def test_claimed_quiz_is_not_replaced_by_pregeneration(app, session, summary, monkeypatch):
+    quiz = QuizFacade.claim_quiz(pregenerate(session, summary))
+    monkeypatch.setitem(app.config, 'AI_EAGER_QUIZ_ENABLED', True)
+    assert not QuizFacade.schedule_pregeneration(summary, replace=True)
+    assert Quiz.query.get(quiz.id) is not None
+
+
+def test_batch_keeps_other_quizzes_when_one_summary_gets_a_quiz_meanwhile(session, summary, user, monkeypatch):
+    other = Summary(content='Mitochondria produce most of the cell\'s ATP.', timestamp=datetime.utcnow(),
+                    collection_id=summary.collection_id, user_id=user.id)
+    session.add(other)
+    session.commit()
+    summary_id, other_id = summary.id, other.id
+
+    def generate_quiz_from_summary(self, content, num_questions=4, use_cache=True, context_texts=()):
+        if content == other.content:
+            # Runs in the worker's own session, like a concurrent POST /quizzes
+            db.session.add(Quiz(summary_id=other_id, title='Concurrent', questions=make_questions(1),
+                                timestamp=datetime.utcnow()))
+            db.session.commit()
+        return {'title': 'Generated', 'questions': make_questions(num_questions)}
+
+    monkeypatch.setattr(AIService, 'generate_quiz_from_summary', generate_quiz_from_summary)
+    results = QuizFacade.save_quizzes_batch([summary_id, other_id], user)
+
+    assert [r['status'] for r in results] == ['created', 'error']
+    assert results[1]['error'] == 'A quiz already exists for this summary'
+    assert Quiz.query.filter_by(summary_id=summary_id).one().title == 'Generated'
+    assert Quiz.query.filter_by(summary_id=other_id).one().title == 'Concurrent'
@@ -0,0 +1,89 @@
+import pytest
+
+from app.utils import ai_service
+from app.utils.quiz_parser import QuizParseError, QuizParseStats, extract_json, parse_quiz_questions, validate_question
+
+QUESTION = ('{"question": "What do plants convert light into?", '
+            '"options": {"A": "Chemical energy", "B": "Heat", "C": "Sound", "D": "Water"}, "correct_answer": "A"}')
+OTHER = QUESTION.replace('What do plants convert light into?', 'Which energy do plants store?')
+
+
+@pytest.mark.parametrize('text, repaired', [
+    (f'[{QUESTION}]', False),
+    (f'```json\n[{QUESTION}]\n```', True),
+    (f'```\n[{QUESTION}]\n```', True),
+    (f'Here is your quiz:\n[{QUESTION}]', True),
+    (f'[{QUESTION}]\nLet me know if you need more questions.', True),
+    (f'Sure!\n```json\n[{QUESTION}]\n```\nGood luck!', True),
+    (f'[{QUESTION},]', True),
+    (f'{{"questions": [{QUESTION},],}}', True),
+    (f'[{QUESTION}, {{"question": "Which energy', True),
+    (f'```json\n[{QUESTION}, {{"question": "Which', True),
+])
+def test_extract_json_recovers_the_first_question(text, repaired):
+    value, was_repaired = extract_json(text)
+    items = value['questions'] if isinstance(value, dict) else value
+    assert items[0]['question'] == 'What do plants convert light into?'
+    assert was_repaired == repaired
+
+
+@pytest.mark.parametrize('text', ['', 'No quiz today, sorry.', '[{"question": "cut off'])
+def test_extract_json_rejects_completions_without_json(text):
+    with pytest.raises(QuizParseError):
+        extract_json(text)
+
+
+@pytest.mark.parametrize('changes', [
+    {'question': '  '},
+    {'question': None},
+    {'options': {'A': 'Chemical energy', 'B': 'Heat', 'C': 'Sound'}},
+    {'options': {'A': 'Heat', 'B': 'Heat', 'C': 'Sound', 'D': 'Water'}},
+    {'options': {'A': 'Chemical energy', 'B': '', 'C': 'Sound', 'D': 'Water'}},
+    {'options': ['Chemical energy', 'Heat', 'Sound']},
+    {'correct_answer': 'E'},
+    {'correct_answer': 'Photosynthesis'},
+    {'correct_answer': None},
+])
+def test_invalid_question_is_rejected(changes):
+    item = {'question': 'What do plants convert light into?',
+            'options': {'A': 'Chemical energy', 'B': 'Heat', 'C': 'Sound', 'D': 'Water'}, 'correct_answer': 'A'}
+    item.update(changes)
+    assert validate_question(item) is None
+
+
+@pytest.mark.parametrize('options, answer', [
+    ({'a': 'Chemical energy', 'b': 'Heat', 'c': 'Sound', 'd': 'Water'}, 'a'),
+    ({'Option A': 'Chemical energy', 'Option B': 'Heat', 'Option C': 'Sound', 'Option D': 'Water'}, 'Answer: A'),
+    (['Chemical energy', 'Heat', 'Sound', 'Water'], 'A) Chemical energy'),
+    ({'A': 'Chemical energy', 'B': 'Heat', 'C': 'Sound', 'D': 'Water'}, 'chemical energy'),
+])
+def test_question_is_normalized(options, answer):
+    question = validate_question({'question': ' What do plants convert light into? ', 'options': options,
+                                  'answer': answer})
+    assert question == {'question': 'What do plants convert light into?',
+                        'options': {'A': 'Chemical energy', 'B': 'Heat', 'C': 'Sound', 'D': 'Water'},
+                        'correct_answer': 'A'}
+
+
+@pytest.mark.parametrize('text, kept, dropped, stats', [
+    (f'[{QUESTION}, {OTHER}]', 2, 0, {'clean': 1, 'repaired': 0, 'failed': 0}),
+    (f'[{QUESTION}, {{"question": "No options"}}, {OTHER}]', 2, 1, {'clean': 0, 'repaired': 1, 'failed': 0}),
+    (f'[{QUESTION}, {QUESTION}]', 1, 1, {'clean': 0, 'repaired': 1, 'failed': 0}),
+    ('[{"question": "No options"}, "not a question"]', 0, 2, {'clean': 0, 'repaired': 0, 'failed': 1}),
+    ('No quiz today, sorry.', 0, 0, {'clean': 0, 'repaired': 0, 'failed': 1}),
+])
+def test_dropped_questions_are_counted(monkeypatch, text, kept, dropped, stats):
+    monkeypatch.setattr(ai_service, 'quiz_parse_stats', QuizParseStats())
+    service = ai_service.AIService.__new__(ai_service.AIService)
+    questions = service._parse_quiz_completion(text)
+    snapshot = ai_service.quiz_parse_stats.snapshot()
+    assert len(questions or []) == kept
+    assert snapshot['questions_kept'] == kept
+    assert snapshot['questions_dropped'] == dropped
+    assert {key: snapshot[key] for key in stats} == stats
+
+
+def test_single_question_object_is_accepted():
+    questions, dropped, repaired = parse_quiz_questions(QUESTION)
+    assert len(questions) == 1
+    assert (dropped, repaired) == (0, False)
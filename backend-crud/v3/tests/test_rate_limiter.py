@@ -0,0 +1,82 @@
+import pytest
+
+from app.utils import rate_limiter
+from app.utils.rate_limiter import AIRateLimiter, RateLimitExceeded, TokenBucket, LANE_BATCH
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limiter.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_bucket_refills_up_to_capacity():
+    bucket = TokenBucket(10, 1)
+    bucket.consume(10)
+    bucket.refill(bucket.updated + 4)
+    assert bucket.level == 4
+    bucket.refill(bucket.updated + 100)
+    assert bucket.level == 10
+
+
+def test_request_larger_than_bucket_is_charged_in_full():
+    bucket = TokenBucket(10, 1)
+    assert bucket.wait_time(25) == 0
+    bucket.consume(25)
+    assert bucket.level == -15
+    # The debt is paid back before even a small request fits
+    assert bucket.wait_time(1) == 16
+
+
+def test_large_request_waits_for_a_full_bucket():
+    bucket = TokenBucket(10, 2)
+    bucket.consume(4)
+    assert bucket.wait_time(50) == 2
+
+
+def test_zero_rate_bucket_never_refills():
+    bucket = TokenBucket(1, 0)
+    bucket.consume(1)
+    assert bucket.wait_time(1) == float('inf')
+    assert RateLimitExceeded('global requests', float('inf')).retry_after == 60
+
+
+def test_rejected_request_is_not_charged(clock):
+    limiter = AIRateLimiter(user_rpm=10, user_tpm=100, endpoint_rpm=10)
+    limiter.check('u1', 'summaries', 80)
+    with pytest.raises(RateLimitExceeded) as excinfo:
+        limiter.check('u1', 'summaries', 80)
+    assert excinfo.value.scope == 'user tokens'
+    assert limiter.buckets[('user', 'u1', 'requests')].level == 9
+    assert limiter.get_stats()['rejected'] == {'user tokens': 1}
+
+
+def test_oversized_request_puts_the_user_in_debt(clock):
+    limiter = AIRateLimiter(user_rpm=10, user_tpm=60, endpoint_rpm=10)
+    limiter.check('u1', 'summaries', 240)
+    clock[0] += 60
+    with pytest.raises(RateLimitExceeded) as excinfo:
+        limiter.check('u1', 'summaries', 1)
+    assert excinfo.value.scope == 'user tokens'
+    assert excinfo.value.retry_after == 121
+    # Other users are only limited by their own and the global buckets
+    limiter.check('u2', 'summaries', 1)
+
+
+def test_batch_lane_leaves_the_reserve_for_interactive_requests(clock):
+    limiter = AIRateLimiter(user_rpm=100, endpoint_rpm=100, global_rpm=8, batch_reserve=0.25)
+    limiter.check('u1', 'batch', 100, requests=6, lane=LANE_BATCH)
+    with pytest.raises(RateLimitExceeded) as excinfo:
+        limiter.check('u1', 'batch', 100, requests=1, lane=LANE_BATCH)
+    assert excinfo.value.scope == 'global requests'
+    limiter.check('u2', 'summaries', 100)
+
+
+def test_global_budget_is_split_between_workers(app, monkeypatch):
+    monkeypatch.setattr(rate_limiter, '_rate_limiter', None)
+    monkeypatch.setitem(app.config, 'AI_RATE_WORKERS', 4)
+    with app.app_context():
+        limiter = rate_limiter.get_rate_limiter()
+    assert limiter.global_buckets['global requests'].capacity == app.config['AI_RATE_GLOBAL_RPM'] / 4
+    assert limiter.global_buckets['global tokens'].capacity == app.config['AI_RATE_GLOBAL_TPM'] / 4
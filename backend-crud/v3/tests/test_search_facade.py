@@ -0,0 +1,71 @@
+from datetime import datetime
+
+from app.facade.search_facade import SearchFacade
+from app.models.highlight import Highlight
+from app.models.user import User
+from app.utils.db import db
+
+
+def add_highlight(session, user, text):
+    highlight = Highlight(url='https://example.com/page', text=text, timestamp=datetime.utcnow(), user_id=user.id)
+    session.add(highlight)
+    session.commit()
+    return highlight
+
+
+def search_ids(user_id, q):
+    return [result['id'] for result in SearchFacade.search(user_id, q)]
+
+
+def test_search_finds_own_highlights_only(session, user):
+    other = User(username='other', email='other@example.com')
+    session.add(other)
+    session.commit()
+    mine = add_highlight(session, user, 'Zebras have black and white stripes')
+    add_highlight(session, other, 'Zebras live in Africa')
+
+    assert search_ids(user.id, 'zebra') == [mine.id]
+
+
+def test_search_follows_edits_and_deletes(session, user):
+    highlight = add_highlight(session, user, 'Zebras have stripes')
+    highlight.text = 'Lions have manes'
+    session.commit()
+    assert search_ids(user.id, 'zebra') == []
+    assert search_ids(user.id, 'lion') == [highlight.id]
+
+    session.delete(highlight)
+    session.commit()
+    assert search_ids(user.id, 'lion') == []
+
+
+def test_search_survives_vacuum(session, user):
+    # Deleting rows leaves gaps that VACUUM may close by renumbering implicit rowids
+    doomed = [add_highlight(session, user, f'Filler note number {i}') for i in range(5)]
+    kept = add_highlight(session, user, 'Mitochondria produce energy')
+    last = add_highlight(session, user, 'Ribosomes build proteins')
+    for highlight in doomed:
+        session.delete(highlight)
+    session.commit()
+    user_id, kept_id, last_id = user.id, kept.id, last.id
+    session.close()
+    with db.engine.connect() as connection:
+        connection.exec_driver_sql('VACUUM')
+
+    assert search_ids(user_id, 'mitochondria') == [kept_id]
+    assert search_ids(user_id, 'ribosomes') == [last_id]
+
+
+def test_ranking_depends_on_the_users_own_matches(app, session, user, monkeypatch):
+    other = User(username='other', email='other@example.com')
+    session.add(other)
+    session.commit()
+    best = add_highlight(session, user, 'Zebra zebra zebra')
+    newer = add_highlight(session, user, 'A zebra crossed the road near the river at dawn today')
+    sightings = [add_highlight(session, other, f'Zebra sighting number {i}').id for i in range(5)]
+    monkeypatch.setitem(app.config, 'SEARCH_RANK_MAX_MATCHES', 3)
+
+    # Seven documents match, but only two of them are the user's, so results are still ranked
+    assert search_ids(user.id, 'zebra') == [best.id, newer.id]
+    # The other user has too many matches to rank: newest first
+    assert search_ids(other.id, 'zebra') == sightings[::-1]
@@ -0,0 +1,62 @@
+import threading
+import time
+from datetime import datetime
+
+from app.models.ai_lease import AILease
+from app.models.collection import Collection
+from app.utils.single_flight import SingleFlight
+
+
+def run_in_worker(app, flight, key, fn, results):
+    with app.app_context():
+        try:
+            results.append(flight.do(key, fn))
+        finally:
+            from app.utils.db import db
+            db.session.remove()
+
+
+def test_concurrent_callers_in_two_workers_share_one_call(app, session):
+    session.commit()
+    calls = []
+    started = threading.Event()
+
+    def call():
+        calls.append(1)
+        started.set()
+        time.sleep(0.3)
+        return 'completion'
+
+    # Each SingleFlight stands for one worker process, coordinating through the lease table
+    workers = [SingleFlight(poll_interval=0.02), SingleFlight(poll_interval=0.02)]
+    results = []
+    leader = threading.Thread(target=run_in_worker, args=(app, workers[0], 'key', call, results))
+    leader.start()
+    assert started.wait(2)
+    follower = threading.Thread(target=run_in_worker, args=(app, workers[1], 'key', call, results))
+    follower.start()
+    leader.join()
+    follower.join()
+
+    assert results == ['completion', 'completion']
+    assert len(calls) == 1
+    assert workers[1].get_stats()['remote_followers'] == 1
+    assert AILease.query.filter_by(lease_key='key').one().value == 'completion'
+
+
+def test_caller_holding_the_write_lock_does_not_wait_for_it(app, session, user):
+    session.add(Collection(title='Pending', timestamp=datetime.utcnow(), user_id=user.id))
+    session.flush()
+    flight = SingleFlight()
+    started = time.monotonic()
+    assert flight.do('key', lambda: 'completion') == 'completion'
+    assert time.monotonic() - started < 1
+    session.commit()
+    assert AILease.query.count() == 0
+
+
+def test_lease_is_taken_after_a_read(app, session, user):
+    Collection.query.all()
+    flight = SingleFlight()
+    assert flight.do('key', lambda: 'completion') == 'completion'
+    assert AILease.query.filter_by(lease_key='key').one().owner == flight.owner
@@ -0,0 +1,39 @@
+from datetime import datetime
+
+from app.models.highlight import Highlight
+from app.models.summary import Summary
+from app.utils.ai_service import AIService
+
+
+def add_highlight(session, user, collection_id, text):
+    highlight = Highlight(url='https://example.com/page', text=text, timestamp=datetime.utcnow(),
+                          user_id=user.id, collection_id=collection_id)
+    session.add(highlight)
+    session.commit()
+    return highlight
+
+
+def test_empty_stream_is_not_saved_or_regenerated(client, auth_headers, session, user, summary, monkeypatch):
+    add_highlight(session, user, summary.collection_id, 'Chlorophyll absorbs blue and red light.')
+    generated = []
+    monkeypatch.setattr(AIService, 'stream_summary_from_highlights', lambda self, *args, **kwargs: iter(['', ' ']))
+    monkeypatch.setattr(AIService, 'generate_summary_from_highlights',
+                        lambda self, *args, **kwargs: generated.append(True) or 'generated')
+
+    response = client.get(f'/api/collections/{summary.collection_id}/summaries/stream', headers=auth_headers)
+    body = response.get_data(as_text=True)
+
+    assert 'event: error' in body
+    assert generated == []
+    assert Summary.query.count() == 1  # Only the fixture's summary
+
+
+def test_stream_saves_streamed_text(client, auth_headers, session, user, summary, monkeypatch):
+    add_highlight(session, user, summary.collection_id, 'Chlorophyll absorbs blue and red light.')
+    monkeypatch.setattr(AIService, 'stream_summary_from_highlights',
+                        lambda self, *args, **kwargs: iter(['Plants ', 'absorb light.']))
+
+    response = client.get(f'/api/collections/{summary.collection_id}/summaries/stream', headers=auth_headers)
+
+    assert 'event: done' in response.get_data(as_text=True)
+    assert Summary.query.filter_by(content='Plants absorb light.').count() == 1
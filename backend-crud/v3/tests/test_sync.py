@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+
+from app.facade.sync_facade import encode_cursor
+from app.models.highlight import Highlight
+
+
+def sync(client, headers, **params):
+    response = client.get('/api/sync', query_string=params, headers=headers)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def add_highlights(session, user, count):
+    for i in range(count):
+        session.add(Highlight(url='https://example.com/page', text=f'Fact number {i}.',
+                              timestamp=datetime.utcnow(), user_id=user.id))
+    session.commit()
+
+
+def test_deleted_highlight_is_reported_in_the_next_sync(client, auth_headers, session, user):
+    add_highlights(session, user, 1)
+    first = sync(client, auth_headers)
+    highlight_id = first['highlights'][0]['id']
+    assert client.delete(f'/api/highlights/{highlight_id}', headers=auth_headers).status_code == 200
+
+    changes = sync(client, auth_headers, since=first['cursor'])
+    assert changes['deleted']['highlights'] == [highlight_id]
+    assert changes['highlights'] == []
+    assert not changes['reset']
+
+
+def test_cursor_older_than_the_retention_resets(app, client, auth_headers, session, user):
+    add_highlights(session, user, 1)
+    days = app.config.get('SYNC_TOMBSTONE_RETENTION_DAYS', 90)
+    stale = encode_cursor((datetime.utcnow() - timedelta(days=days + 1), ''))
+    changes = sync(client, auth_headers, since=stale)
+    assert changes['reset']
+    assert len(changes['highlights']) == 1
+
+
+def test_collaborator_sees_summary_deleted_by_the_owner(client, auth_headers, collaborator_headers, summary):
+    summary_id = summary.id
+    first = sync(client, collaborator_headers)
+    assert [row['id'] for row in first['summaries']] == [summary_id]
+    assert client.delete(f'/api/summaries/{summary_id}', headers=auth_headers).status_code == 200
+
+    changes = sync(client, collaborator_headers, since=first['cursor'])
+    assert changes['deleted']['summaries'] == [summary_id]
+
+
+def test_removed_collaborator_gets_tombstones_for_the_collection(client, auth_headers, collaborator,
+                                                                 collaborator_headers, summary):
+    collection_id, summary_id, collaborator_id = summary.collection_id, summary.id, collaborator.id
+    first = sync(client, collaborator_headers)
+    response = client.delete(f'/api/collections/{collection_id}/collaborators/{collaborator_id}', headers=auth_headers)
+    assert response.status_code == 200
+
+    changes = sync(client, collaborator_headers, since=first['cursor'])
+    assert changes['deleted']['collections'] == [collection_id]
+    assert changes['deleted']['summaries'] == [summary_id]
+
+
+def test_page_of_exactly_limit_rows_has_no_more(client, auth_headers, session, user):
+    add_highlights(session, user, 3)
+    changes = sync(client, auth_headers, limit=3)
+    assert len(changes['highlights']) == 3
+    assert not changes['has_more']
+
+
+def test_has_more_pages_continue_from_the_cursor(client, auth_headers, session, user):
+    add_highlights(session, user, 3)
+    first = sync(client, auth_headers, limit=2)
+    assert len(first['highlights']) == 2
+    assert first['has_more']
+
+    rest = sync(client, auth_headers, limit=2, since=first['cursor'])
+    assert not rest['has_more']
+    assert not rest['reset']
+    ids = [row['id'] for row in first['highlights'] + rest['highlights']]
+    assert sorted(ids) == sorted(highlight.id for highlight in Highlight.query.all())